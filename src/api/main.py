@@ -21,6 +21,7 @@ from fastapi.staticfiles import StaticFiles
 import uvicorn
 import logging
 from contextlib import asynccontextmanager
+from functools import partial
 
 from src.config.settings import get_settings
 from src.config.logging import setup_logging
@@ -30,6 +31,7 @@ from src.api.routers import auth, memories, contexts, admin
 from src.api.dependencies import get_enhanced_db, get_current_user
 from src.schemas.auth import TokenData
 from src.config.manager import ConfigManager
+from src.utils import json_codec
 
 # Setup logging
 setup_logging()
@@ -263,6 +265,50 @@ async def mcp_handler(request: Request):
         logger.error(f"MCP handler error: {e}")
         raise HTTPException(status_code=500, detail="MCP processing failed")
 
+# MCP resource name -> result key for search results
+MCP_RESOURCES = {
+    "memory": "memories",
+    "context": "contexts",
+    "relation": "relations"
+}
+
+async def _mcp_search(resource: str, db_method: str, params: dict) -> dict:
+    """Search a resource type; e.g. memory.search -> db.search_memories."""
+    items = await getattr(db_instance, db_method)(params.get("query", ""), params.get("filters", {}))
+    return {MCP_RESOURCES[resource]: [item.dict() for item in items]}
+
+async def _mcp_create(resource: str, db_method: str, params: dict) -> dict:
+    """Create a resource from params[resource]."""
+    item = await getattr(db_instance, db_method)(params.get(resource, {}))
+    return {resource: item.dict()}
+
+async def _mcp_update(resource: str, db_method: str, params: dict) -> dict:
+    """Update the resource params["id"] with params[resource]."""
+    item = await getattr(db_instance, db_method)(params.get("id"), params.get(resource, {}))
+    return {resource: item.dict()}
+
+async def _mcp_delete(resource: str, db_method: str, params: dict) -> dict:
+    """Delete the resource params["id"]."""
+    await getattr(db_instance, db_method)(params.get("id"))
+    return {"success": True}
+
+# MCP method -> handler specialized for its resource and database method,
+# e.g. "memory.search" -> _mcp_search("memory", "search_memories", params)
+MCP_METHODS = {
+    f"{resource}.{action}": partial(
+        handler,
+        resource,
+        f"{action}_{plural if action == 'search' else resource}"
+    )
+    for resource, plural in MCP_RESOURCES.items()
+    for action, handler in (
+        ("search", _mcp_search),
+        ("create", _mcp_create),
+        ("update", _mcp_update),
+        ("delete", _mcp_delete)
+    )
+}
+
 async def process_mcp_request(mcp_data: dict):
     """
     Process MCP request.
@@ -278,182 +324,9 @@ async def process_mcp_request(mcp_data: dict):
     params = mcp_data.get("params", {})
     id = mcp_data.get("id")
     
-    # Process based on method
-    if method == "memory.search":
-        # Search memories
-        query = params.get("query", "")
-        filters = params.get("filters", {})
-        
-        memories = await db_instance.search_memories(query, filters)
-        
-        return {
-            "jsonrpc": "2.0",
-            "result": {
-                "memories": [memory.dict() for memory in memories]
-            },
-            "id": id
-        }
-        
-    elif method == "memory.create":
-        # Create memory
-        memory_data = params.get("memory", {})
-        
-        memory = await db_instance.create_memory(memory_data)
-        
-        return {
-            "jsonrpc": "2.0",
-            "result": {
-                "memory": memory.dict()
-            },
-            "id": id
-        }
-        
-    elif method == "memory.update":
-        # Update memory
-        memory_id = params.get("id")
-        memory_data = params.get("memory", {})
-        
-        memory = await db_instance.update_memory(memory_id, memory_data)
-        
-        return {
-            "jsonrpc": "2.0",
-            "result": {
-                "memory": memory.dict()
-            },
-            "id": id
-        }
-        
-    elif method == "memory.delete":
-        # Delete memory
-        memory_id = params.get("id")
-        
-        await db_instance.delete_memory(memory_id)
-        
-        return {
-            "jsonrpc": "2.0",
-            "result": {
-                "success": True
-            },
-            "id": id
-        }
-        
-    elif method == "context.search":
-        # Search contexts
-        query = params.get("query", "")
-        filters = params.get("filters", {})
-        
-        contexts = await db_instance.search_contexts(query, filters)
-        
-        return {
-            "jsonrpc": "2.0",
-            "result": {
-                "contexts": [context.dict() for context in contexts]
-            },
-            "id": id
-        }
-        
-    elif method == "context.create":
-        # Create context
-        context_data = params.get("context", {})
-        
-        context = await db_instance.create_context(context_data)
-        
-        return {
-            "jsonrpc": "2.0",
-            "result": {
-                "context": context.dict()
-            },
-            "id": id
-        }
-        
-    elif method == "context.update":
-        # Update context
-        context_id = params.get("id")
-        context_data = params.get("context", {})
-        
-        context = await db_instance.update_context(context_id, context_data)
-        
-        return {
-            "jsonrpc": "2.0",
-            "result": {
-                "context": context.dict()
-            },
-            "id": id
-        }
-        
-    elif method == "context.delete":
-        # Delete context
-        context_id = params.get("id")
-        
-        await db_instance.delete_context(context_id)
-        
-        return {
-            "jsonrpc": "2.0",
-            "result": {
-                "success": True
-            },
-            "id": id
-        }
-        
-    elif method == "relation.search":
-        # Search relations
-        query = params.get("query", "")
-        filters = params.get("filters", {})
-        
-        relations = await db_instance.search_relations(query, filters)
-        
-        return {
-            "jsonrpc": "2.0",
-            "result": {
-                "relations": [relation.dict() for relation in relations]
-            },
-            "id": id
-        }
-        
-    elif method == "relation.create":
-        # Create relation
-        relation_data = params.get("relation", {})
-        
-        relation = await db_instance.create_relation(relation_data)
-        
-        return {
-            "jsonrpc": "2.0",
-            "result": {
-                "relation": relation.dict()
-            },
-            "id": id
-        }
-        
-    elif method == "relation.update":
-        # Update relation
-        relation_id = params.get("id")
-        relation_data = params.get("relation", {})
-        
-        relation = await db_instance.update_relation(relation_id, relation_data)
-        
-        return {
-            "jsonrpc": "2.0",
-            "result": {
-                "relation": relation.dict()
-            },
-            "id": id
-        }
-        
-    elif method == "relation.delete":
-        # Delete relation
-        relation_id = params.get("id")
-        
-        await db_instance.delete_relation(relation_id)
-        
-        return {
-            "jsonrpc": "2.0",
-            "result": {
-                "success": True
-            },
-            "id": id
-        }
-        
-    else:
+    # Dispatch with a single table lookup
+    handler = MCP_METHODS.get(method)
+    if handler is None:
         # Unknown method
         return {
             "jsonrpc": "2.0",
@@ -463,6 +336,12 @@ async def process_mcp_request(mcp_data: dict):
             },
             "id": id
         }
+        
+    return {
+        "jsonrpc": "2.0",
+        "result": await handler(params),
+        "id": id
+    }
 
 # WebSocket endpoint for real-time updates
 @app.websocket("/ws")
@@ -478,10 +357,10 @@ async def websocket_endpoint(websocket):
             data = await websocket.receive_text()
             
             # Process message
-            response = await process_mcp_request(data)
+            response = await process_mcp_request(json_codec.loads(data))
             
             # Send response
-            await websocket.send_text(response)
+            await websocket.send_text(json_codec.dumps(response))
             
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
@@ -10,10 +10,13 @@ Project Fingerprint: 7a8f9b3c-mcpmem-voicelessq-2024
 Original Author: VoiceLessQ
 """
 
+import logging
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from typing import Iterator, List, Optional, Dict, Any
 from .models import Memory
 
+logger = logging.getLogger(__name__)
+
 class DatabaseInterface(ABC):
     """Abstract interface for database operations required by DeduplicationManager."""
 
@@ -32,12 +35,13 @@ class DatabaseInterface(ABC):
         pass
 
     @abstractmethod
-    def get_all_memories(self, limit: Optional[int] = None, **kwargs) -> List[Memory]:
+    def get_all_memories(self, limit: Optional[int] = None, offset: int = 0, **kwargs) -> List[Memory]:
         """
-        Retrieve all memories from the database.
+        Retrieve all memories from the database, in a stable order.
         
         Args:
             limit: Optional maximum number of memories to retrieve.
+            offset: Number of memories to skip before the first one returned.
             **kwargs: Additional arguments for getting memories.
             
         Returns:
@@ -45,6 +49,57 @@ class DatabaseInterface(ABC):
         """
         pass
 
+    def iter_memories(self, batch_size: int = 10_000, **kwargs) -> Iterator[Memory]:
+        """
+        Iterate over all memories without materializing them as one list.
+        
+        Backends should override this with a server-side cursor that fetches
+        batch_size rows at a time; the default pages through get_all_memories
+        with limit and offset, so at most one page is held at once.
+        
+        Args:
+            batch_size: Number of rows to fetch per round-trip.
+            **kwargs: Additional arguments for getting memories.
+            
+        Yields:
+            Memory objects.
+        """
+        offset = 0
+        first_id = None
+        while True:
+            page = self.get_all_memories(limit=batch_size, offset=offset, **kwargs)
+            if not page:
+                return
+                
+            if offset == 0:
+                first_id = page[0].id
+            elif page[0].id == first_id:
+                # The backend ignored offset and returned the first page again
+                logger.warning("get_all_memories ignored offset; stopping after the first page")
+                return
+                
+            yield from page
+            if len(page) < batch_size:
+                return
+            offset += len(page)
+
+    def get_memories_by_ids(self, memory_ids: List[int], **kwargs) -> List[Memory]:
+        """
+        Retrieve several memories by ID, skipping any that don't exist.
+        
+        Backends that can fetch in one query should override this; the default
+        falls back to one get_memory call per ID.
+        
+        Args:
+            memory_ids: IDs of the memories to retrieve, in the desired order.
+            **kwargs: Additional arguments passed through to get_memory.
+            
+        Returns:
+            List of the Memory objects found, in the order of memory_ids.
+        """
+        memories = (self.get_memory(memory_id, **kwargs) for memory_id in memory_ids)
+        return [memory for memory in memories if memory]
+
     @abstractmethod
     def update_memory(self, memory_id: int, updates: Dict[str, Any], **kwargs) -> Optional[Memory]:
         """
@@ -15,10 +15,11 @@ Repository interfaces for data access abstraction.
 Following the Repository pattern to separate data access from business logic.
 """
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from typing import Dict, Any, List, Optional, Protocol
 from datetime import datetime
 
-from ..models import Memory, Context, Relation, MemoryChunk
+from ..models import Memory, Context, Relation, MemoryChunk, ChunkBlob
 
 
 class MemoryRepository(ABC):
@@ -32,6 +33,10 @@ class MemoryRepository(ABC):
         """Create a new memory entity."""
         pass
     
+    async def create_many(self, memories: List[Memory]) -> List[Memory]:
+        """Create several memory entities; implementations may use one transaction."""
+        return [await self.create(memory) for memory in memories]
+    
     @abstractmethod
     async def find_by_id(self, memory_id: int) -> Optional[Memory]:
         """Find memory by ID."""
@@ -48,8 +53,14 @@ class MemoryRepository(ABC):
         pass
     
     @abstractmethod
-    async def search(self, query: str, filters: Dict[str, Any], limit: int = 100) -> List[Memory]:
-        """Search memories with filters."""
+    async def search(
+        self,
+        query: str,
+        filters: Dict[str, Any],
+        limit: int = 100,
+        include_content: bool = True
+    ) -> List[Memory]:
+        """Search memories with filters; include_content=False may skip loading content."""
         pass
     
     @abstractmethod
@@ -153,6 +164,37 @@ class ChunkRepository(ABC):
     async def delete_by_memory(self, memory_id: int) -> bool:
         """Delete all chunks for a memory."""
         pass
+    
+    @abstractmethod
+    async def aggregate_by_memory(self, memory_id: int) -> Dict[str, Any]:
+        """
+        Aggregate chunk statistics for a memory in a single query.
+        Returns chunk_count, total_original_size, total_compressed_size and
+        compression_types (distinct values).
+        """
+        pass
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Group several writes into one transaction.
+        The default provides no atomicity; transactional stores should commit
+        once on exit, roll back if the block raises, and join an outer block.
+        """
+        yield
+    
+    @abstractmethod
+    async def find_blob_by_hash(self, chunk_hash: str) -> Optional[ChunkBlob]:
+        """Find a shared chunk blob by content hash."""
+        pass
+    
+    @abstractmethod
+    async def create_blob(self, blob: ChunkBlob) -> ChunkBlob:
+        """
+        Create a shared chunk blob, returning the existing row if the hash is taken.
+        Implementations should make this atomic (e.g. INSERT ... ON CONFLICT DO NOTHING).
+        """
+        pass
 
 
 class UnitOfWork(Protocol):
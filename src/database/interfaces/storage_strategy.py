@@ -15,7 +15,7 @@ Storage strategy interfaces for flexible storage backends.
 Implements the Strategy pattern for different storage approaches.
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
 
 from ..models import Memory, MemoryChunk
@@ -59,19 +59,32 @@ class CompressionStrategy(ABC):
     """
     
     @abstractmethod
-    def compress(self, content: str) -> tuple[str, bool]:
-        """Compress content. Returns (compressed_content, was_compressed)."""
+    def compress(self, content: str) -> tuple[str, bool, str]:
+        """
+        Compress content. Returns (compressed_content, was_compressed, algorithm),
+        where algorithm names the codec actually used ("none" when uncompressed).
+        """
         pass
     
     @abstractmethod
-    def decompress(self, compressed_content: str) -> str:
-        """Decompress content."""
+    def decompress(self, compressed_content: str, algorithm: Optional[str] = None) -> str:
+        """Decompress content. `algorithm` is the stored compression type, if known."""
         pass
     
     @abstractmethod
     def get_compression_ratio(self, original: str, compressed: str) -> float:
         """Calculate compression ratio."""
         pass
+    
+    def compress_chunks(self, content: str, chunk_size: int) -> Iterator[Tuple[str, str, bool, str]]:
+        """
+        Compress content slice by slice, each slice independently decompressible.
+        Yields (chunk, compressed_chunk, was_compressed, algorithm). Strategies may
+        override this to share compressor state across slices.
+        """
+        for i in range(0, len(content), chunk_size):
+            chunk = content[i:i + chunk_size]
+            yield (chunk, *self.compress(chunk))
 
 
 class ChunkedStorageStrategy(StorageStrategy):
@@ -0,0 +1,144 @@
+"""
+MCP Multi-Context Memory System
+Copyright (c) 2024 VoiceLessQ
+https://github.com/VoiceLessQ/multi-context-memory
+
+This file is part of the MCP Multi-Context Memory System.
+Licensed under the MIT License. See LICENSE file in the project root.
+
+Project Fingerprint: 7a8f9b3c-mcpmem-voicelessq-2024
+Original Author: VoiceLessQ
+"""
+
+"""
+Migration script for content-addressed chunk storage.
+
+Creates the chunk_blobs table and brings memory_chunks up to date: adds the
+blob_hash, original_size and compressed_size columns and makes chunk_data
+nullable. SQLite cannot change a column's nullability in place, so
+memory_chunks is rebuilt and its rows copied across; sizes are backfilled
+from the chunk metadata written by older versions.
+"""
+import logging
+import os
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+CREATE_CHUNK_BLOBS = """
+CREATE TABLE IF NOT EXISTS chunk_blobs (
+    hash VARCHAR(64) NOT NULL PRIMARY KEY,
+    data TEXT NOT NULL,
+    compression_type VARCHAR(20),
+    original_size INTEGER,
+    compressed_size INTEGER,
+    created_at DATETIME
+)
+"""
+
+CREATE_MEMORY_CHUNKS = """
+CREATE TABLE memory_chunks_new (
+    id INTEGER NOT NULL PRIMARY KEY,
+    memory_id INTEGER NOT NULL REFERENCES memories (id),
+    chunk_index INTEGER NOT NULL,
+    chunk_data TEXT,
+    blob_hash VARCHAR(64) REFERENCES chunk_blobs (hash),
+    original_size INTEGER,
+    compressed_size INTEGER,
+    chunk_metadata JSON,
+    compression_type VARCHAR(20),
+    created_at DATETIME,
+    updated_at DATETIME,
+    is_active BOOLEAN
+)
+"""
+
+COPY_MEMORY_CHUNKS = """
+INSERT INTO memory_chunks_new (
+    id, memory_id, chunk_index, chunk_data, blob_hash, original_size, compressed_size,
+    chunk_metadata, compression_type, created_at, updated_at, is_active
+)
+SELECT
+    id, memory_id, chunk_index, chunk_data, NULL,
+    COALESCE(json_extract(chunk_metadata, '$.original_size'), LENGTH(CAST(chunk_data AS BLOB)), 0),
+    COALESCE(json_extract(chunk_metadata, '$.compressed_size'), LENGTH(CAST(chunk_data AS BLOB)), 0),
+    chunk_metadata, compression_type, created_at, updated_at, is_active
+FROM memory_chunks
+"""
+
+CREATE_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_memory_chunks_id ON memory_chunks (id)",
+    "CREATE INDEX IF NOT EXISTS ix_memory_chunks_memory_id ON memory_chunks (memory_id)",
+    "CREATE INDEX IF NOT EXISTS ix_memory_chunks_blob_hash ON memory_chunks (blob_hash)",
+)
+
+
+def _needs_rebuild(cursor: sqlite3.Cursor) -> bool:
+    """Check whether memory_chunks predates blob storage."""
+    cursor.execute("PRAGMA table_info(memory_chunks)")
+    columns = {column[1]: column for column in cursor.fetchall()}
+    if not columns:
+        return False
+
+    # column[3] is the NOT NULL flag
+    return "blob_hash" not in columns or bool(columns["chunk_data"][3])
+
+
+def run_migration(db_path: str = "data/sqlite/memory.db"):
+    """
+    Run the migration to add content-addressed chunk blobs.
+    Safe to run more than once; a database already migrated is left unchanged.
+
+    Args:
+        db_path: Path to the SQLite database file
+    """
+    if db_path.startswith("sqlite:///"):
+        db_path = db_path[len("sqlite:///"):]
+    db_path = os.path.abspath(db_path)
+    logger.info(f"Using database path: {db_path}")
+
+    conn = None
+    try:
+        # Manage the transaction explicitly so the DDL is atomic with the copy
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+
+        cursor.execute(CREATE_CHUNK_BLOBS)
+        logger.info("Ensured chunk_blobs table exists")
+
+        if _needs_rebuild(cursor):
+            cursor.execute("DROP TABLE IF EXISTS memory_chunks_new")
+            cursor.execute(CREATE_MEMORY_CHUNKS)
+            cursor.execute(COPY_MEMORY_CHUNKS)
+            copied = cursor.rowcount
+            cursor.execute("DROP TABLE memory_chunks")
+            cursor.execute("ALTER TABLE memory_chunks_new RENAME TO memory_chunks")
+            for statement in CREATE_INDEXES:
+                cursor.execute(statement)
+            logger.info(f"Rebuilt memory_chunks with blob columns ({copied} rows copied)")
+        else:
+            logger.info("memory_chunks already supports chunk blobs")
+
+        # Commit changes
+        conn.commit()
+        logger.info("Migration completed successfully")
+
+    except Exception as e:
+        logger.error(f"Error running migration: {e}")
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    # Set up logging
+    logging.basicConfig(level=logging.INFO)
+
+    # Get the database path from environment or use default
+    db_path = os.getenv("DATABASE_URL", "data/sqlite/memories.db")
+
+    # Run the migration
+    run_migration(db_path)
@@ -0,0 +1,79 @@
+"""
+MCP Multi-Context Memory System
+Copyright (c) 2024 VoiceLessQ
+https://github.com/VoiceLessQ/multi-context-memory
+
+This file is part of the MCP Multi-Context Memory System.
+Licensed under the MIT License. See LICENSE file in the project root.
+
+Project Fingerprint: 7a8f9b3c-mcpmem-voicelessq-2024
+Original Author: VoiceLessQ
+"""
+
+"""
+Migration script to add the inline_content column to the memories table.
+"""
+import logging
+import os
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+def run_migration(db_path: str = "data/sqlite/memory.db"):
+    """
+    Run the migration to add the inline_content column.
+    Safe to run more than once; an existing column is left unchanged.
+    
+    Args:
+        db_path: Path to the SQLite database file
+    """
+    if db_path.startswith("sqlite:///"):
+        db_path = db_path[len("sqlite:///"):]
+    db_path = os.path.abspath(db_path)
+    logger.info(f"Using database path: {db_path}")
+    
+    conn = None
+    try:
+        # Connect to the database
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        
+        # Check if table exists
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='memories'")
+        if not cursor.fetchone():
+            logger.info("memories table does not exist; nothing to migrate")
+            return
+        
+        # Check if column already exists
+        cursor.execute("PRAGMA table_info(memories)")
+        columns = [column[1] for column in cursor.fetchall()]
+        
+        if "inline_content" not in columns:
+            # Add inline_content column
+            cursor.execute("ALTER TABLE memories ADD COLUMN inline_content TEXT")
+            logger.info("Added inline_content column to memories table")
+        else:
+            logger.info("inline_content column already exists")
+        
+        # Commit changes
+        conn.commit()
+        logger.info("Migration completed successfully")
+        
+    except Exception as e:
+        logger.error(f"Error running migration: {e}")
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    # Set up logging
+    logging.basicConfig(level=logging.INFO)
+    
+    # Get the database path from environment or use default
+    db_path = os.getenv("DATABASE_URL", "data/sqlite/memories.db")
+    
+    # Run the migration
+    run_migration(db_path)
@@ -77,6 +77,7 @@ class Memory(Base):
     embedding_vector = Column(LargeBinary, nullable=True)  # For storing numpy arrays
     content_compressed = Column(Boolean, default=False)  # Whether content is compressed
     content_size = Column(Integer, default=0)  # Size of original content in bytes
+    inline_content = Column(Text, nullable=True)  # Small content stored without chunking
     access_count = Column(Integer, default=0)  # Number of times memory has been accessed
     last_accessed = Column(DateTime, nullable=True)  # Last time memory was accessed
     
@@ -173,14 +174,28 @@ class SystemConfig(Base):
     # Relationships
     updater = relationship("User")
 
+class ChunkBlob(Base):
+    """ChunkBlob model for content-addressed chunk payloads shared across memories."""
+    __tablename__ = "chunk_blobs"
+    
+    hash = Column(String(64), primary_key=True)  # Hash of the uncompressed chunk content
+    data = Column(Text, nullable=False)  # The (possibly compressed) chunk content
+    compression_type = Column(String(20), nullable=True)  # e.g., "zstd", "gzip", "none"
+    original_size = Column(Integer, default=0)
+    compressed_size = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 class MemoryChunk(Base):
     """MemoryChunk model for storing chunks of large memories."""
     __tablename__ = "memory_chunks"
     
     id = Column(Integer, primary_key=True, index=True)
-    memory_id = Column(Integer, ForeignKey("memories.id"), nullable=False)
+    memory_id = Column(Integer, ForeignKey("memories.id"), nullable=False, index=True)
     chunk_index = Column(Integer, nullable=False)  # Index of the chunk within the memory
-    chunk_data = Column(Text, nullable=False)  # The actual chunk content
+    chunk_data = Column(Text, nullable=True)  # Inline chunk content, unset when stored as a blob
+    blob_hash = Column(String(64), ForeignKey("chunk_blobs.hash"), nullable=True, index=True)
+    original_size = Column(Integer, default=0)  # Uncompressed size in bytes
+    compressed_size = Column(Integer, default=0)  # Stored size in bytes
     chunk_metadata = Column(JSONColumn, nullable=True)  # Additional chunk metadata
     compression_type = Column(String(20), nullable=True)  # e.g., "zstd", "gzip", "none"
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -189,6 +204,14 @@ class MemoryChunk(Base):
     
     # Relationships
     memory = relationship("Memory")
+    blob = relationship("ChunkBlob")
+    
+    @property
+    def content(self) -> Optional[str]:
+        """Get the stored chunk content, resolving shared blobs."""
+        if self.blob_hash is not None and self.blob is not None:
+            return self.blob.data
+        return self.chunk_data
 
 class AuditLog(Base):
     """AuditLog model for tracking system changes."""
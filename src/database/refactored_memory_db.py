@@ -21,14 +21,16 @@ Key improvements:
 - SOLID principles compliance
 - Reduced from 1,737 lines to manageable, focused components
 """
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional, Tuple, Union
 from sqlalchemy.orm import Session
 from datetime import datetime
 
 from .repositories.context_repository import ContextRepository
 from .repositories.relation_repository import RelationRepository
 from .repositories.memory_repository import SQLAlchemyMemoryRepository
+from .repositories.chunk_repository import SQLAlchemyChunkRepository
 from .interfaces.storage_strategy import (
     StorageStrategy, CompressionStrategy, ChunkedStorageStrategy,
     HybridStorageStrategy, DistributedStorageStrategy, CachingStrategy,
@@ -45,6 +47,9 @@ from .models import Memory, Context, Relation, MemoryChunk
 
 logger = logging.getLogger(__name__)
 
+# Contents at least this long are (de)compressed off the event loop thread
+OFFLOAD_COMPRESSION_CHARS = 64 * 1024
+
 
 class RefactoredMemoryDB:
     """
@@ -119,8 +124,11 @@ class RefactoredMemoryDB:
             RelationRepository(self.session) if self.session else None
         )
         
-        # Initialize chunk repository (placeholder)
-        self.chunk_repository = injected_repos.get('chunk', None)
+        # Initialize chunk repository
+        self.chunk_repository = injected_repos.get(
+            'chunk',
+            SQLAlchemyChunkRepository(self.session) if self.session else None
+        )
     
     def _init_strategies(self, injected_strategies: Dict[str, Any]):
         """Initialize storage strategies with optional dependency injection."""
@@ -198,15 +206,27 @@ class RefactoredMemoryDB:
             should_compress = compress_content if compress_content is not None else self.compression_enabled
             use_chunks = use_chunked_storage if use_chunked_storage is not None else self.chunked_storage_enabled
             
+            use_chunk_strategy = use_chunks and self.chunked_storage_strategy
+            
+            # Compress before touching the session, so no pending changes are
+            # held open while compression runs off the event loop
+            stored_content = ""  # Chunked storage sets the content itself
+            was_compressed = False
+            if not use_chunk_strategy:
+                if should_compress and self.compression_strategy:
+                    stored_content, was_compressed, _ = await self._compress(content)
+                else:
+                    stored_content = content
+            
             # Create memory entity
             memory = Memory(
                 title=title,
-                content="",  # Will be set by storage strategy
+                content=stored_content,
                 owner_id=owner_id,
                 context_id=context_id,
                 access_level=access_level,
                 memory_metadata=memory_metadata or {},
-                content_compressed=False,
+                content_compressed=was_compressed,
                 content_size=len(content)
             )
             
@@ -214,20 +234,12 @@ class RefactoredMemoryDB:
             created_memory = await self.memory_repository.create(memory)
             
             # Apply storage strategy
-            if use_chunks and self.chunked_storage_strategy:
+            if use_chunk_strategy:
                 success = await self.chunked_storage_strategy.store(created_memory, content, compress=should_compress)
                 if success:
                     created_memory.content_compressed = True
                 else:
                     raise Exception("Failed to store memory using chunked storage")
-            else:
-                # Store with compression if enabled
-                if should_compress and self.compression_strategy:
-                    compressed_content, was_compressed = self.compression_strategy.compress(content)
-                    created_memory.content = compressed_content
-                    created_memory.content_compressed = was_compressed
-                else:
-                    created_memory.content = content
             
             # Commit changes
             self.session.commit()
@@ -348,7 +360,7 @@ class RefactoredMemoryDB:
         try:
             if memory.content_compressed and decompress and self.compression_strategy:
                 # Decompress content
-                decompressed_content = self.compression_strategy.decompress(memory.content)
+                decompressed_content = await self._decompress(memory.content)
                 memory.content = decompressed_content
             elif memory.content_compressed and not decompress:
                 # Keep compressed content but mark as not loaded
@@ -373,11 +385,13 @@ class RefactoredMemoryDB:
         context_id: Optional[int] = None,
         access_level: Optional[str] = None,
         limit: int = 100,
+        include_content: bool = True,
         **kwargs
     ) -> List[Memory]:
         """
         Search memories using Repository pattern.
         Replaces the original complex search method with clean delegation.
+        With include_content=False the content column is not loaded.
         """
         try:
             if not self.memory_repository:
@@ -394,7 +408,9 @@ class RefactoredMemoryDB:
                 filters["access_level"] = access_level
             
             # Delegate to repository
-            memories = await self.memory_repository.search(query, filters, limit)
+            memories = await self.memory_repository.search(
+                query, filters, limit, include_content=include_content
+            )
             
             # Record performance metrics
             if self.performance_monitor:
@@ -452,7 +468,7 @@ class RefactoredMemoryDB:
                 else:
                     # Direct content update with compression
                     if self.compression_enabled and self.compression_strategy:
-                        compressed_content, was_compressed = self.compression_strategy.compress(content)
+                        compressed_content, was_compressed, _ = await self._compress(content)
                         updates["content"] = compressed_content
                         updates["content_compressed"] = was_compressed
                     else:
@@ -512,12 +528,23 @@ class RefactoredMemoryDB:
             logger.error(f"Error deleting memory {memory_id}: {e}")
             return False
     
-    async def bulk_create_memories(self, memories_data: List[Dict[str, Any]], **kwargs) -> List[Memory]:
+    async def bulk_create_memories(
+        self,
+        memories_data: List[Dict[str, Any]],
+        atomic: bool = False,
+        **kwargs
+    ) -> List[Memory]:
         """
         Create multiple memories at once.
         
+        Memories that do not use chunked storage are compressed up front and
+        inserted in a single transaction. If that transaction fails they are
+        retried one by one, unless atomic is set, in which case the error is
+        raised and none of them are kept.
+        
         Args:
             memories_data: List of memory data dictionaries
+            atomic: Raise instead of falling back to per-memory creates
             
         Returns:
             List of created Memory objects
@@ -526,39 +553,54 @@ class RefactoredMemoryDB:
             if not self.memory_repository:
                 logger.error("Memory repository not initialized")
                 return []
+            
+            batch_rows = []
+            chunked_rows = []
+            
+            for memory_data in memories_data:
+                title = memory_data.get("title")
+                content = memory_data.get("content")
                 
+                if not title or not content:
+                    if atomic:
+                        raise ValueError("Memory is missing title or content")
+                    logger.warning(f"Skipping memory with missing title or content: {memory_data}")
+                    continue
+                
+                use_chunks = memory_data.get("use_chunked_storage")
+                if use_chunks is None:
+                    use_chunks = self.chunked_storage_enabled
+                if use_chunks and self.chunked_storage_strategy:
+                    chunked_rows.append(memory_data)
+                    continue
+                
+                batch_rows.append(memory_data)
+            
+            # Large contents are compressed in worker threads, all at once
+            entities = await asyncio.gather(*(
+                self._build_memory_entity(memory_data) for memory_data in batch_rows
+            ))
+            
             created_memories = []
+            fallback_rows = chunked_rows
             
-            for memory_data in memories_data:
+            if entities:
                 try:
-                    # Extract required fields
-                    title = memory_data.get("title")
-                    content = memory_data.get("content")
-                    owner_id = memory_data.get("owner_id", "1")
-                    
-                    if not title or not content:
-                        logger.warning(f"Skipping memory with missing title or content: {memory_data}")
-                        continue
-                    
-                    # Create memory
-                    memory = await self.create_memory(
-                        title=title,
-                        content=content,
-                        owner_id=owner_id,
-                        context_id=memory_data.get("context_id"),
-                        access_level=memory_data.get("access_level", "private"),
-                        memory_metadata=memory_data.get("memory_metadata"),
-                        compress_content=memory_data.get("compress_content"),
-                        use_chunked_storage=memory_data.get("use_chunked_storage"),
-                        use_hybrid_storage=memory_data.get("use_hybrid_storage"),
-                        use_distributed_storage=memory_data.get("use_distributed_storage"),
-                        use_deduplication=memory_data.get("use_deduplication"),
-                        use_archival=memory_data.get("use_archival")
-                    )
-                    
+                    created_memories = await self.memory_repository.create_many(entities)
+                    if self.performance_monitor:
+                        for _ in created_memories:
+                            self.performance_monitor.record_memory_operation("create")
+                except Exception as e:
+                    if atomic:
+                        raise
+                    logger.error(f"Bulk insert failed, creating memories one by one: {e}")
+                    fallback_rows = batch_rows + chunked_rows
+            
+            for memory_data in fallback_rows:
+                try:
+                    memory = await self._create_memory_from_data(memory_data)
                     if memory:
                         created_memories.append(memory)
-                        
                 except Exception as e:
                     logger.error(f"Error creating memory in bulk operation: {e}")
                     continue
@@ -566,9 +608,69 @@ class RefactoredMemoryDB:
             return created_memories
             
         except Exception as e:
+            if atomic:
+                raise
             logger.error(f"Error in bulk create memories: {e}")
             return []
     
+    async def _build_memory_entity(self, memory_data: Dict[str, Any]) -> Memory:
+        """Build a ready-to-insert Memory, compressing its content like create_memory does."""
+        title = memory_data["title"]
+        content = memory_data["content"]
+        compress_content = memory_data.get("compress_content")
+        should_compress = compress_content if compress_content is not None else self.compression_enabled
+        
+        memory = Memory(
+            title=title,
+            content=content,
+            owner_id=memory_data.get("owner_id", "1"),
+            context_id=memory_data.get("context_id"),
+            access_level=memory_data.get("access_level", "private"),
+            memory_metadata=memory_data.get("memory_metadata") or {},
+            content_compressed=False,
+            content_size=len(content)
+        )
+        
+        if should_compress and self.compression_strategy:
+            compressed_content, was_compressed, _ = await self._compress(content)
+            memory.content = compressed_content
+            memory.content_compressed = was_compressed
+        
+        return memory
+    
+    async def _compress(self, content: str) -> Tuple[str, bool, str]:
+        """
+        Compress content with the configured strategy.
+        Large contents are compressed in a worker thread so the event loop keeps
+        serving other requests; zstd and zlib release the GIL while they run.
+        """
+        if len(content) >= OFFLOAD_COMPRESSION_CHARS:
+            return await asyncio.to_thread(self.compression_strategy.compress, content)
+        return self.compression_strategy.compress(content)
+    
+    async def _decompress(self, compressed_content: str) -> str:
+        """Decompress content, in a worker thread when the stored payload is large."""
+        if len(compressed_content) >= OFFLOAD_COMPRESSION_CHARS:
+            return await asyncio.to_thread(self.compression_strategy.decompress, compressed_content)
+        return self.compression_strategy.decompress(compressed_content)
+    
+    async def _create_memory_from_data(self, memory_data: Dict[str, Any]) -> Memory:
+        """Create a single memory from a bulk-create data dictionary."""
+        return await self.create_memory(
+            title=memory_data.get("title"),
+            content=memory_data.get("content"),
+            owner_id=memory_data.get("owner_id", "1"),
+            context_id=memory_data.get("context_id"),
+            access_level=memory_data.get("access_level", "private"),
+            memory_metadata=memory_data.get("memory_metadata"),
+            compress_content=memory_data.get("compress_content"),
+            use_chunked_storage=memory_data.get("use_chunked_storage"),
+            use_hybrid_storage=memory_data.get("use_hybrid_storage"),
+            use_distributed_storage=memory_data.get("use_distributed_storage"),
+            use_deduplication=memory_data.get("use_deduplication"),
+            use_archival=memory_data.get("use_archival")
+        )
+    
     async def create_large_memory(
         self,
         title: str,
@@ -597,30 +699,27 @@ class RefactoredMemoryDB:
             # For large memories, always use compression
             should_compress = compress_content
             
+            # Apply compression if enabled, before the record is added to the session
+            if should_compress and self.compression_strategy:
+                stored_content, was_compressed, _ = await self._compress(content)
+            else:
+                stored_content, was_compressed = content, False
+            
             # Create memory entity
             memory = Memory(
                 title=title,
-                content="",  # Will be set by storage strategy
+                content=stored_content,
                 owner_id=owner_id,
                 context_id=context_id,
                 access_level=access_level,
                 memory_metadata={"is_large": True},
-                content_compressed=False,
+                content_compressed=was_compressed,
                 content_size=len(content)
             )
             
-            # Create memory record first
+            # Create memory record
             created_memory = await self.memory_repository.create(memory)
             
-            # Apply compression if enabled
-            if should_compress and self.compression_strategy:
-                compressed_content, was_compressed = self.compression_strategy.compress(content)
-                created_memory.content = compressed_content
-                created_memory.content_compressed = was_compressed
-            else:
-                created_memory.content = content
-                created_memory.content_compressed = False
-            
             # Commit changes
             self.session.commit()
             
@@ -965,7 +1064,7 @@ class RefactoredMemoryDB:
             similarity_threshold: Minimum similarity score (0-1)
             
         Returns:
-            List of Memory objects
+            List of Memory objects, each with its ``score`` attribute set
         """
         try:
             if not self.memory_repository:
@@ -1010,7 +1109,11 @@ class RefactoredMemoryDB:
             
             # Sort by score (descending) and limit results
             scored_memories.sort(key=lambda x: x[1], reverse=True)
-            results = [memory for memory, score in scored_memories[:limit]]
+            results = []
+            for memory, score in scored_memories[:limit]:
+                # Carry the score on the row so callers can report it
+                memory.score = score
+                results.append(memory)
             
             # Record performance metrics
             if self.performance_monitor:
@@ -1225,22 +1328,11 @@ class RefactoredMemoryDB:
                     logger.error(error_msg)
                     return {"error": error_msg}
 
-                # Try reading with utf-8, fall back to other encodings if needed
-                encodings = ['utf-8', 'latin-1', 'cp1252']
-                book_content = None
-                last_error = None
-
-                for encoding in encodings:
-                    try:
-                        with open(book_path, 'r', encoding=encoding) as file:
-                            book_content = file.read()
-                        break
-                    except UnicodeDecodeError as e:
-                        last_error = e
-                        continue
-
-                if book_content is None:
-                    error_msg = f"Could not decode file with any supported encoding: {last_error}"
+                # Read and decode in a worker thread so large books do not block the event loop
+                try:
+                    book_content = await asyncio.to_thread(self._read_book_file, book_path)
+                except UnicodeDecodeError as e:
+                    error_msg = f"Could not decode file with any supported encoding: {e}"
                     logger.error(error_msg)
                     return {"error": error_msg}
 
@@ -1256,60 +1348,51 @@ class RefactoredMemoryDB:
                 # If no clear chapter markers, split by paragraphs
                 chapters = [p.strip() for p in book_content.split('\n\n') if p.strip()]
             
-            # Create memories for each chapter
+            # Plan one memory per chapter, or per part of a long chapter
+            planned = []
+            
+            for i, chapter_content in enumerate(chapters, 1):
+                if not chapter_content.strip():
+                    continue
+                
+                # Truncate very long chapters if chunking is enabled
+                content = chapter_content.strip()
+                if enable_chunking and len(content) > chunk_size:
+                    # Split into chunks
+                    chunks = [content[j:j+chunk_size] for j in range(0, len(content), chunk_size)]
+                    
+                    for chunk_idx, chunk in enumerate(chunks, 1):
+                        planned.append((i, f"Chapter {i}, Part {chunk_idx}", chunk, {
+                            "book_path": book_path,
+                            "chapter": i,
+                            "chunk": chunk_idx,
+                            "total_chunks": len(chunks),
+                            "is_book_chunk": True
+                        }))
+                else:
+                    planned.append((i, f"Chapter {i}", content, {
+                        "book_path": book_path,
+                        "chapter": i,
+                        "is_book_chunk": False
+                    }))
+            
+            # Create the chapter memories in order; they all share self.session
             created_memories = []
             errors = []
             
-            for i, chapter_content in enumerate(chapters, 1):
+            for i, title, content, memory_metadata in planned:
                 try:
-                    if not chapter_content.strip():
-                        continue
+                    memory = await self.create_memory(
+                        title=title,
+                        content=content,
+                        owner_id=owner_id,
+                        context_id=context_id,
+                        memory_metadata=memory_metadata
+                    )
                     
-                    # Truncate very long chapters if chunking is enabled
-                    content = chapter_content.strip()
-                    if enable_chunking and len(content) > chunk_size:
-                        # Split into chunks
-                        chunks = [content[j:j+chunk_size] for j in range(0, len(content), chunk_size)]
-                        
-                        for chunk_idx, chunk in enumerate(chunks, 1):
-                            title = f"Chapter {i}, Part {chunk_idx}"
-                            
-                            # Create memory for chunk
-                            memory = await self.create_memory(
-                                title=title,
-                                content=chunk,
-                                owner_id=owner_id,
-                                context_id=context_id,
-                                memory_metadata={
-                                    "book_path": book_path,
-                                    "chapter": i,
-                                    "chunk": chunk_idx,
-                                    "total_chunks": len(chunks),
-                                    "is_book_chunk": True
-                                }
-                            )
-                            
-                            if memory:
-                                created_memories.append(memory)
-                    else:
-                        # Create single memory for chapter
-                        title = f"Chapter {i}"
-                        
-                        memory = await self.create_memory(
-                            title=title,
-                            content=content,
-                            owner_id=owner_id,
-                            context_id=context_id,
-                            memory_metadata={
-                                "book_path": book_path,
-                                "chapter": i,
-                                "is_book_chunk": False
-                            }
-                        )
+                    if memory:
+                        created_memories.append(memory)
                         
-                        if memory:
-                            created_memories.append(memory)
-                            
                 except Exception as e:
                     logger.error(f"Error processing chapter {i}: {e}")
                     errors.append(f"Chapter {i}: {str(e)}")
@@ -1362,6 +1445,29 @@ class RefactoredMemoryDB:
     
     # ========== HELPER METHODS ==========
     
+    @staticmethod
+    def _read_book_file(book_path: str, encodings=('utf-8', 'latin-1', 'cp1252')) -> str:
+        """
+        Read a book file once and decode it, trying each encoding in turn.
+        Line endings are normalized the way text-mode reads do.
+        """
+        with open(book_path, 'rb') as file:
+            raw_content = file.read()
+        
+        last_error = None
+        for encoding in encodings:
+            try:
+                book_content = raw_content.decode(encoding)
+                break
+            except UnicodeDecodeError as e:
+                last_error = e
+        else:
+            raise last_error
+        
+        if '\r' in book_content:
+            book_content = book_content.replace('\r\n', '\n').replace('\r', '\n')
+        return book_content
+    
     
     # ========== CONFIGURATION METHODS ==========
     # These replace the original configuration methods with cleaner implementations
@@ -16,7 +16,9 @@ Clean exports for all repository classes.
 """
 
 from .memory_repository import SQLAlchemyMemoryRepository
+from .chunk_repository import SQLAlchemyChunkRepository
 
 __all__ = [
-    'SQLAlchemyMemoryRepository'
+    'SQLAlchemyMemoryRepository',
+    'SQLAlchemyChunkRepository'
 ]
\ No newline at end of file
@@ -0,0 +1,244 @@
+"""
+MCP Multi-Context Memory System
+Copyright (c) 2024 VoiceLessQ
+https://github.com/VoiceLessQ/multi-context-memory
+
+This file is part of the MCP Multi-Context Memory System.
+Licensed under the MIT License. See LICENSE file in the project root.
+
+Project Fingerprint: 7a8f9b3c-mcpmem-voicelessq-2024
+Original Author: VoiceLessQ
+"""
+
+"""
+SQLAlchemy-based Chunk Repository implementation.
+Stores chunk mapping rows and the content-addressed blobs they point at.
+"""
+import logging
+from contextlib import contextmanager
+from typing import Dict, Any, Iterable, List, Optional
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import delete, exists, func, select
+
+from ..interfaces.repository import ChunkRepository
+from ..models import MemoryChunk, ChunkBlob
+
+logger = logging.getLogger(__name__)
+
+
+class SQLAlchemyChunkRepository(ChunkRepository):
+    """
+    SQLAlchemy implementation of ChunkRepository.
+    Blobs are shared between chunks with identical content and are removed
+    once the last chunk referencing them is deleted.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+        self._transaction_depth = 0
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group writes into one transaction: commit on exit, roll back if the block
+        raises. Blobs created inside a rolled back block are discarded with it.
+        Nested blocks join the outermost one.
+        """
+        self._transaction_depth += 1
+        try:
+            yield
+        except BaseException:
+            if self._transaction_depth == 1:
+                self.session.rollback()
+            raise
+        else:
+            if self._transaction_depth == 1:
+                self.session.commit()
+        finally:
+            self._transaction_depth -= 1
+
+    def _commit(self):
+        """Commit a write, or only flush it while a transaction() block is open."""
+        if self._transaction_depth:
+            self.session.flush()
+        else:
+            self.session.commit()
+
+    def _rollback(self):
+        """Roll back a failed write unless a transaction() block will do it."""
+        if not self._transaction_depth:
+            self.session.rollback()
+
+    async def create(self, chunk: MemoryChunk) -> MemoryChunk:
+        """Create a new chunk entity."""
+        try:
+            self.session.add(chunk)
+            self._commit()
+            self.session.refresh(chunk)
+            return chunk
+        except Exception as e:
+            logger.error(f"Error creating chunk {chunk.chunk_index} for memory {chunk.memory_id}: {e}")
+            self._rollback()
+            raise
+
+    async def find_by_memory(self, memory_id: int) -> List[MemoryChunk]:
+        """Find chunks for a memory, ordered by chunk index, with their blobs loaded."""
+        try:
+            return (
+                self.session.query(MemoryChunk)
+                .options(joinedload(MemoryChunk.blob))
+                .filter(MemoryChunk.memory_id == memory_id)
+                .order_by(MemoryChunk.chunk_index)
+                .all()
+            )
+        except Exception as e:
+            logger.error(f"Error finding chunks for memory {memory_id}: {e}")
+            return []
+
+    async def update(self, chunk_id: int, updates: Dict[str, Any]) -> Optional[MemoryChunk]:
+        """Update chunk entity."""
+        try:
+            chunk = self.session.get(MemoryChunk, chunk_id)
+            if not chunk:
+                logger.warning(f"Chunk not found for update: {chunk_id}")
+                return None
+
+            for field, value in updates.items():
+                if hasattr(chunk, field):
+                    setattr(chunk, field, value)
+                else:
+                    logger.warning(f"Field {field} not found in MemoryChunk model")
+
+            self._commit()
+            return chunk
+        except Exception as e:
+            logger.error(f"Error updating chunk {chunk_id}: {e}")
+            if self._transaction_depth:
+                raise
+            self.session.rollback()
+            return None
+
+    async def delete(self, chunk_id: int) -> bool:
+        """Delete chunk entity, releasing its blob if nothing else uses it."""
+        try:
+            chunk = self.session.get(MemoryChunk, chunk_id)
+            if not chunk:
+                logger.warning(f"Chunk not found for deletion: {chunk_id}")
+                return False
+
+            blob_hash = chunk.blob_hash
+            self.session.delete(chunk)
+            self.session.flush()
+            if blob_hash is not None:
+                self._release_blobs([blob_hash])
+            self._commit()
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting chunk {chunk_id}: {e}")
+            if self._transaction_depth:
+                raise
+            self.session.rollback()
+            return False
+
+    async def delete_by_memory(self, memory_id: int) -> bool:
+        """Delete all chunks for a memory, releasing blobs nothing else uses."""
+        try:
+            blob_hashes = self.session.execute(
+                select(MemoryChunk.blob_hash)
+                .where(MemoryChunk.memory_id == memory_id, MemoryChunk.blob_hash.is_not(None))
+                .distinct()
+            ).scalars().all()
+
+            self.session.execute(
+                delete(MemoryChunk)
+                .where(MemoryChunk.memory_id == memory_id)
+                .execution_options(synchronize_session="fetch")
+            )
+            self._release_blobs(blob_hashes)
+            self._commit()
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting chunks for memory {memory_id}: {e}")
+            if self._transaction_depth:
+                raise
+            self.session.rollback()
+            return False
+
+    async def aggregate_by_memory(self, memory_id: int) -> Dict[str, Any]:
+        """Aggregate chunk statistics for a memory with one GROUP BY query."""
+        rows = self.session.execute(
+            select(
+                MemoryChunk.compression_type,
+                func.count(MemoryChunk.id),
+                func.sum(MemoryChunk.original_size),
+                func.sum(MemoryChunk.compressed_size)
+            )
+            .where(MemoryChunk.memory_id == memory_id)
+            .group_by(MemoryChunk.compression_type)
+        ).all()
+
+        # One row per compression type, so this loop is over a handful of rows
+        return {
+            "chunk_count": sum(row[1] for row in rows),
+            "total_original_size": sum(row[2] or 0 for row in rows),
+            "total_compressed_size": sum(row[3] or 0 for row in rows),
+            "compression_types": [row[0] for row in rows]
+        }
+
+    async def find_blob_by_hash(self, chunk_hash: str) -> Optional[ChunkBlob]:
+        """Find a shared chunk blob by content hash."""
+        try:
+            return self.session.get(ChunkBlob, chunk_hash)
+        except Exception as e:
+            logger.error(f"Error finding chunk blob {chunk_hash}: {e}")
+            return None
+
+    async def create_blob(self, blob: ChunkBlob) -> ChunkBlob:
+        """
+        Create a shared chunk blob, returning the existing row if the hash is taken.
+        SQLite and PostgreSQL insert with ON CONFLICT DO NOTHING so concurrent
+        writers of the same content cannot collide.
+        """
+        try:
+            dialect = self.session.get_bind().dialect.name
+            if dialect in ("sqlite", "postgresql"):
+                if dialect == "sqlite":
+                    from sqlalchemy.dialects.sqlite import insert
+                else:
+                    from sqlalchemy.dialects.postgresql import insert
+
+                self.session.execute(
+                    insert(ChunkBlob)
+                    .values(
+                        hash=blob.hash,
+                        data=blob.data,
+                        compression_type=blob.compression_type,
+                        original_size=blob.original_size,
+                        compressed_size=blob.compressed_size
+                    )
+                    .on_conflict_do_nothing(index_elements=["hash"])
+                )
+            elif self.session.get(ChunkBlob, blob.hash) is None:
+                self.session.add(blob)
+
+            self._commit()
+            return self.session.get(ChunkBlob, blob.hash)
+        except Exception as e:
+            logger.error(f"Error creating chunk blob {blob.hash}: {e}")
+            self._rollback()
+            raise
+
+    def _release_blobs(self, blob_hashes: Iterable[str]):
+        """Delete the given blobs that no remaining chunk references."""
+        blob_hashes = list(blob_hashes)
+        if not blob_hashes:
+            return
+
+        self.session.execute(
+            delete(ChunkBlob)
+            .where(
+                ChunkBlob.hash.in_(blob_hashes),
+                ~exists().where(MemoryChunk.blob_hash == ChunkBlob.hash)
+            )
+            .execution_options(synchronize_session="fetch")
+        )
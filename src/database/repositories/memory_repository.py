@@ -16,7 +16,7 @@ Extracts data access logic from the monolithic enhanced_memory_db.py.
 """
 import logging
 from typing import Dict, Any, List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, defer
 from sqlalchemy import and_, or_
 from datetime import datetime
 
@@ -48,6 +48,18 @@ class SQLAlchemyMemoryRepository(MemoryRepository):
             self.session.rollback()
             raise
     
+    async def create_many(self, memories: List[Memory]) -> List[Memory]:
+        """Create several memory entities in a single transaction."""
+        try:
+            self.session.add_all(memories)
+            self.session.commit()
+            logger.info(f"Created {len(memories)} memories in one transaction")
+            return memories
+        except Exception as e:
+            logger.error(f"Error creating memories: {e}")
+            self.session.rollback()
+            raise
+    
     async def find_by_id(self, memory_id: int) -> Optional[Memory]:
         """Find memory by ID."""
         try:
@@ -87,11 +99,19 @@ class SQLAlchemyMemoryRepository(MemoryRepository):
             logger.error(f"Error finding memories by context {context_id}: {e}")
             return []
     
-    async def search(self, query: str, filters: Dict[str, Any], limit: int = 100) -> List[Memory]:
+    async def search(
+        self,
+        query: str,
+        filters: Dict[str, Any],
+        limit: int = 100,
+        include_content: bool = True
+    ) -> List[Memory]:
         """Search memories with filters."""
         try:
-            # Build base query
+            # Build base query; without content the (largest) column is not selected
             db_query = self.session.query(Memory)
+            if not include_content:
+                db_query = db_query.options(defer(Memory.content))
             
             # Apply search query
             if query:
@@ -14,19 +14,40 @@ Original Author: VoiceLessQ
 Chunked storage strategy implementation.
 Extracts chunked storage logic from enhanced_memory_db.py.
 """
+import asyncio
 import logging
 import hashlib
-from typing import List, Optional, Dict, Any
+import sys
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 from sqlalchemy.orm import Session
 from datetime import datetime
 
 from ..interfaces.storage_strategy import ChunkedStorageStrategy, CompressionStrategy
 from ..interfaces.repository import ChunkRepository
-from ..models import Memory, MemoryChunk
+from ..models import Memory, MemoryChunk, ChunkBlob
 from .compression_strategy import ZstdCompressionStrategy
 
+# Optional BLAKE3 for fast, non-cryptographic chunk identity; falls back to SHA-256
+try:
+    from blake3 import blake3
+except ImportError:
+    blake3 = None
+
 logger = logging.getLogger(__name__)
 
+# Inputs above this size are hashed with BLAKE3's multithreaded mode
+PARALLEL_HASH_THRESHOLD = 128 * 1024
+
+
+def content_digest(data: bytes) -> str:
+    """Hex digest identifying chunk content (BLAKE3 when installed, else SHA-256)."""
+    if blake3 is None:
+        return hashlib.sha256(data).hexdigest()
+    if len(data) > PARALLEL_HASH_THRESHOLD:
+        return blake3(data, max_threads=blake3.AUTO).hexdigest()
+    return blake3(data).hexdigest()
+
 
 class SQLAlchemyChunkedStorageStrategy(ChunkedStorageStrategy):
     """
@@ -40,17 +61,48 @@ class SQLAlchemyChunkedStorageStrategy(ChunkedStorageStrategy):
         session: Session,
         chunk_size: int = 10000,
         max_chunks: int = 100,
-        compression_strategy: Optional[CompressionStrategy] = None
+        compression_strategy: Optional[CompressionStrategy] = None,
+        cache_max_entries: int = 128,
+        cache_max_bytes: int = 256 * 1024 * 1024,
+        small_threshold: int = 256
     ):
         self.chunk_repository = chunk_repository
         self.session = session
         self.chunk_size = chunk_size
         self.max_chunks = max_chunks
         self.compression_strategy = compression_strategy or ZstdCompressionStrategy()
+        
+        # Content below this many bytes is stored inline on the memory row
+        self.small_threshold = small_threshold
+        
+        # LRU cache of reassembled content keyed by memory_id
+        self.cache_max_entries = cache_max_entries
+        self.cache_max_bytes = cache_max_bytes
+        self._content_cache: "OrderedDict[int, str]" = OrderedDict()
+        self._cache_bytes = 0
+        # Bumped by invalidate(); loads that started before a bump must not cache
+        self._cache_generations: Dict[int, int] = {}
+    
+    def _is_small(self, content: str) -> bool:
+        """Check whether content fits the inline fast path."""
+        # Character count is a lower bound on UTF-8 size, so long strings skip encoding
+        return (len(content) < self.small_threshold
+                and len(content.encode('utf-8')) < self.small_threshold)
+    
+    def _get_memory(self, memory_id: int) -> Optional[Memory]:
+        """Get the memory row, served from the session identity map when loaded."""
+        return self.session.get(Memory, memory_id) if self.session else None
     
     async def store(self, memory: Memory, content: str, **kwargs) -> bool:
         """Store memory content using chunked storage."""
         try:
+            # Tiny content skips chunk rows, hashing and compression entirely
+            if self._is_small(content):
+                memory.inline_content = content
+                self.invalidate(memory.id)
+                return True
+            
+            memory.inline_content = None
             compress = kwargs.get('compress', True)
             return await self.store_in_chunks(memory.id, content, self.chunk_size, compress)
         except Exception as e:
@@ -67,6 +119,14 @@ class SQLAlchemyChunkedStorageStrategy(ChunkedStorageStrategy):
             compress = kwargs.get('compress', True)
             # Delete existing chunks first
             await self.delete_chunks(memory_id)
+            
+            memory = self._get_memory(memory_id)
+            if memory is not None:
+                if self._is_small(content):
+                    memory.inline_content = content
+                    return True
+                memory.inline_content = None
+            
             # Store new chunks
             chunks = await self.store_in_chunks(memory_id, content, self.chunk_size, compress)
             return len(chunks) > 0
@@ -76,6 +136,9 @@ class SQLAlchemyChunkedStorageStrategy(ChunkedStorageStrategy):
     
     async def delete(self, memory_id: int, **kwargs) -> bool:
         """Delete memory chunks."""
+        memory = self._get_memory(memory_id)
+        if memory is not None:
+            memory.inline_content = None
         return await self.delete_chunks(memory_id)
     
     async def get_stats(self) -> Dict[str, Any]:
@@ -111,31 +174,42 @@ class SQLAlchemyChunkedStorageStrategy(ChunkedStorageStrategy):
         compress: bool = True
     ) -> List[MemoryChunk]:
         """Store content in chunks with optional compression."""
+        self.invalidate(memory_id)
         try:
+            # Decide once whether to compress rather than per chunk
+            compress_fn = self.compression_strategy.compress if (compress and self.compression_strategy) else None
+            
             if len(content) <= chunk_size:
                 # Content is small enough for a single chunk
-                chunk = await self._create_single_chunk(memory_id, content, 0, compress)
+                chunk = await self._create_single_chunk(
+                    memory_id, content, 0, compress_fn, chunk_size=chunk_size
+                )
                 return [chunk] if chunk else []
             
-            # Split content into chunks
+            # Split content into chunks, never more than max_chunks of them
+            chunk_size = self._effective_chunk_size(len(content), chunk_size)
             chunks = []
-            content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+            content_hash = content_digest(content.encode('utf-8'))
             
-            for i in range(0, len(content), chunk_size):
-                chunk_content = content[i:i + chunk_size]
-                chunk_index = i // chunk_size
-                
-                # Check chunk limit
-                if len(chunks) >= self.max_chunks:
-                    logger.warning(f"Reached maximum chunks ({self.max_chunks}) for memory {memory_id}")
-                    break
-                
-                chunk = await self._create_single_chunk(
+            # Compress slices as a stream so strategies can share compressor state
+            if compress_fn is not None:
+                slices = self.compression_strategy.compress_chunks(content, chunk_size)
+            else:
+                slices = (
+                    (content[i:i + chunk_size], content[i:i + chunk_size], False, "none")
+                    for i in range(0, len(content), chunk_size)
+                )
+            
+            create_chunk = self._create_single_chunk
+            for chunk_index, (chunk_content, compressed_content, was_compressed, algorithm) in enumerate(slices):
+                chunk = await create_chunk(
                     memory_id, 
                     chunk_content, 
                     chunk_index, 
-                    compress,
-                    content_hash
+                    None,
+                    content_hash,
+                    (compressed_content, was_compressed, algorithm),
+                    chunk_size
                 )
                 
                 if chunk:
@@ -159,9 +233,80 @@ class SQLAlchemyChunkedStorageStrategy(ChunkedStorageStrategy):
         except Exception as e:
             logger.error(f"Error storing content in chunks for memory {memory_id}: {e}")
             return []
+        finally:
+            # Loads that overlapped the write may have seen partial chunks
+            self.invalidate(memory_id)
+    
+    def invalidate(self, memory_id: int):
+        """Drop cached content for a memory and fence off loads already in flight."""
+        self._cache_generations[memory_id] = self._cache_generations.get(memory_id, 0) + 1
+        self._drop_cached(memory_id)
+    
+    def _drop_cached(self, memory_id: int):
+        """Remove a memory's entry from the content cache."""
+        content = self._content_cache.pop(memory_id, None)
+        if content is not None:
+            self._cache_bytes -= sys.getsizeof(content)
+    
+    def _cache_put(self, memory_id: int, content: str, generation: int):
+        """
+        Cache reassembled content, evicting least recently used entries.
+        `generation` is the memory's generation when the load started; if the
+        memory was invalidated since, the content may be stale and is dropped.
+        """
+        if self._cache_generations.get(memory_id, 0) != generation:
+            return
+        
+        size = sys.getsizeof(content)
+        if size > self.cache_max_bytes:
+            return
+        
+        self._drop_cached(memory_id)
+        self._content_cache[memory_id] = content
+        self._cache_bytes += size
+        
+        while (len(self._content_cache) > self.cache_max_entries
+               or self._cache_bytes > self.cache_max_bytes):
+            _, evicted = self._content_cache.popitem(last=False)
+            self._cache_bytes -= sys.getsizeof(evicted)
+    
+    def prefetch(self, memory_ids: Sequence[int]) -> List[asyncio.Task]:
+        """Warm the content cache in the background for memories likely to be read next."""
+        return [
+            asyncio.create_task(self.retrieve_from_chunks(memory_id))
+            for memory_id in memory_ids
+            if memory_id not in self._content_cache
+        ]
+    
+    def _effective_chunk_size(self, length: int, chunk_size: int) -> int:
+        """Grow the chunk size when needed so content fits in max_chunks chunks."""
+        n_chunks = -(-length // chunk_size)
+        if n_chunks <= self.max_chunks:
+            return chunk_size
+        
+        scaled = -(-length // self.max_chunks)
+        logger.info(f"Content needs {n_chunks} chunks of {chunk_size}; using chunk size {scaled} to stay within {self.max_chunks}")
+        return scaled
     
     async def retrieve_from_chunks(self, memory_id: int) -> Optional[str]:
-        """Retrieve and reassemble content from chunks."""
+        """Retrieve and reassemble content from chunks, serving repeats from the LRU cache."""
+        cached = self._content_cache.get(memory_id)
+        if cached is not None:
+            self._content_cache.move_to_end(memory_id)
+            return cached
+        
+        memory = self._get_memory(memory_id)
+        if memory is not None and memory.inline_content is not None:
+            return memory.inline_content
+        
+        generation = self._cache_generations.get(memory_id, 0)
+        content = await self._load_from_chunks(memory_id)
+        if content is not None:
+            self._cache_put(memory_id, content, generation)
+        return content
+    
+    async def _load_from_chunks(self, memory_id: int) -> Optional[str]:
+        """Query and reassemble content from chunks."""
         try:
             chunks = await self.chunk_repository.find_by_memory(memory_id)
             
@@ -175,12 +320,12 @@ class SQLAlchemyChunkedStorageStrategy(ChunkedStorageStrategy):
             # Reassemble content
             content_parts = []
             for chunk in sorted_chunks:
-                chunk_content = chunk.chunk_data
+                chunk_content = chunk.content
                 
                 # Decompress if needed
                 if chunk.compression_type and chunk.compression_type != "none":
                     try:
-                        chunk_content = self.compression_strategy.decompress(chunk_content)
+                        chunk_content = self.compression_strategy.decompress(chunk_content, chunk.compression_type)
                     except Exception as e:
                         logger.error(f"Failed to decompress chunk {chunk.id}: {e}")
                         return None
@@ -220,6 +365,7 @@ class SQLAlchemyChunkedStorageStrategy(ChunkedStorageStrategy):
     
     async def delete_chunks(self, memory_id: int) -> bool:
         """Delete all chunks for a memory."""
+        self.invalidate(memory_id)
         try:
             return await self.chunk_repository.delete_by_memory(memory_id)
         except Exception as e:
@@ -231,54 +377,63 @@ class SQLAlchemyChunkedStorageStrategy(ChunkedStorageStrategy):
         memory_id: int, 
         content: str, 
         chunk_index: int,
-        compress: bool = True,
-        content_hash: Optional[str] = None
+        compress_fn: Optional[Callable[[str], Tuple[str, bool, str]]] = None,
+        content_hash: Optional[str] = None,
+        compressed_result: Optional[Tuple[str, bool, str]] = None,
+        chunk_size: Optional[int] = None
     ) -> Optional[MemoryChunk]:
-        """Create a single chunk with optional compression."""
+        """
+        Create a single chunk with optional compression.
+        Chunk payloads are content-addressed: identical chunks across memories
+        share one ChunkBlob row and only a mapping row is written per chunk.
+        `compressed_result` carries an already computed compress() result; otherwise
+        `compress_fn`, if given, is called only when no matching blob exists.
+        """
         try:
-            original_size = len(content.encode('utf-8'))
-            compressed_content = content
-            compression_type = "none"
-            compressed_size = original_size
-            compression_ratio = 0.0
-            
-            # Apply compression if enabled
-            if compress and self.compression_strategy:
-                try:
-                    compressed_content, was_compressed = self.compression_strategy.compress(content)
-                    if was_compressed:
-                        compression_type = "zstd"  # Or detect dynamically
-                        compressed_size = len(compressed_content.encode('utf-8'))
-                        compression_ratio = self.compression_strategy.get_compression_ratio(content, compressed_content)
-                except Exception as e:
-                    logger.warning(f"Compression failed for chunk {chunk_index}, storing uncompressed: {e}")
-            
-            # Generate chunk hash
-            chunk_hash = content_hash or hashlib.sha256(content.encode('utf-8')).hexdigest()
-            
-            # Create chunk data
-            chunk_data = {
-                "memory_id": memory_id,
-                "chunk_index": chunk_index,
-                "content": compressed_content,
-                "original_size": original_size,
-                "compressed_size": compressed_size,
-                "compression_ratio": compression_ratio,
-                "hash": chunk_hash
-            }
+            content_bytes = content.encode('utf-8')
+            original_size = len(content_bytes)
+            chunk_hash = content_digest(content_bytes)
             
-            # Create chunk entity
+            # Reuse an existing blob for identical content
+            blob = await self.chunk_repository.find_blob_by_hash(chunk_hash)
+            if blob is None:
+                # Strategies handle their own failures and label what they used
+                if compressed_result is None and compress_fn is not None:
+                    compressed_result = compress_fn(content)
+                if compressed_result is not None:
+                    compressed_content, _, compression_type = compressed_result
+                else:
+                    compressed_content, compression_type = content, "none"
+                
+                compressed_size = len(compressed_content.encode('utf-8'))
+                
+                blob = await self.chunk_repository.create_blob(ChunkBlob(
+                    hash=chunk_hash,
+                    data=compressed_content,
+                    compression_type=compression_type,
+                    original_size=original_size,
+                    compressed_size=compressed_size
+                ))
+            else:
+                logger.debug(f"Reusing chunk blob {chunk_hash[:12]} for chunk {chunk_index} of memory {memory_id}")
+            
+            compressed_size = blob.compressed_size
+            compression_ratio = 1.0 - (compressed_size / original_size) if original_size else 0.0
+            
+            # Create chunk mapping entity
             chunk = MemoryChunk(
                 memory_id=memory_id,
                 chunk_index=chunk_index,
-                chunk_data=compressed_content,
+                blob_hash=chunk_hash,
+                original_size=original_size,
+                compressed_size=compressed_size,
                 chunk_metadata={
-                    "original_size": original_size,
-                    "compressed_size": compressed_size,
                     "compression_ratio": compression_ratio,
-                    "hash": chunk_hash
+                    "hash": chunk_hash,
+                    "content_hash": content_hash or chunk_hash,
+                    "layout": self._layout(chunk_size or self.chunk_size)
                 },
-                compression_type=compression_type
+                compression_type=blob.compression_type
             )
             
             # Save chunk
@@ -313,45 +468,110 @@ class SQLAlchemyChunkedStorageStrategy(ChunkedStorageStrategy):
     async def get_chunk_info(self, memory_id: int) -> Dict[str, Any]:
         """Get information about chunks for a memory."""
         try:
-            chunks = await self.chunk_repository.find_by_memory(memory_id)
+            # Sums are computed by the database rather than over loaded rows
+            stats = await self.chunk_repository.aggregate_by_memory(memory_id)
             
-            total_original_size = 0
-            total_compressed_size = 0
-            compression_types = set()
-            
-            for chunk in chunks:
-                metadata = chunk.chunk_metadata or {}
-                total_original_size += metadata.get('original_size', 0)
-                total_compressed_size += metadata.get('compressed_size', 0)
-                compression_types.add(chunk.compression_type or 'none')
+            chunk_count = stats.get('chunk_count', 0)
+            total_original_size = stats.get('total_original_size') or 0
+            total_compressed_size = stats.get('total_compressed_size') or 0
             
             return {
                 "memory_id": memory_id,
-                "chunk_count": len(chunks),
+                "chunk_count": chunk_count,
                 "total_original_size": total_original_size,
                 "total_compressed_size": total_compressed_size,
                 "compression_ratio": (total_original_size - total_compressed_size) / max(total_original_size, 1),
-                "compression_types": list(compression_types),
-                "average_chunk_size": total_original_size / max(len(chunks), 1)
+                "compression_types": [t or 'none' for t in stats.get('compression_types', [])],
+                "average_chunk_size": total_original_size / max(chunk_count, 1)
             }
             
         except Exception as e:
             logger.error(f"Error getting chunk info for memory {memory_id}: {e}")
             return {}
     
+    def _layout(self, chunk_size: int) -> str:
+        """Describe the chunking parameters a chunk was written with."""
+        strategy = self.compression_strategy
+        return f"{chunk_size}:{type(strategy).__name__}:{getattr(strategy, 'level', '')}"
+    
     async def optimize_chunks(self, memory_id: int) -> Dict[str, Any]:
-        """Optimize chunks by recompressing or reorganizing."""
+        """
+        Optimize chunks by recompressing or reorganizing.
+        Chunks are re-sliced one at a time so only about one chunk of plaintext is
+        held in memory. New rows are written and the old ones removed in a single
+        transaction, so readers never see both sets and a failure leaves the
+        original chunks (and no new blobs) behind.
+        """
         try:
-            # Retrieve current content
-            content = await self.retrieve_from_chunks(memory_id)
-            if not content:
+            chunks = await self.chunk_repository.find_by_memory(memory_id)
+            if not chunks:
                 return {"error": "Could not retrieve content for optimization"}
+            chunks = sorted(chunks, key=lambda x: x.chunk_index)
             
             # Get current stats
             old_info = await self.get_chunk_info(memory_id)
             
-            # Re-chunk with current settings (this may use better compression)
-            new_chunks = await self.update_chunks(memory_id, content, self.chunk_size, True)
+            # Original byte size bounds the character count, so this respects max_chunks
+            chunk_size = self._effective_chunk_size(old_info.get('total_original_size', 0), self.chunk_size)
+            
+            # Nothing to do if the chunks were written with the current settings
+            layout = self._layout(chunk_size)
+            if all((chunk.chunk_metadata or {}).get('layout') == layout for chunk in chunks):
+                return {
+                    "memory_id": memory_id,
+                    "optimization_result": "unchanged",
+                    "old_chunks": old_info.get('chunk_count', 0),
+                    "new_chunks": old_info.get('chunk_count', 0),
+                    "old_size": old_info.get('total_compressed_size', 0),
+                    "new_size": old_info.get('total_compressed_size', 0),
+                    "size_savings": 0
+                }
+            
+            compress_fn = self.compression_strategy.compress if self.compression_strategy else None
+            content_hash = (chunks[0].chunk_metadata or {}).get('content_hash')
+            new_count = 0
+            
+            async def emit(part: str):
+                nonlocal new_count
+                chunk = await self._create_single_chunk(
+                    memory_id, part, new_count, compress_fn, content_hash, chunk_size=chunk_size
+                )
+                if not chunk:
+                    raise RuntimeError(f"Failed to create chunk {new_count} for memory {memory_id}")
+                new_count += 1
+            
+            try:
+                with self.chunk_repository.transaction():
+                    # Stream: decompress each old chunk and re-slice it by offset, carrying
+                    # only the short tail of one chunk over into the next
+                    pending = ""
+                    for chunk in chunks:
+                        part = chunk.content
+                        if chunk.compression_type and chunk.compression_type != "none":
+                            part = self.compression_strategy.decompress(part, chunk.compression_type)
+                        
+                        start = 0
+                        if pending:
+                            start = chunk_size - len(pending)
+                            if len(part) < start:
+                                pending += part
+                                continue
+                            await emit(pending + part[:start])
+                        
+                        end = start + chunk_size
+                        while end <= len(part):
+                            await emit(part[start:end])
+                            start, end = end, end + chunk_size
+                        pending = part[start:]
+                    if pending:
+                        await emit(pending)
+                    
+                    # Swap: drop the old rows; blobs still used by new rows are kept
+                    for chunk in chunks:
+                        if not await self.chunk_repository.delete(chunk.id):
+                            raise RuntimeError(f"Failed to delete chunk {chunk.id} for memory {memory_id}")
+            finally:
+                self.invalidate(memory_id)
             
             # Get new stats
             new_info = await self.get_chunk_info(memory_id)
@@ -14,16 +14,45 @@ Original Author: VoiceLessQ
 Compression strategy implementations.
 Extracts compression logic from enhanced_memory_db.py.
 """
+import base64
 import logging
+import random
+import threading
 import zlib
 import gzip
-from typing import Tuple
+from typing import Dict, Iterator, Optional, Tuple
 from abc import ABC
 
+# Optional native Zstandard support; falls back to zlib when unavailable
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 from ..interfaces.storage_strategy import CompressionStrategy
 
 logger = logging.getLogger(__name__)
 
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+def payload_ratio(original: str, compressed: str) -> float:
+    """
+    Compression ratio measured on the decoded payload bytes.
+    Every strategy reports on this basis so their ratios compare fairly;
+    content returned unchanged (not compressed) has a ratio of 0.
+    """
+    if not original or compressed == original:
+        return 0.0
+    
+    original_size = len(original.encode('utf-8'))
+    try:
+        compressed_size = len(base64.b64decode(compressed.encode('utf-8'), validate=True))
+    except Exception:
+        compressed_size = len(compressed.encode('utf-8'))
+    
+    return 1.0 - (compressed_size / original_size)
+
 
 class ZstdCompressionStrategy(CompressionStrategy):
     """
@@ -33,27 +62,64 @@ class ZstdCompressionStrategy(CompressionStrategy):
     
     def __init__(self, level: int = 3):
         self.level = level
+        # Reusable contexts amortize compressor setup across calls; zstd contexts
+        # are not thread-safe, so each thread that compresses gets its own
+        self._local = threading.local()
+    
+    @property
+    def _cctx(self):
+        cctx = getattr(self._local, "cctx", None)
+        if cctx is None and zstandard is not None:
+            cctx = self._local.cctx = zstandard.ZstdCompressor(level=self.level)
+        return cctx
+    
+    @property
+    def _dctx(self):
+        dctx = getattr(self._local, "dctx", None)
+        if dctx is None and zstandard is not None:
+            dctx = self._local.dctx = zstandard.ZstdDecompressor()
+        return dctx
     
-    def compress(self, content: str) -> Tuple[str, bool]:
+    def _compress_bytes(self, content_bytes: bytes) -> bytes:
+        """Compress raw bytes, using zlib when zstandard is not installed."""
+        cctx = self._cctx
+        if cctx is not None:
+            return cctx.compress(content_bytes)
+        return zlib.compress(content_bytes)
+    
+    def compress(self, content: str) -> Tuple[str, bool, str]:
         """Compress content using Zstandard algorithm."""
         try:
-            # Simple implementation for now
-            import base64
-            import zlib
-            compressed_bytes = zlib.compress(content.encode('utf-8'))
+            compressed_bytes = self._compress_bytes(content.encode('utf-8'))
             compressed_str = base64.b64encode(compressed_bytes).decode('utf-8')
-            return compressed_str, True
+            return compressed_str, True, 'zstd'
         except Exception as e:
             logger.error(f"Zstd compression failed: {e}")
-            return content, False
+            return content, False, 'none'
+    
+    def compress_chunks(self, content: str, chunk_size: int) -> Iterator[Tuple[str, str, bool, str]]:
+        """Compress content slice by slice through one shared compressor context."""
+        compress_bytes = self._compress_bytes
+        b64encode = base64.b64encode
+        for i in range(0, len(content), chunk_size):
+            chunk = content[i:i + chunk_size]
+            try:
+                compressed = b64encode(compress_bytes(chunk.encode('utf-8'))).decode('utf-8')
+                yield chunk, compressed, True, 'zstd'
+            except Exception as e:
+                logger.error(f"Zstd compression failed: {e}")
+                yield chunk, chunk, False, 'none'
     
-    def decompress(self, compressed_content: str) -> str:
+    def decompress(self, compressed_content: str, algorithm: Optional[str] = None) -> str:
         """Decompress content using Zstandard algorithm."""
         try:
-            import base64
-            import zlib
             compressed_bytes = base64.b64decode(compressed_content.encode('utf-8'))
-            decompressed_bytes = zlib.decompress(compressed_bytes)
+            dctx = self._dctx if compressed_bytes[:4] == ZSTD_MAGIC else None
+            if dctx is not None:
+                decompressed_bytes = dctx.decompress(compressed_bytes)
+            else:
+                # Legacy payloads were written with zlib
+                decompressed_bytes = zlib.decompress(compressed_bytes)
             return decompressed_bytes.decode('utf-8')
         except Exception as e:
             logger.error(f"Zstd decompression failed: {e}")
@@ -61,16 +127,7 @@ class ZstdCompressionStrategy(CompressionStrategy):
     
     def get_compression_ratio(self, original: str, compressed: str) -> float:
         """Calculate compression ratio."""
-        if not original:
-            return 0.0
-        
-        original_size = len(original.encode('utf-8'))
-        compressed_size = len(compressed.encode('utf-8'))
-        
-        if original_size == 0:
-            return 0.0
-        
-        return 1.0 - (compressed_size / original_size)
+        return payload_ratio(original, compressed)
 
 
 class GzipCompressionStrategy(CompressionStrategy):
@@ -81,7 +138,7 @@ class GzipCompressionStrategy(CompressionStrategy):
     def __init__(self, level: int = 6):
         self.level = level
     
-    def compress(self, content: str) -> Tuple[str, bool]:
+    def compress(self, content: str) -> Tuple[str, bool, str]:
         """Compress content using Gzip algorithm."""
         try:
             content_bytes = content.encode('utf-8')
@@ -89,21 +146,19 @@ class GzipCompressionStrategy(CompressionStrategy):
             
             # Check if compression was beneficial
             if len(compressed_bytes) >= len(content_bytes):
-                return content, False
+                return content, False, 'none'
             
             # Encode to string for storage
-            import base64
             compressed_str = base64.b64encode(compressed_bytes).decode('utf-8')
-            return compressed_str, True
+            return compressed_str, True, 'gzip'
             
         except Exception as e:
             logger.error(f"Gzip compression failed: {e}")
-            return content, False
+            return content, False, 'none'
     
-    def decompress(self, compressed_content: str) -> str:
+    def decompress(self, compressed_content: str, algorithm: Optional[str] = None) -> str:
         """Decompress content using Gzip algorithm."""
         try:
-            import base64
             compressed_bytes = base64.b64decode(compressed_content.encode('utf-8'))
             decompressed_bytes = gzip.decompress(compressed_bytes)
             return decompressed_bytes.decode('utf-8')
@@ -113,22 +168,7 @@ class GzipCompressionStrategy(CompressionStrategy):
     
     def get_compression_ratio(self, original: str, compressed: str) -> float:
         """Calculate compression ratio."""
-        if not original:
-            return 0.0
-        
-        original_size = len(original.encode('utf-8'))
-        
-        try:
-            import base64
-            compressed_bytes = base64.b64decode(compressed.encode('utf-8'))
-            compressed_size = len(compressed_bytes)
-        except:
-            compressed_size = len(compressed.encode('utf-8'))
-        
-        if original_size == 0:
-            return 0.0
-        
-        return 1.0 - (compressed_size / original_size)
+        return payload_ratio(original, compressed)
 
 
 class ZlibCompressionStrategy(CompressionStrategy):
@@ -139,7 +179,7 @@ class ZlibCompressionStrategy(CompressionStrategy):
     def __init__(self, level: int = 6):
         self.level = level
     
-    def compress(self, content: str) -> Tuple[str, bool]:
+    def compress(self, content: str) -> Tuple[str, bool, str]:
         """Compress content using Zlib algorithm."""
         try:
             content_bytes = content.encode('utf-8')
@@ -147,21 +187,19 @@ class ZlibCompressionStrategy(CompressionStrategy):
             
             # Check if compression was beneficial
             if len(compressed_bytes) >= len(content_bytes):
-                return content, False
+                return content, False, 'none'
             
             # Encode to string for storage
-            import base64
             compressed_str = base64.b64encode(compressed_bytes).decode('utf-8')
-            return compressed_str, True
+            return compressed_str, True, 'zlib'
             
         except Exception as e:
             logger.error(f"Zlib compression failed: {e}")
-            return content, False
+            return content, False, 'none'
     
-    def decompress(self, compressed_content: str) -> str:
+    def decompress(self, compressed_content: str, algorithm: Optional[str] = None) -> str:
         """Decompress content using Zlib algorithm."""
         try:
-            import base64
             compressed_bytes = base64.b64decode(compressed_content.encode('utf-8'))
             decompressed_bytes = zlib.decompress(compressed_bytes)
             return decompressed_bytes.decode('utf-8')
@@ -171,22 +209,7 @@ class ZlibCompressionStrategy(CompressionStrategy):
     
     def get_compression_ratio(self, original: str, compressed: str) -> float:
         """Calculate compression ratio."""
-        if not original:
-            return 0.0
-        
-        original_size = len(original.encode('utf-8'))
-        
-        try:
-            import base64
-            compressed_bytes = base64.b64decode(compressed.encode('utf-8'))
-            compressed_size = len(compressed_bytes)
-        except:
-            compressed_size = len(compressed.encode('utf-8'))
-        
-        if original_size == 0:
-            return 0.0
-        
-        return 1.0 - (compressed_size / original_size)
+        return payload_ratio(original, compressed)
 
 
 class NoCompressionStrategy(CompressionStrategy):
@@ -194,11 +217,11 @@ class NoCompressionStrategy(CompressionStrategy):
     No compression strategy for cases where compression is disabled.
     """
     
-    def compress(self, content: str) -> Tuple[str, bool]:
+    def compress(self, content: str) -> Tuple[str, bool, str]:
         """Return content without compression."""
-        return content, False
+        return content, False, 'none'
     
-    def decompress(self, compressed_content: str) -> str:
+    def decompress(self, compressed_content: str, algorithm: Optional[str] = None) -> str:
         """Return content as-is since it's not compressed."""
         return compressed_content
     
@@ -212,15 +235,44 @@ class AdaptiveCompressionStrategy(CompressionStrategy):
     Adaptive compression strategy that chooses the best algorithm based on content.
     """
     
-    def __init__(self):
+    # Fixed probe order: cheapest/most likely winner first
+    PROBE_ORDER = ('zstd', 'zlib', 'gzip')
+    
+    def __init__(
+        self,
+        good_enough_ratio: float = 0.5,
+        explore_rate: float = 0.1,
+        warmup_samples: int = 8,
+        ema_alpha: float = 0.2,
+        rng: Optional[random.Random] = None
+    ):
         self.strategies = {
             'zstd': ZstdCompressionStrategy(),
             'gzip': GzipCompressionStrategy(),
             'zlib': ZlibCompressionStrategy(),
             'none': NoCompressionStrategy()
         }
+        self.good_enough_ratio = good_enough_ratio
+        self.explore_rate = explore_rate
+        self.warmup_samples = warmup_samples
+        self.ema_alpha = ema_alpha
+        # Drives exploration; pass a seeded Random for reproducible choices
+        self._rng = rng or random.Random()
+        
+        # Per size bucket (power-of-two length class): EMA ratio per algorithm
+        self._bucket_ratios: Dict[int, Dict[str, float]] = {}
+        self._bucket_samples: Dict[int, int] = {}
     
-    def compress(self, content: str) -> Tuple[str, bool]:
+    def _record_ratio(self, bucket: int, name: str, ratio: float):
+        """Fold a new observation into the bucket's EMA for an algorithm."""
+        ratios = self._bucket_ratios.setdefault(bucket, {})
+        previous = ratios.get(name)
+        if previous is None:
+            ratios[name] = ratio
+        else:
+            ratios[name] = previous + self.ema_alpha * (ratio - previous)
+    
+    def compress(self, content: str) -> Tuple[str, bool, str]:
         """Choose best compression strategy based on content characteristics."""
         # For small content, don't compress
         if len(content) < 100:
@@ -230,56 +282,70 @@ class AdaptiveCompressionStrategy(CompressionStrategy):
         if len(content) > 50000:
             return self.strategies['zstd'].compress(content)
         
-        # For medium content, try multiple and pick best
+        bucket = len(content).bit_length()
+        
+        # Exploit the historically best algorithm for this size, re-probing occasionally
+        ratios = self._bucket_ratios.get(bucket)
+        if (ratios and self._bucket_samples.get(bucket, 0) >= self.warmup_samples
+                and self._rng.random() >= self.explore_rate):
+            best_strategy = max(ratios, key=ratios.get)
+            compressed, was_compressed, algorithm = self.strategies[best_strategy].compress(content)
+            if was_compressed:
+                return compressed, True, algorithm
+        
+        # Probe in order and stop as soon as a result is good enough
         best_ratio = 0.0
-        best_result = (content, False)
+        best_result = (content, False, 'none')
         best_strategy = 'none'
         
-        for name, strategy in [('zstd', self.strategies['zstd']), 
-                              ('gzip', self.strategies['gzip']),
-                              ('zlib', self.strategies['zlib'])]:
+        for name in self.PROBE_ORDER:
+            strategy = self.strategies[name]
             try:
-                compressed, was_compressed = strategy.compress(content)
-                if was_compressed:
-                    ratio = strategy.get_compression_ratio(content, compressed)
-                    if ratio > best_ratio:
-                        best_ratio = ratio
-                        best_result = (compressed, True)
-                        best_strategy = name
+                compressed, was_compressed, algorithm = strategy.compress(content)
+                if not was_compressed:
+                    continue
+                ratio = strategy.get_compression_ratio(content, compressed)
+                self._record_ratio(bucket, name, ratio)
+                if ratio > best_ratio:
+                    best_ratio = ratio
+                    best_result = (compressed, True, algorithm)
+                    best_strategy = name
+                if ratio >= self.good_enough_ratio:
+                    break
             except Exception as e:
                 logger.warning(f"Strategy {name} failed: {e}")
                 continue
         
+        self._bucket_samples[bucket] = self._bucket_samples.get(bucket, 0) + 1
+        
         logger.debug(f"Selected {best_strategy} compression with ratio {best_ratio:.2f}")
         return best_result
     
-    def decompress(self, compressed_content: str) -> str:
-        """Attempt decompression with all strategies until one succeeds."""
-        # Try each strategy in order of likelihood
-        for strategy in [self.strategies['zstd'], 
-                        self.strategies['gzip'],
-                        self.strategies['zlib']]:
-            try:
-                decompressed = strategy.decompress(compressed_content)
-                # If decompression changed the content, it probably worked
-                if decompressed != compressed_content:
-                    return decompressed
-            except Exception:
-                continue
+    @staticmethod
+    def _detect(compressed_content: str) -> str:
+        """Detect the algorithm from the magic bytes of the encoded payload."""
+        try:
+            # 8 base64 characters decode to the first 6 payload bytes
+            head = base64.b64decode(compressed_content[:8].encode('utf-8'), validate=True)
+        except Exception:
+            return 'none'
         
-        # If all strategies failed, return original content
-        logger.warning("All decompression strategies failed, returning original content")
-        return compressed_content
+        if head[:4] == ZSTD_MAGIC:
+            return 'zstd'
+        if head[:2] == b'\x1f\x8b':
+            return 'gzip'
+        if len(head) >= 2 and head[0] & 0x0f == 8 and (head[0] << 8 | head[1]) % 31 == 0:
+            return 'zlib'
+        return 'none'
+    
+    def decompress(self, compressed_content: str, algorithm: Optional[str] = None) -> str:
+        """Decompress with the strategy named by `algorithm`, detecting it if unknown."""
+        strategy = self.strategies.get(algorithm or self._detect(compressed_content))
+        if strategy is None:
+            logger.warning(f"Unknown compression type {algorithm}, returning original content")
+            return compressed_content
+        return strategy.decompress(compressed_content)
     
     def get_compression_ratio(self, original: str, compressed: str) -> float:
-        """Calculate compression ratio based on byte sizes."""
-        if not original:
-            return 0.0
-        
-        original_size = len(original.encode('utf-8'))
-        compressed_size = len(compressed.encode('utf-8'))
-        
-        if original_size == 0:
-            return 0.0
-        
-        return 1.0 - (compressed_size / original_size)
\ No newline at end of file
+        """Calculate compression ratio based on decoded payload size."""
+        return payload_ratio(original, compressed)
\ No newline at end of file
@@ -16,37 +16,132 @@ Deduplication system for the MCP Multi-Context Memory System.
 import hashlib
 import json
 import logging
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from pathlib import Path
 import mmh3  # MurmurHash3 for fast hashing
 import xxhash  # Even faster hashing
 import numpy as np
 import spacy
-from collections import defaultdict
+from collections import Counter, OrderedDict, defaultdict
 import time
-import pickle
 import os
 
 # Handle sklearn import gracefully
 try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
+    from scipy import sparse
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import normalize
     SKLEARN_AVAILABLE = True
 except ImportError:
     logging.warning("sklearn not available. Some features will be disabled.")
-    TfidfVectorizer = None
-    cosine_similarity = None
+    sparse = None
+    HashingVectorizer = None
+    TfidfTransformer = None
+    make_pipeline = None
+    normalize = None
     SKLEARN_AVAILABLE = False
 
+# Optional process-level parallelism for vectorization
+try:
+    from joblib import Parallel, delayed
+    JOBLIB_AVAILABLE = True
+except ImportError:
+    Parallel = None
+    delayed = None
+    JOBLIB_AVAILABLE = False
+
+# Optional MinHash LSH for sublinear near-duplicate candidate generation
+try:
+    from datasketch import MinHash, MinHashLSH
+    DATASKETCH_AVAILABLE = True
+except ImportError:
+    MinHash = None
+    MinHashLSH = None
+    DATASKETCH_AVAILABLE = False
+
+# Optional JIT-compiled similarity kernel for the semantic path
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    njit = None
+    prange = None
+    NUMBA_AVAILABLE = False
+
+# Optional FAISS index for blocked SIMD inner-product search
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    faiss = None
+    FAISS_AVAILABLE = False
+
 from ..database.models import Memory, Context, Relation
 from ..database.db_interface import DatabaseInterface
 from ..utils.compression import CompressionManager
 
 logger = logging.getLogger(__name__)
 
+# Permutations per MinHash signature for fuzzy deduplication
+MINHASH_PERMUTATIONS = 128
+
+# Characters counted as punctuation by extract_features
+PUNCTUATION_CHARS = ".,!?;:\"'()[]{}"
+
+# Characters of head and tail compared before hashing content in full
+EXACT_PREFIX_CHARS = 64
+
+# Bound for the feature memo cache
+FEATURE_CACHE_SIZE = 10_000
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _cosine_pairs(X, threshold):
+        """
+        Return (rows, cols) of pairs i < j with X[i] . X[j] >= threshold.
+        X must be L2-normalized. Rows are counted in a first parallel pass so the
+        second pass can write pairs into exact per-row slots without locking.
+        """
+        n, d = X.shape
+        counts = np.zeros(n, dtype=np.int64)
+        for i in prange(n):
+            found = 0
+            for j in range(i + 1, n):
+                dot = 0.0
+                for k in range(d):
+                    dot += X[i, k] * X[j, k]
+                if dot >= threshold:
+                    found += 1
+            counts[i] = found
+            
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        for i in range(n):
+            offsets[i + 1] = offsets[i] + counts[i]
+            
+        rows = np.empty(offsets[n], dtype=np.int64)
+        cols = np.empty(offsets[n], dtype=np.int64)
+        for i in prange(n):
+            pos = offsets[i]
+            end = offsets[i + 1]
+            for j in range(i + 1, n):
+                if pos >= end:
+                    break
+                dot = 0.0
+                for k in range(d):
+                    dot += X[i, k] * X[j, k]
+                if dot >= threshold:
+                    rows[pos] = i
+                    cols[pos] = j
+                    pos += 1
+        return rows, cols
+
 class DeduplicationManager:
     """Manage memory deduplication with multiple strategies."""
     
+    # Rows per similarity tile; bounds peak memory to SIMILARITY_TILE x batch floats
+    SIMILARITY_TILE = 512
+    
     def __init__(self, db: DatabaseInterface, config: Dict = None):
         """
         Initialize the deduplication manager.
@@ -64,13 +159,20 @@ class DeduplicationManager:
         self.threshold = self.config.get("deduplication_threshold", 0.95)  # Similarity threshold
         self.batch_size = self.config.get("deduplication_batch_size", 1000)
         self.max_similarity_checks = self.config.get("max_similarity_checks", 100)
+        self.n_jobs = self.config.get("deduplication_n_jobs", -1)  # -1 uses all CPU cores
+        # spaCy worker processes each load the pipeline, which only pays off on large corpora
+        self.semantic_n_process = self.config.get("semantic_n_process", 1)
+        self.fuzzy_method = self.config.get("fuzzy_method", "minhash")  # minhash, tfidf
+        self.quantize_embeddings = self.config.get("semantic_quantize", False)  # int8 embeddings
         
         # Initialize models and tools
         self._initialize_models()
         
-        # Cache for hashes and similarities
-        self.hash_cache = {}
-        self.similarity_cache = {}
+        # Set once find_fuzzy_duplicates has fitted IDF weights on a corpus
+        self._vectorizer_fitted = False
+        
+        # Feature memo keyed by content xxh3 so cached entries don't pin content strings
+        self._feature_cache: "OrderedDict[int, Dict]" = OrderedDict()
         
         # Statistics
         self.stats = {
@@ -91,22 +193,27 @@ class DeduplicationManager:
                 logger.warning("spaCy model 'en_core_web_md' not found. Using basic text processing.")
                 self.nlp = None
             
-            # Initialize TF-IDF vectorizer for fuzzy matching only if sklearn is available
+            # Initialize TF-IDF vectorizer for fuzzy matching only if sklearn is available.
+            # Feature hashing is stateless (no vocabulary pass or dict), so the corpus
+            # can be transformed in chunks; only the IDF weights need fitting.
             if SKLEARN_AVAILABLE:
-                self.vectorizer = TfidfVectorizer(
-                    max_features=1000,
-                    stop_words='english',
-                    ngram_range=(1, 2),
-                    min_df=2
+                self.vectorizer = make_pipeline(
+                    HashingVectorizer(
+                        n_features=2 ** 18,
+                        alternate_sign=False,
+                        stop_words='english',
+                        ngram_range=(1, 2),
+                        norm=None
+                    ),
+                    TfidfTransformer()
                 )
                 logger.info("TF-IDF vectorizer initialized")
             else:
                 self.vectorizer = None
                 logger.warning("TF-IDF vectorizer disabled due to missing sklearn")
             
-            # Initialize hashers
+            # Initialize hashers (xxhash is used through its stateless one-shot functions)
             self.murmur_hasher = mmh3
-            self.xx_hasher = xxhash.xxh64()
             
             logger.info("Deduplication models initialized successfully")
             
@@ -115,13 +222,14 @@ class DeduplicationManager:
             self.nlp = None
             self.vectorizer = None
             
-    def calculate_content_hash(self, content: str, method: str = "xxhash") -> str:
+    def calculate_content_hash(self, content: str, method: str = "xxhash", normalized: bool = False) -> str:
         """
         Calculate a hash for the given content.
         
         Args:
             content: Text content to hash
-            method: Hashing method ('md5', 'sha256', 'murmur', 'xxhash')
+            method: Hashing method ('md5', 'sha256', 'murmur', 'xxhash', 'xxh3_128')
+            normalized: Whether content is already stripped and lowercased
             
         Returns:
             Hexadecimal hash string
@@ -129,17 +237,24 @@ class DeduplicationManager:
         if not content:
             return ""
             
-        # Normalize content
-        normalized = content.lower().strip()
+        # Normalize content unless the caller already did
+        if not normalized:
+            content = content.strip().lower()
+            
+        # Encode once; every hasher works on the same bytes
+        data = content.encode("utf-8")
         
-        if method == "md5":
-            return hashlib.md5(normalized.encode()).hexdigest()
+        if method == "xxhash":
+            return f"{xxhash.xxh3_64_intdigest(data):016x}"
+        elif method == "md5":
+            return hashlib.md5(data).hexdigest()
         elif method == "sha256":
-            return hashlib.sha256(normalized.encode()).hexdigest()
+            return hashlib.sha256(data).hexdigest()
         elif method == "murmur":
-            return str(self.murmur_hasher.hash(normalized))
-        elif method == "xxhash":
-            return str(self.xx_hasher.intdigest(normalized))
+            return str(self.murmur_hasher.hash(data))
+        elif method == "xxh3_128":
+            # Wider digest for collision-safe dedup over very large collections
+            return xxhash.xxh3_128_hexdigest(data)
         else:
             raise ValueError(f"Unknown hashing method: {method}")
             
@@ -153,14 +268,32 @@ class DeduplicationManager:
         Returns:
             Dictionary of extracted features
         """
+        key = xxhash.xxh3_64_intdigest(content.encode("utf-8"))
+        features = self._feature_cache.get(key)
+        if features is not None:
+            self._feature_cache.move_to_end(key)
+            return dict(features)
+            
+        features = self._compute_features(content)
+        self._feature_cache[key] = features
+        if len(self._feature_cache) > FEATURE_CACHE_SIZE:
+            self._feature_cache.popitem(last=False)
+        return dict(features)
+        
+    def _compute_features(self, content: str) -> Dict:
+        """Compute the features returned by extract_features."""
+        # One C-level pass over the characters; per-class counts come from distinct chars
+        char_counts = Counter(content)
+        words = content.split()
+        
         features = {
             "length": len(content),
-            "word_count": len(content.split()),
-            "char_count": len(content.replace(" ", "")),
-            "avg_word_length": sum(len(word) for word in content.split()) / len(content.split()) if content.split() else 0,
-            "punctuation_count": sum(1 for char in content if char in ".,!?;:\"'()[]{}"),
-            "digit_count": sum(1 for char in content if char.isdigit()),
-            "uppercase_count": sum(1 for char in content if char.isupper()),
+            "word_count": len(words),
+            "char_count": len(content) - char_counts[" "],
+            "avg_word_length": sum(map(len, words)) / len(words) if words else 0,
+            "punctuation_count": sum(char_counts[char] for char in PUNCTUATION_CHARS),
+            "digit_count": sum(n for char, n in char_counts.items() if char.isdigit()),
+            "uppercase_count": sum(n for char, n in char_counts.items() if char.isupper()),
         }
         
         # Add spaCy features if available
@@ -194,44 +327,26 @@ class DeduplicationManager:
         if not content1 or not content2:
             return 0.0
             
-        # Check cache first
-        cache_key = f"{hash(content1)}_{hash(content2)}"
-        if cache_key in self.similarity_cache:
-            return self.similarity_cache[cache_key]
-            
         if method == "cosine":
-            # Use TF-IDF for cosine similarity
-            if not SKLEARN_AVAILABLE or not self.vectorizer or not cosine_similarity:
+            # Project onto the corpus-level TF-IDF space; never refit it for a single pair.
+            # Until IDF weights are fitted, use plain term frequencies from the stateless hasher.
+            if not SKLEARN_AVAILABLE or not self.vectorizer:
                 logger.warning("sklearn not available, falling back to Jaccard similarity")
                 method = "jaccard"
             else:
                 try:
-                    corpus = [content1, content2]
-                    tfidf = self.vectorizer.fit_transform(corpus)
-                    similarity = cosine_similarity(tfidf[0:1], tfidf[1:2])[0][0]
-                    self.similarity_cache[cache_key] = similarity
-                    return similarity
+                    encoder = self.vectorizer if self._vectorizer_fitted else self.vectorizer[0]
+                    vectors = normalize(encoder.transform([content1, content2]), norm='l2')
+                    return float((vectors[0] @ vectors[1].T).toarray()[0, 0])
                 except Exception as e:
                     logger.warning(f"Error calculating cosine similarity: {e}")
                     return 0.0
                 
-        elif method == "jaccard":
-            # Calculate Jaccard similarity
-            set1 = set(content1.lower().split())
-            set2 = set(content2.lower().split())
-            intersection = set1.intersection(set2)
-            union = set1.union(set2)
-            similarity = len(intersection) / len(union) if union else 0.0
-            self.similarity_cache[cache_key] = similarity
-            return similarity
-            
         elif method == "levenshtein":
             # Calculate normalized Levenshtein distance
             try:
                 from Levenshtein import ratio
-                similarity = ratio(content1, content2) / 100.0
-                self.similarity_cache[cache_key] = similarity
-                return similarity
+                return ratio(content1, content2) / 100.0
             except ImportError:
                 logger.warning("python-Levenshtein not available, falling back to Jaccard similarity")
                 method = "jaccard"
@@ -240,37 +355,136 @@ class DeduplicationManager:
                 logger.warning(f"Error calculating Levenshtein similarity: {e}")
                 return 0.0
             
-        else:
+        elif method != "jaccard":
             raise ValueError(f"Unknown similarity method: {method}")
             
-    def find_exact_duplicates(self, memories: List[Memory]) -> Dict[str, List[Memory]]:
+        # Calculate Jaccard similarity (also the fallback for the methods above)
+        set1 = set(content1.lower().split())
+        set2 = set(content2.lower().split())
+        intersection = set1.intersection(set2)
+        union = set1.union(set2)
+        return len(intersection) / len(union) if union else 0.0
+            
+    def find_exact_duplicates(self, memories: Iterable[Memory]) -> Dict[str, List[int]]:
         """
         Find exact duplicates based on content hash.
         
+        Lists are prefiltered by length, head and tail before hashing. Other
+        iterables, such as db.iter_memories(), are consumed in a single pass
+        that keeps only hashes and memory IDs.
+        
         Args:
-            memories: List of memory objects
+            memories: List or iterable of memory objects
             
         Returns:
-            Dictionary mapping hash to list of duplicate memories
+            Dictionary mapping hash to list of duplicate memory IDs
         """
+        hash_method = self.config.get("hash_method", "xxhash")
+        if not isinstance(memories, list):
+            return self._find_exact_duplicates_streaming(memories, hash_method)
+            
+        candidates, normalized = self._exact_duplicate_candidates(memories)
+        if hash_method == "xxhash":
+            return self._find_exact_duplicates_xxh3(candidates, normalized)
+            
         duplicates = defaultdict(list)
         
-        for memory in memories:
-            if not memory.content:
-                continue
-                
+        for memory, text in zip(candidates, normalized):
             # Calculate hash using configured method
-            hash_method = self.config.get("hash_method", "xxhash")
-            content_hash = self.calculate_content_hash(memory.content, hash_method)
+            content_hash = self.calculate_content_hash(text, hash_method, normalized=True)
             
             # Store in duplicates dictionary
-            duplicates[content_hash].append(memory)
+            duplicates[content_hash].append(memory.id)
             
         # Filter out non-duplicates
         duplicates = {k: v for k, v in duplicates.items() if len(v) > 1}
         
         return duplicates
         
+    def _find_exact_duplicates_streaming(self, memories: Iterable[Memory], hash_method: str) -> Dict[str, List[int]]:
+        """
+        Group memory IDs by content hash without retaining the memories.
+        
+        Args:
+            memories: Iterable of memory objects, consumed once
+            hash_method: Hashing method passed to calculate_content_hash
+            
+        Returns:
+            Dictionary mapping hash to list of duplicate memory IDs
+        """
+        groups = defaultdict(list)
+        
+        for memory in memories:
+            if not memory.content:
+                continue
+                
+            normalized = memory.content.lower().strip()
+            if hash_method == "xxhash":
+                groups[xxhash.xxh3_64_intdigest(normalized.encode("utf-8"))].append(memory.id)
+            else:
+                groups[self.calculate_content_hash(normalized, hash_method, normalized=True)].append(memory.id)
+                
+        return {
+            f"{key:016x}" if isinstance(key, int) else key: ids
+            for key, ids in groups.items() if len(ids) > 1
+        }
+        
+    def _exact_duplicate_candidates(self, memories: List[Memory]) -> Tuple[List[Memory], List[str]]:
+        """
+        Drop memories whose normalized length, head and tail are unique.
+        
+        Content that differs in any of these can't be an exact duplicate, so only
+        the survivors need a full-content hash.
+        
+        Args:
+            memories: List of memory objects
+            
+        Returns:
+            Tuple of (surviving memories, their normalized contents)
+        """
+        buckets = defaultdict(list)
+        for memory in memories:
+            if not memory.content:
+                continue
+            normalized = memory.content.lower().strip()
+            key = (len(normalized), normalized[:EXACT_PREFIX_CHARS], normalized[-EXACT_PREFIX_CHARS:])
+            buckets[key].append((memory, normalized))
+            
+        survivors = [entry for bucket in buckets.values() if len(bucket) > 1 for entry in bucket]
+        return [memory for memory, _ in survivors], [text for _, text in survivors]
+        
+    def _find_exact_duplicates_xxh3(self, candidates: List[Memory], normalized: List[str]) -> Dict[str, List[int]]:
+        """
+        Group memories by xxh3 content hash using a contiguous uint64 array.
+        
+        Args:
+            candidates: Memory objects to group
+            normalized: Normalized content of each candidate
+            
+        Returns:
+            Dictionary mapping hash to list of duplicate memory IDs
+        """
+        hashes = np.fromiter(
+            (xxhash.xxh3_64_intdigest(text.encode("utf-8")) for text in normalized),
+            dtype=np.uint64,
+            count=len(candidates)
+        )
+        
+        # Sort once; equal hashes form contiguous runs
+        order = np.argsort(hashes, kind="stable")
+        sorted_hashes = hashes[order]
+        boundaries = np.flatnonzero(np.diff(sorted_hashes)) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(candidates)]))
+        
+        # Only visit runs of two or more
+        duplicates = {}
+        for run in np.flatnonzero(ends - starts > 1):
+            group = order[starts[run]:ends[run]]
+            duplicates[f"{int(sorted_hashes[starts[run]]):016x}"] = [candidates[i].id for i in group]
+            
+        return duplicates
+        
     def find_fuzzy_duplicates(self, memories: List[Memory]) -> Dict[str, List[Memory]]:
         """
         Find fuzzy duplicates based on content similarity.
@@ -281,46 +495,102 @@ class DeduplicationManager:
         Returns:
             Dictionary mapping memory ID to list of similar memories
         """
+        if self.fuzzy_method == "minhash" and DATASKETCH_AVAILABLE:
+            return self._find_fuzzy_duplicates_minhash(memories)
+            
         if not SKLEARN_AVAILABLE or not self.vectorizer:
             logger.warning("sklearn not available, skipping fuzzy deduplication")
             return {}
             
         duplicates = defaultdict(list)
-        processed = 0
         
-        # Convert memories to list of tuples for easier processing
-        memory_list = [(mem.id, mem.content) for mem in memories if mem.content]
+        hasher, tfidf = self.vectorizer[0], self.vectorizer[-1]
+        memory_ids = []
         
-        # Calculate TF-IDF matrix for all memories
+        def corpus_chunks():
+            for start in range(0, len(memories), self.batch_size):
+                chunk = [mem for mem in memories[start:start + self.batch_size] if mem.content]
+                if chunk:
+                    memory_ids.extend(mem.id for mem in chunk)
+                    yield [mem.content for mem in chunk]
+        
+        # Calculate TF-IDF matrix for all memories, hashing the corpus chunk by chunk.
+        # The hasher is stateless, so chunks can be transformed in parallel processes.
         try:
-            corpus = [content for _, content in memory_list]
-            tfidf_matrix = self.vectorizer.fit_transform(corpus)
+            if JOBLIB_AVAILABLE and self.n_jobs != 1 and len(memories) > self.batch_size:
+                term_counts = Parallel(n_jobs=self.n_jobs)(
+                    delayed(hasher.transform)(texts) for texts in corpus_chunks()
+                )
+            else:
+                term_counts = [hasher.transform(texts) for texts in corpus_chunks()]
+                
+            if not term_counts:
+                return duplicates
+            tfidf_matrix = tfidf.fit_transform(sparse.vstack(term_counts, format='csr'))
+            self._vectorizer_fitted = True
         except Exception as e:
             logger.warning(f"Error creating TF-IDF matrix: {e}")
             return duplicates
             
-        # Calculate pairwise similarities
-        for i in range(len(memory_list)):
-            mem_id1, content1 = memory_list[i]
-            
-            # Compare with next max_similarity_checks memories
-            end_idx = min(i + self.max_similarity_checks, len(memory_list))
+        # Cosine similarity is a plain dot product on L2-normalized rows
+        X = normalize(tfidf_matrix, norm='l2', copy=False).tocsr()
+        X_t = X.T.tocsc()
+        
+        # Multiply in row blocks to bound the size of the similarity matrix
+        for start in range(0, X.shape[0], self.batch_size):
+            block = (X[start:start + self.batch_size] @ X_t).tocoo()
+            rows = block.row + start
+            mask = (block.data >= self.threshold) & (rows < block.col)
             
-            for j in range(i + 1, end_idx):
-                mem_id2, content2 = memory_list[j]
-                
-                # Calculate similarity
-                similarity = self.calculate_similarity(content1, content2)
+            for row, col in zip(rows[mask], block.col[mask]):
+                mem_id1, mem_id2 = memory_ids[row], memory_ids[col]
+                duplicates[mem_id1].append(mem_id2)
+                duplicates[mem_id2].append(mem_id1)
                 
-                # Check if above threshold
-                if similarity >= self.threshold:
-                    duplicates[mem_id1].append(mem_id2)
-                    duplicates[mem_id2].append(mem_id1)
+            logger.info(f"Processed similarity rows {start}-{min(start + self.batch_size, X.shape[0])}")
                     
-                processed += 1
-                if processed % 1000 == 0:
-                    logger.info(f"Processed {processed} similarity checks")
+        return duplicates
+        
+    def _find_fuzzy_duplicates_minhash(self, memories: List[Memory]) -> Dict[str, List[Memory]]:
+        """
+        Find fuzzy duplicates with MinHash LSH over word sets.
+        
+        LSH banding yields candidates in roughly constant time per memory; each
+        candidate is then verified with exact Jaccard similarity.
+        
+        Args:
+            memories: List of memory objects
+            
+        Returns:
+            Dictionary mapping memory ID to list of similar memories
+        """
+        duplicates = defaultdict(list)
+        lsh = MinHashLSH(threshold=self.threshold, num_perm=MINHASH_PERMUTATIONS)
+        memory_ids = []
+        token_sets = []
+        
+        for memory in memories:
+            if not memory.content:
+                continue
+            tokens = set(memory.content.lower().split())
+            if not tokens:
+                continue
+                
+            minhash = MinHash(num_perm=MINHASH_PERMUTATIONS, hashfunc=xxhash.xxh32_intdigest)
+            minhash.update_batch([token.encode("utf-8") for token in tokens])
+            
+            # Query before inserting so each pair is seen once
+            for candidate in lsh.query(minhash):
+                other = token_sets[candidate]
+                intersection = len(tokens & other)
+                if intersection / (len(tokens) + len(other) - intersection) >= self.threshold:
+                    duplicates[memory_ids[candidate]].append(memory.id)
+                    duplicates[memory.id].append(memory_ids[candidate])
                     
+            lsh.insert(len(memory_ids), minhash)
+            memory_ids.append(memory.id)
+            token_sets.append(tokens)
+            
         return duplicates
         
     def find_semantic_duplicates(self, memories: List[Memory]) -> Dict[str, List[Memory]]:
@@ -339,57 +609,98 @@ class DeduplicationManager:
             logger.warning("spaCy model not available for semantic deduplication")
             return self.find_fuzzy_duplicates(memories)
             
-        if not SKLEARN_AVAILABLE or not cosine_similarity:
-            logger.warning("sklearn not available, skipping semantic similarity calculation")
-            return self.find_fuzzy_duplicates(memories)
-            
-        # Process memories in batches
-        for i in range(0, len(memories), self.batch_size):
-            batch = memories[i:i + self.batch_size]
-            logger.info(f"Processing semantic batch {i//self.batch_size + 1}")
+        valid_memories = [memory for memory in memories if memory.content]
+        if not valid_memories:
+            return duplicates
             
-            # Extract embeddings for batch
-            embeddings = []
-            valid_memories = []
+        # Embed the whole corpus in one pipe() call into a preallocated float32 matrix,
+        # so any worker processes are started once rather than per batch
+        embeddings = None
+        try:
+            # Only the document vector is used, so skip tagger/parser/NER
+            with self.nlp.select_pipes(enable=[name for name in ("tok2vec",) if name in self.nlp.pipe_names]):
+                docs = self.nlp.pipe(
+                    (memory.content[:1000] for memory in valid_memories),  # Limit length for performance
+                    n_process=self.semantic_n_process,
+                    batch_size=256
+                )
+                for row, doc in enumerate(docs):
+                    if embeddings is None:
+                        embeddings = np.empty((len(valid_memories), doc.vector.shape[0]), dtype=np.float32)
+                    embeddings[row] = doc.vector
+        except Exception as e:
+            logger.warning(f"Error extracting semantic embeddings: {e}")
+            return duplicates
             
-            for memory in batch:
-                if not memory.content:
-                    continue
-                    
-                try:
-                    # Process with spaCy
-                    doc = self.nlp(memory.content[:1000])  # Limit length for performance
-                    if doc.vector_norm > 0:
-                        embeddings.append(doc.vector)
-                        valid_memories.append(memory)
-                except Exception as e:
-                    logger.warning(f"Error processing memory {memory.id}: {e}")
-                    continue
-                    
-            if not embeddings:
-                continue
-                
-            # Convert to numpy array
-            embeddings = np.array(embeddings)
-            
-            # Calculate cosine similarity matrix
-            similarity_matrix = cosine_similarity(embeddings)
-            
-            # Find duplicates
-            for idx1, mem1 in enumerate(valid_memories):
-                for idx2, mem2 in enumerate(valid_memories[idx1 + 1:], idx1 + 1):
-                    if similarity_matrix[idx1][idx2] >= self.threshold:
-                        duplicates[mem1.id].append(mem2.id)
-                        duplicates[mem2.id].append(mem1.id)
+        # L2-normalize so cosine similarity is a plain dot product. The epsilon
+        # leaves zero vectors at zero, so they never match anything.
+        norms = np.einsum('ij,ij->i', embeddings, embeddings)
+        np.sqrt(norms, out=norms)
+        np.maximum(norms, 1e-12, out=norms)
+        embeddings /= norms[:, None]
+        
+        # Compare memories within batches
+        for start in range(0, len(valid_memories), self.batch_size):
+            logger.info(f"Processing semantic batch {start//self.batch_size + 1}")
+            batch = valid_memories[start:start + self.batch_size]
+            
+            for idx1, idx2 in self._similar_pairs(embeddings[start:start + self.batch_size]):
+                mem1, mem2 = batch[idx1], batch[idx2]
+                duplicates[mem1.id].append(mem2.id)
+                duplicates[mem2.id].append(mem1.id)
                         
         return duplicates
         
-    def find_duplicates(self, memories: List[Memory] = None) -> Dict[str, List[Memory]]:
+    def _similar_pairs(self, embeddings: np.ndarray):
+        """
+        Yield index pairs (i, j), i < j, whose cosine similarity meets the threshold.
+        
+        Args:
+            embeddings: L2-normalized embedding matrix
+        """
+        if FAISS_AVAILABLE and not self.quantize_embeddings:
+            # Exact inner-product range search; returns every neighbour above threshold
+            index = faiss.IndexFlatIP(embeddings.shape[1])
+            index.add(np.ascontiguousarray(embeddings))
+            lims, _, neighbors = index.range_search(np.ascontiguousarray(embeddings), float(self.threshold))
+            # lims is size_t; repeat counts must be a signed integer type
+            rows = np.repeat(np.arange(len(embeddings)), np.diff(lims).astype(np.int64))
+            keep = neighbors > rows
+            yield from zip(rows[keep], neighbors[keep])
+            return
+            
+        if NUMBA_AVAILABLE and not self.quantize_embeddings:
+            # Fused dot + threshold + harvest; no similarity tile is materialized
+            rows, cols = _cosine_pairs(embeddings, np.float32(self.threshold))
+            yield from zip(rows, cols)
+            return
+            
+        if self.quantize_embeddings:
+            # int8 rows with int32 accumulation; compare against an integer threshold
+            matrix = np.round(embeddings * 127).astype(np.int8)
+            threshold = int(round(self.threshold * 127 * 127))
+            
+            def similarity_tile(start):
+                return np.einsum('ik,jk->ij', matrix[start:start + self.SIMILARITY_TILE], matrix, dtype=np.int32)
+        else:
+            threshold = self.threshold
+            
+            def similarity_tile(start):
+                return embeddings[start:start + self.SIMILARITY_TILE] @ embeddings.T
+                
+        # Tiled GEMM: harvest upper-triangle pairs above threshold per tile
+        for start in range(0, len(embeddings), self.SIMILARITY_TILE):
+            rows, cols = np.nonzero(similarity_tile(start) >= threshold)
+            rows += start
+            keep = cols > rows
+            yield from zip(rows[keep], cols[keep])
+        
+    def find_duplicates(self, memories: Iterable[Memory] = None) -> Dict[int, List[int]]:
         """
         Find all duplicates using the configured strategy.
         
         Args:
-            memories: Optional list of memories to check. If None, checks all memories.
+            memories: Optional memories to check. If None, streams all memories from the database.
             
         Returns:
             Dictionary mapping memory ID to list of duplicate memory IDs
@@ -400,11 +711,18 @@ class DeduplicationManager:
             
         start_time = time.time()
         
-        # Get memories to check
+        # Get memories to check; exact matching streams them, the other
+        # strategies index into batches and need a list
         if memories is None:
-            memories = self.db.get_all_memories()
+            memories = self.db.iter_memories(batch_size=self.config.get("deduplication_stream_batch_size", 10_000))
+        if self.strategy != "content_hash" and not isinstance(memories, list):
+            memories = list(memories)
             
-        self.stats["total_memories"] = len(memories)
+        if isinstance(memories, list):
+            self.stats["total_memories"] = len(memories)
+        else:
+            self.stats["total_memories"] = 0
+            memories = self._count_memories(memories)
         
         # Find duplicates based on strategy
         if self.strategy == "content_hash":
@@ -417,13 +735,15 @@ class DeduplicationManager:
             logger.warning(f"Unknown deduplication strategy: {self.strategy}")
             return {}
             
-        # Convert to consistent format
-        formatted_duplicates = defaultdict(list)
-        for hash_val, mem_list in duplicates.items():
-            for i, mem1 in enumerate(mem_list):
-                for mem2 in mem_list[i + 1:]:
-                    formatted_duplicates[mem1.id].append(mem2.id)
-                    formatted_duplicates[mem2.id].append(mem1.id)
+        # Fuzzy and semantic strategies already return ID adjacency lists;
+        # exact groups are expanded once per member
+        if self.strategy == "content_hash":
+            formatted_duplicates = {}
+            for ids in duplicates.values():
+                for mem_id in ids:
+                    formatted_duplicates[mem_id] = [other for other in ids if other != mem_id]
+        else:
+            formatted_duplicates = duplicates
                     
         # Update statistics
         self.stats["duplicate_groups"] = len(duplicates)
@@ -434,6 +754,12 @@ class DeduplicationManager:
         
         return dict(formatted_duplicates)
         
+    def _count_memories(self, memories: Iterable[Memory]) -> Iterator[Memory]:
+        """Pass memories through, counting them into stats as they stream."""
+        for memory in memories:
+            self.stats["total_memories"] += 1
+            yield memory
+            
     def merge_duplicates(self, duplicates: Dict[str, List[str]], strategy: str = "keep_first") -> List[str]:
         """
         Merge duplicate memories.
@@ -459,11 +785,11 @@ class DeduplicationManager:
             all_ids = [mem_id] + dup_ids
             
             # Skip if already processed
-            if any(id in processed for id in all_ids):
+            if not processed.isdisjoint(all_ids):
                 continue
                 
-            # Get memory objects
-            memories = [self.db.get_memory(id) for id in all_ids if self.db.get_memory(id)]
+            # Get memory objects in one batch
+            memories = self.db.get_memories_by_ids(all_ids)
             
             if not memories:
                 continue
@@ -554,15 +880,13 @@ class DeduplicationManager:
             file_path: Path to save the state
         """
         state = {
-            "hash_cache": self.hash_cache,
-            "similarity_cache": self.similarity_cache,
             "stats": self.stats,
             "timestamp": time.time()
         }
         
         try:
-            with open(file_path, 'wb') as f:
-                pickle.dump(state, f)
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
             logger.info(f"Deduplication state saved to {file_path}")
         except Exception as e:
             logger.error(f"Error saving deduplication state: {e}")
@@ -579,11 +903,9 @@ class DeduplicationManager:
             return
             
         try:
-            with open(file_path, 'rb') as f:
-                state = pickle.load(f)
+            with open(file_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
                 
-            self.hash_cache = state.get("hash_cache", {})
-            self.similarity_cache = state.get("similarity_cache", {})
             self.stats = state.get("stats", self.stats)
             
             logger.info(f"Deduplication state loaded from {file_path}")
@@ -592,8 +914,7 @@ class DeduplicationManager:
             
     def clear_cache(self):
         """Clear all cached data."""
-        self.hash_cache.clear()
-        self.similarity_cache.clear()
+        self._feature_cache.clear()
         logger.info("Deduplication cache cleared")
         
     def get_optimal_threshold(self, sample_memories: List[Memory], target_precision: float = 0.95) -> float:
@@ -614,41 +935,33 @@ class DeduplicationManager:
             logger.warning("sklearn not available, cannot calculate optimal threshold")
             return self.threshold
             
-        # Test different thresholds
-        thresholds = np.arange(0.7, 1.0, 0.05)
-        results = []
-        
-        for threshold in thresholds:
-            self.threshold = threshold
-            
-            # Find duplicates with this threshold
-            duplicates = self.find_fuzzy_duplicates(sample_memories)
-            
-            # Calculate metrics
-            total_pairs = len(sample_memories) * (len(sample_memories) - 1) / 2
-            found_pairs = sum(len(v) for v in duplicates.values()) // 2
+        corpus = [memory.content for memory in sample_memories if memory.content]
+        if len(corpus) < 2:
+            return self.threshold
             
-            if total_pairs > 0:
-                precision = found_pairs / total_pairs if found_pairs > 0 else 0
-                recall = found_pairs / (found_pairs + 1)  # Simplified recall calculation
-                f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
-            else:
-                precision = recall = f1 = 0
-                
-            results.append({
-                "threshold": threshold,
-                "precision": precision,
-                "recall": recall,
-                "f1": f1,
-                "duplicates_found": found_pairs
-            })
+        # Fit IDF weights on the sample with a fresh transformer so the
+        # corpus-level model used by find_fuzzy_duplicates is left untouched
+        try:
+            term_counts = self.vectorizer[0].transform(corpus)
+            X = normalize(TfidfTransformer().fit_transform(term_counts), norm='l2', copy=False)
+        except Exception as e:
+            logger.warning(f"Error creating TF-IDF matrix: {e}")
+            return self.threshold
             
+        # Pairwise similarities are computed once; every threshold is then a
+        # binary search over the sorted upper triangle
+        similarities = np.sort(sparse.triu(X @ X.T, k=1).tocoo().data)
+        thresholds = np.arange(0.7, 1.0, 0.05)
+        found_pairs = len(similarities) - np.searchsorted(similarities, thresholds, side='left')
+        
+        total_pairs = len(sample_memories) * (len(sample_memories) - 1) / 2
+        precision = found_pairs / total_pairs
+        
         # Find threshold that meets target precision
         optimal_threshold = self.threshold
-        for result in results:
-            if result["precision"] >= target_precision:
-                optimal_threshold = result["threshold"]
-                break
-                
+        meets_target = np.flatnonzero(precision >= target_precision)
+        if meets_target.size:
+            optimal_threshold = float(thresholds[meets_target[0]])
+            
         logger.info(f"Optimal threshold: {optimal_threshold} (target precision: {target_precision})")
         return optimal_threshold
\ No newline at end of file
@@ -15,7 +15,10 @@ Command Factory for MCP commands using Factory pattern.
 Replaces the monolithic command handling in mcp/server.py.
 """
 import logging
-from typing import Dict, Type, Optional, List
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Any, Deque, Dict, Type, Optional, List
 from .commands.base_command import Command, CommandContext, CommandResult
 from .commands.memory_commands import (
     CreateMemoryCommand,
@@ -31,6 +34,20 @@ from .commands.memory_commands import (
 logger = logging.getLogger(__name__)
 
 
+class PipelineCondition(IntEnum):
+    """Pipeline step conditions, resolved once when the step is added."""
+    ALWAYS = 0
+    PREVIOUS_SUCCESS = 1
+    PREVIOUS_FAILURE = 2
+
+
+# Unknown condition names keep the previous behaviour of always running the step
+_PIPELINE_CONDITIONS = {
+    "previous_success": PipelineCondition.PREVIOUS_SUCCESS,
+    "previous_failure": PipelineCondition.PREVIOUS_FAILURE,
+}
+
+
 class CommandRegistry:
     """
     Registry for MCP commands using Registry pattern.
@@ -39,24 +56,27 @@ class CommandRegistry:
     
     def __init__(self):
         self._commands: Dict[str, Type[Command]] = {}
+        # Built lazily by get_command_info, reset whenever the registry changes
+        self._command_info_cache: Optional[Dict[str, Dict]] = None
         self._register_default_commands()
     
     def register_command(self, command_class: Type[Command]) -> None:
         """Register a command class."""
-        command_instance = command_class()
-        command_name = command_instance.command_name
+        command_name = command_class.command_name
         
         if command_name in self._commands:
-            logger.warning(f"Overwriting existing command: {command_name}")
+            logger.warning("Overwriting existing command: %s", command_name)
         
         self._commands[command_name] = command_class
-        logger.info(f"Registered command: {command_name}")
+        self._command_info_cache = None
+        logger.info("Registered command: %s", command_name)
     
     def unregister_command(self, command_name: str) -> bool:
         """Unregister a command."""
         if command_name in self._commands:
             del self._commands[command_name]
-            logger.info(f"Unregistered command: {command_name}")
+            self._command_info_cache = None
+            logger.info("Unregistered command: %s", command_name)
             return True
         return False
     
@@ -69,12 +89,19 @@ class CommandRegistry:
         return list(self._commands.keys())
     
     def get_command_info(self) -> Dict[str, Dict]:
-        """Get information about all registered commands."""
-        info = {}
-        for name, command_class in self._commands.items():
-            command_instance = command_class()
-            info[name] = command_instance.get_command_info()
-        return info
+        """
+        Get information about all registered commands.
+        Returns copies, so callers can't change the cached entries.
+        """
+        if self._command_info_cache is None:
+            self._command_info_cache = {
+                name: command_class.get_command_info()
+                for name, command_class in self._commands.items()
+            }
+        return {
+            name: {**info, "required_permissions": list(info["required_permissions"])}
+            for name, info in self._command_info_cache.items()
+        }
     
     def _register_default_commands(self) -> None:
         """Register default MCP commands."""
@@ -90,8 +117,12 @@ class CommandRegistry:
             BulkCreateMemoriesCommand,
         ]
         
-        for command_class in default_commands:
-            self.register_command(command_class)
+        # Registry is empty at this point, so no overwrite checks are needed
+        self._commands.update(
+            (command_class.command_name, command_class) for command_class in default_commands
+        )
+        self._command_info_cache = None
+        logger.info("Registered %d default commands", len(default_commands))
 
 
 class CommandFactory:
@@ -110,13 +141,14 @@ class CommandFactory:
         Uses singleton pattern for command instances.
         """
         # Return cached instance if available
-        if command_name in self._command_instances:
-            return self._command_instances[command_name]
+        command_instance = self._command_instances.get(command_name)
+        if command_instance is not None:
+            return command_instance
         
         # Get command class from registry
         command_class = self.registry.get_command_class(command_name)
         if not command_class:
-            logger.error(f"Unknown command: {command_name}")
+            logger.error("Unknown command: %s", command_name)
             return None
         
         try:
@@ -124,11 +156,11 @@ class CommandFactory:
             command_instance = command_class()
             self._command_instances[command_name] = command_instance
             
-            logger.debug(f"Created command instance: {command_name}")
+            logger.debug("Created command instance: %s", command_name)
             return command_instance
             
         except Exception as e:
-            logger.error(f"Error creating command {command_name}: {e}")
+            logger.error("Error creating command %s: %s", command_name, e)
             return None
     
     async def execute_command(
@@ -141,8 +173,8 @@ class CommandFactory:
         Execute command with error handling and logging.
         """
         try:
-            # Create command instance
-            command = self.create_command(command_name)
+            # Cached instances skip the create_command call entirely
+            command = self._command_instances.get(command_name) or self.create_command(command_name)
             if not command:
                 return CommandResult(
                     success=False,
@@ -159,19 +191,19 @@ class CommandFactory:
                 )
             
             # Execute command
-            logger.info(f"Executing command: {command_name} for user: {context.user_id}")
+            logger.debug("Executing command: %s for user: %s", command_name, context.user_id)
             result = await command.execute(context, data)
             
             # Log result
             if result.success:
-                logger.info(f"Command {command_name} executed successfully")
+                logger.debug("Command %s executed successfully", command_name)
             else:
-                logger.warning(f"Command {command_name} failed: {result.error}")
+                logger.warning("Command %s failed: %s", command_name, result.error)
             
             return result
             
         except Exception as e:
-            logger.error(f"Error executing command {command_name}: {e}")
+            logger.error("Error executing command %s: %s", command_name, e)
             return CommandResult(
                 success=False,
                 data={},
@@ -184,14 +216,15 @@ class CommandFactory:
     
     def get_command_help(self, command_name: Optional[str] = None) -> Dict:
         """Get help information for commands."""
+        command_info = self.registry.get_command_info()
         if command_name:
-            command = self.create_command(command_name)
-            if command:
-                return command.get_command_info()
+            info = command_info.get(command_name)
+            if info is not None:
+                return info
             else:
                 return {"error": f"Unknown command: {command_name}"}
         else:
-            return self.registry.get_command_info()
+            return command_info
     
     def register_custom_command(self, command_class: Type[Command]) -> bool:
         """Register a custom command class."""
@@ -199,7 +232,7 @@ class CommandFactory:
             self.registry.register_command(command_class)
             return True
         except Exception as e:
-            logger.error(f"Error registering custom command: {e}")
+            logger.error("Error registering custom command: %s", e)
             return False
     
     def clear_cache(self) -> None:
@@ -212,12 +245,30 @@ class CommandInvoker:
     """
     Command Invoker implementing Command pattern.
     Handles command queuing, batching, and async execution.
+    
+    Queued commands run one at a time in queue order, because commands share
+    the database session.
+    
+    The batch size adapts to the observed per-command latency: it grows while
+    commands finish under target_latency_seconds and a backlog is waiting, and
+    halves when they take more than twice the target. Pass None to keep the
+    batch size fixed.
     """
     
-    def __init__(self, factory: CommandFactory):
+    MAX_BATCH_SIZE = 256
+    LATENCY_EMA_ALPHA = 0.3
+    
+    def __init__(
+        self,
+        factory: CommandFactory,
+        target_latency_seconds: Optional[float] = 0.05
+    ):
         self.factory = factory
-        self._command_queue: List[tuple] = []
+        self._command_queue: Deque[tuple] = deque()
         self._batch_size = 10
+        self._target_latency = target_latency_seconds
+        # Exponential moving average of batch wall time per command
+        self._latency_ema: Optional[float] = None
     
     async def invoke_command(
         self,
@@ -246,43 +297,69 @@ class CommandInvoker:
             return []
         
         results = []
-        batch = self._command_queue[:self._batch_size]
-        self._command_queue = self._command_queue[self._batch_size:]
+        queue = self._command_queue
+        batch = [queue.popleft() for _ in range(min(self._batch_size, len(queue)))]
         
-        logger.info(f"Processing batch of {len(batch)} commands")
+        logger.info("Processing batch of %s commands", len(batch))
+        started = time.perf_counter()
         
         for command_name, context, data in batch:
             try:
                 result = await self.factory.execute_command(command_name, context, data)
                 results.append(result)
             except Exception as e:
-                logger.error(f"Error in batch processing command {command_name}: {e}")
+                logger.error("Error in batch processing command %s: %s", command_name, e)
                 results.append(CommandResult(
                     success=False,
                     data={},
                     error=f"Batch processing error: {str(e)}"
                 ))
         
+        self._adapt_batch_size(time.perf_counter() - started, len(batch))
         return results
     
-    def get_queue_status(self) -> Dict[str, int]:
+    def _adapt_batch_size(self, wall_time: float, batch_len: int) -> None:
+        """Grow or shrink the batch size from the smoothed per-command latency."""
+        if self._target_latency is None:
+            return
+        
+        per_command = wall_time / batch_len
+        if self._latency_ema is None:
+            self._latency_ema = per_command
+        else:
+            alpha = self.LATENCY_EMA_ALPHA
+            self._latency_ema = alpha * per_command + (1 - alpha) * self._latency_ema
+        
+        if self._latency_ema > self._target_latency * 2:
+            new_size = max(1, self._batch_size // 2)
+        elif self._latency_ema < self._target_latency and len(self._command_queue) > self._batch_size:
+            new_size = min(self.MAX_BATCH_SIZE, max(self._batch_size + 1, int(self._batch_size * 1.25)))
+        else:
+            return
+        
+        if new_size != self._batch_size:
+            logger.debug("Adapting batch size from %s to %s", self._batch_size, new_size)
+            self._batch_size = new_size
+    
+    def get_queue_status(self) -> Dict[str, Any]:
         """Get command queue status."""
         return {
             "queue_length": len(self._command_queue),
-            "batch_size": self._batch_size
+            "batch_size": self._batch_size,
+            "latency_ema_ms": round(self._latency_ema * 1000, 3) if self._latency_ema is not None else None
         }
     
     def set_batch_size(self, size: int) -> None:
         """Set batch processing size."""
         if size > 0:
             self._batch_size = size
-            logger.info(f"Batch size set to: {size}")
+            logger.info("Batch size set to: %s", size)
     
     def clear_queue(self) -> int:
         """Clear command queue and return number of cleared commands."""
         cleared_count = len(self._command_queue)
         self._command_queue.clear()
-        logger.info(f"Cleared {cleared_count} commands from queue")
+        logger.info("Cleared %s commands from queue", cleared_count)
         return cleared_count
 
 
@@ -300,13 +377,16 @@ class CommandPipeline:
         self,
         command_name: str,
         data: Dict,
-        condition: Optional[str] = None
+        condition: Optional[str] = None,
+        stop_on_error: bool = True
     ) -> 'CommandPipeline':
         """Add a step to the pipeline."""
         self._pipeline_steps.append({
             "command_name": command_name,
             "data": data,
-            "condition": condition
+            "condition": condition,
+            "condition_code": _PIPELINE_CONDITIONS.get(condition, PipelineCondition.ALWAYS),
+            "stop_on_error": stop_on_error
         })
         return self
     
@@ -314,34 +394,36 @@ class CommandPipeline:
         """Execute all pipeline steps in sequence."""
         results = []
         pipeline_context = {"previous_results": []}
+        previous_results = pipeline_context["previous_results"]
+        invoke_command = self.invoker.invoke_command
         
         for i, step in enumerate(self._pipeline_steps):
             try:
                 # Check condition if specified
-                if step["condition"] and not self._evaluate_condition(
-                    step["condition"], 
+                if step["condition_code"] and not self._evaluate_condition(
+                    step["condition_code"],
                     pipeline_context
                 ):
-                    logger.info(f"Skipping step {i}: condition not met")
+                    logger.info("Skipping step %s: condition not met", i)
                     continue
                 
                 # Execute command
-                result = await self.invoker.invoke_command(
+                result = await invoke_command(
                     step["command_name"],
                     context,
                     step["data"]
                 )
                 
                 results.append(result)
-                pipeline_context["previous_results"].append(result)
+                previous_results.append(result)
                 
                 # Stop pipeline if command failed and no error handling
-                if not result.success and step.get("stop_on_error", True):
-                    logger.warning(f"Pipeline stopped at step {i}: {result.error}")
+                if not result.success and step["stop_on_error"]:
+                    logger.warning("Pipeline stopped at step %s: %s", i, result.error)
                     break
                 
             except Exception as e:
-                logger.error(f"Error in pipeline step {i}: {e}")
+                logger.error("Error in pipeline step %s: %s", i, e)
                 error_result = CommandResult(
                     success=False,
                     data={},
@@ -352,20 +434,13 @@ class CommandPipeline:
         
         return results
     
-    def _evaluate_condition(self, condition: str, context: Dict) -> bool:
+    def _evaluate_condition(self, condition: PipelineCondition, context: Dict) -> bool:
         """Evaluate pipeline condition (simplified)."""
-        # Simple condition evaluation
-        # In a real implementation, you'd have a proper expression evaluator
-        if condition == "previous_success":
-            return (
-                context["previous_results"] and 
-                context["previous_results"][-1].success
-            )
-        elif condition == "previous_failure":
-            return (
-                context["previous_results"] and 
-                not context["previous_results"][-1].success
-            )
+        previous_results = context["previous_results"]
+        if condition == PipelineCondition.PREVIOUS_SUCCESS:
+            return bool(previous_results) and previous_results[-1].success
+        elif condition == PipelineCondition.PREVIOUS_FAILURE:
+            return bool(previous_results) and not previous_results[-1].success
         else:
             return True
     
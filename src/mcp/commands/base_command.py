@@ -14,15 +14,21 @@ Original Author: VoiceLessQ
 Base Command interface and abstract classes.
 Implements Command pattern for MCP message handling.
 """
+import asyncio
+import copy
+import inspect
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from collections import OrderedDict
+from typing import Dict, Any, ClassVar, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
+import time
+import xxhash
 
 from ...database.refactored_memory_db import RefactoredMemoryDB
 
 
-@dataclass
+@dataclass(slots=True)
 class CommandContext:
     """
     Context object passed to all commands.
@@ -41,7 +47,7 @@ class CommandContext:
             self.metadata = {}
 
 
-@dataclass
+@dataclass(slots=True)
 class CommandResult:
     """
     Standardized command result structure.
@@ -51,12 +57,19 @@ class CommandResult:
     error: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
     
+    @classmethod
+    def ok(cls, data: Dict[str, Any]) -> "CommandResult":
+        """Build a successful result."""
+        return cls(success=True, data=data)
+    
+    @classmethod
+    def fail(cls, error: str) -> "CommandResult":
+        """Build a failed result with empty data."""
+        return cls(success=False, data={}, error=error)
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
-        result = {
-            "success": self.success,
-            "data": self.data
-        }
+        result = {"success": self.success, "data": self.data}
         if self.error:
             result["error"] = self.error
         if self.metadata:
@@ -68,19 +81,33 @@ class Command(ABC):
     """
     Base Command interface following Command pattern.
     Each command encapsulates a specific MCP operation.
+    
+    Concrete commands declare command_name and required_permissions as class
+    attributes so they can be read without instantiating the command.
+    Intermediate base classes pass abstract=True in their class statement.
+    Commands are long-lived singletons, so they declare __slots__ and carry
+    no per-instance __dict__.
     """
     
-    @property
-    @abstractmethod
-    def command_name(self) -> str:
-        """Return the command name/identifier."""
-        pass
+    __slots__ = ()
     
-    @property
-    @abstractmethod
-    def required_permissions(self) -> list[str]:
-        """Return required permissions for this command."""
-        pass
+    # Command name/identifier, e.g. "memory.create"
+    command_name: ClassVar[str] = ""
+    
+    # Permissions required to run this command
+    required_permissions: ClassVar[Tuple[str, ...]] = ()
+    
+    def __init_subclass__(cls, abstract: bool = False, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # The registry reads these from the class, where a property object is
+        # returned instead of its value
+        for name in ("command_name", "required_permissions"):
+            if isinstance(inspect.getattr_static(cls, name), property):
+                raise TypeError(
+                    f"{cls.__name__}.{name} must be a class attribute, not a property"
+                )
+        if not abstract and not cls.command_name:
+            raise TypeError(f"{cls.__name__} must define command_name")
     
     @abstractmethod
     async def execute(self, context: CommandContext, data: Dict[str, Any]) -> CommandResult:
@@ -124,22 +151,25 @@ class Command(ABC):
         # For now, allow all commands
         return True
     
-    def get_command_info(self) -> Dict[str, Any]:
+    @classmethod
+    def get_command_info(cls) -> Dict[str, Any]:
         """Get command metadata for introspection."""
         return {
-            "name": self.command_name,
-            "required_permissions": self.required_permissions,
-            "description": self.__doc__ or "",
-            "class": self.__class__.__name__
+            "name": cls.command_name,
+            "required_permissions": list(cls.required_permissions),
+            "description": cls.__doc__ or "",
+            "class": cls.__name__
         }
 
 
-class AsyncCommand(Command):
+class AsyncCommand(Command, abstract=True):
     """
     Base class for asynchronous commands.
     Provides common async functionality.
     """
     
+    __slots__ = ()
+    
     async def execute_with_timeout(
         self, 
         context: CommandContext, 
@@ -147,13 +177,9 @@ class AsyncCommand(Command):
         timeout_seconds: int = 30
     ) -> CommandResult:
         """Execute command with timeout."""
-        import asyncio
-        
         try:
-            return await asyncio.wait_for(
-                self.execute(context, data),
-                timeout=timeout_seconds
-            )
+            # asyncio.timeout() would avoid the wrapping task, but needs Python 3.11
+            return await asyncio.wait_for(self.execute(context, data), timeout=timeout_seconds)
         except asyncio.TimeoutError:
             return CommandResult(
                 success=False,
@@ -162,11 +188,13 @@ class AsyncCommand(Command):
             )
 
 
-class BatchCommand(Command):
+class BatchCommand(Command, abstract=True):
     """
     Base class for commands that support batch operations.
     """
     
+    __slots__ = ()
+    
     @abstractmethod
     async def execute_batch(
         self, 
@@ -177,7 +205,15 @@ class BatchCommand(Command):
         pass
     
     async def execute(self, context: CommandContext, data: Dict[str, Any]) -> CommandResult:
-        """Single execution delegates to batch with one item."""
+        """Single execution goes through execute_single."""
+        return await self.execute_single(context, data)
+    
+    async def execute_single(self, context: CommandContext, data: Dict[str, Any]) -> CommandResult:
+        """
+        Execute command for one data item.
+        Delegates to execute_batch with one item; subclasses with per-item
+        logic override this to skip the list round trip.
+        """
         results = await self.execute_batch(context, [data])
         return results[0] if results else CommandResult(
             success=False,
@@ -186,51 +222,92 @@ class BatchCommand(Command):
         )
 
 
-class CacheableCommand(Command):
+def _canonical(value: Any) -> Any:
+    """Order-independent, hashable form of a JSON-like value (dicts sorted by key)."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _canonical(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_canonical(item) for item in value)
+    return value
+
+
+class CacheableCommand(Command, abstract=True):
     """
     Base class for commands that support result caching.
+    Results are kept in a bounded LRU; expired entries are dropped when looked up.
+    Concurrent misses for the same key run execute_uncached once, and callers
+    always get their own copy of a cached result.
     """
     
-    def __init__(self, cache_ttl_seconds: int = 300):
+    __slots__ = ("cache_ttl_seconds", "cache_max_entries", "_cache", "_key_locks")
+    
+    def __init__(self, cache_ttl_seconds: int = 300, cache_max_entries: int = 1024):
         self.cache_ttl_seconds = cache_ttl_seconds
-        self._cache: Dict[str, tuple[datetime, CommandResult]] = {}
+        self.cache_max_entries = cache_max_entries
+        # Entries are (time.monotonic() when cached, result)
+        self._cache: "OrderedDict[int, tuple[float, CommandResult]]" = OrderedDict()
+        # Per-key [lock, number of callers using it]; dropped when the last caller leaves
+        self._key_locks: Dict[int, list] = {}
     
-    def get_cache_key(self, context: CommandContext, data: Dict[str, Any]) -> str:
-        """Generate cache key for the request."""
-        import hashlib
-        import json
-        
-        cache_data = {
-            "command": self.command_name,
-            "user_id": context.user_id,
-            "data": data
-        }
-        
-        cache_str = json.dumps(cache_data, sort_keys=True)
-        return hashlib.md5(cache_str.encode()).hexdigest()
+    def get_cache_key(self, context: CommandContext, data: Dict[str, Any]) -> int:
+        """Generate cache key for the request (64-bit xxh3 of the canonical request)."""
+        cache_data = (self.command_name, context.user_id, _canonical(data))
+        return xxhash.xxh3_64_intdigest(repr(cache_data).encode())
     
     async def execute(self, context: CommandContext, data: Dict[str, Any]) -> CommandResult:
         """Execute with caching support."""
         cache_key = self.get_cache_key(context, data)
         
         # Check cache
-        if cache_key in self._cache:
-            cached_time, cached_result = self._cache[cache_key]
-            age_seconds = (datetime.utcnow() - cached_time).total_seconds()
-            
-            if age_seconds < self.cache_ttl_seconds:
-                # Return cached result with metadata
-                cached_result.metadata = cached_result.metadata or {}
-                cached_result.metadata["cached"] = True
-                cached_result.metadata["cache_age_seconds"] = age_seconds
-                return cached_result
+        cached_result = self._get_cached(cache_key)
+        if cached_result is not None:
+            return cached_result
         
-        # Execute and cache result
-        result = await self.execute_uncached(context, data)
+        # Only one caller per key computes; the others wait and read its result
+        entry = self._key_locks.get(cache_key)
+        if entry is None:
+            entry = self._key_locks[cache_key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                cached_result = self._get_cached(cache_key)
+                if cached_result is not None:
+                    return cached_result
+                
+                # Execute and cache result
+                result = await self.execute_uncached(context, data)
+                
+                if result.success:
+                    # Store a private copy so the caller can't change the cached one
+                    self._cache[cache_key] = (time.monotonic(), copy.deepcopy(result))
+                    if len(self._cache) > self.cache_max_entries:
+                        self._cache.popitem(last=False)
+                
+                return result
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._key_locks[cache_key]
+    
+    def _get_cached(self, cache_key: int) -> Optional[CommandResult]:
+        """Return a copy of a fresh cached result, dropping it if it has expired."""
+        cached = self._cache.get(cache_key)
+        if cached is None:
+            return None
         
-        if result.success:
-            self._cache[cache_key] = (datetime.utcnow(), result)
+        cached_time, cached_result = cached
+        age_seconds = time.monotonic() - cached_time
+        if age_seconds >= self.cache_ttl_seconds:
+            del self._cache[cache_key]
+            return None
         
+        self._cache.move_to_end(cache_key)
+        
+        # Return a copy of the cached result with cache metadata
+        result = copy.deepcopy(cached_result)
+        result.metadata = result.metadata or {}
+        result.metadata["cached"] = True
+        result.metadata["cache_age_seconds"] = age_seconds
         return result
     
     @abstractmethod
@@ -261,6 +338,10 @@ class CommandExecutionError(Exception):
         self.message = message
 
 
+# Sentinel for absent fields, so each field costs a single dict lookup
+_MISSING = object()
+
+
 def validate_required_fields(data: Dict[str, Any], required_fields: list[str]) -> None:
     """
     Utility function to validate required fields in command data.
@@ -273,10 +354,11 @@ def validate_required_fields(data: Dict[str, Any], required_fields: list[str]) -
         ValidationError: If any required field is missing
     """
     for field in required_fields:
-        if field not in data:
+        value = data.get(field, _MISSING)
+        if value is _MISSING:
             raise ValidationError(f"Required field '{field}' is missing", field)
         
-        if data[field] is None or (isinstance(data[field], str) and not data[field].strip()):
+        if value is None or (isinstance(value, str) and not value.strip()):
             raise ValidationError(f"Field '{field}' cannot be empty", field)
 
 
@@ -292,8 +374,9 @@ def validate_field_type(data: Dict[str, Any], field: str, expected_type: type) -
     Raises:
         ValidationError: If field type is incorrect
     """
-    if field in data and not isinstance(data[field], expected_type):
+    value = data.get(field, _MISSING)
+    if value is not _MISSING and not isinstance(value, expected_type):
         raise ValidationError(
-            f"Field '{field}' must be of type {expected_type.__name__}, got {type(data[field]).__name__}",
+            f"Field '{field}' must be of type {expected_type.__name__}, got {type(value).__name__}",
             field
         )
\ No newline at end of file
@@ -15,26 +15,26 @@ Memory-related MCP commands using Command pattern.
 Extracts command logic from the monolithic mcp/server.py.
 """
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any
 import json
 
-from .base_command import Command, CommandContext, CommandResult, ValidationError, validate_required_fields, validate_field_type
+from .base_command import Command, CacheableCommand, CommandContext, CommandResult, ValidationError, validate_required_fields, validate_field_type
 from ...schemas.memory import MemoryCreate, MemoryUpdate
 from ...utils.error_handling import handle_errors
 
 logger = logging.getLogger(__name__)
 
+# Fields every item of a bulk create must carry
+_BULK_REQUIRED_FIELDS = frozenset(("title", "content"))
+
 
 class CreateMemoryCommand(Command):
     """Command to create a new memory."""
     
-    @property
-    def command_name(self) -> str:
-        return "memory.create"
+    __slots__ = ()
     
-    @property
-    def required_permissions(self) -> List[str]:
-        return ["memory:create"]
+    command_name = "memory.create"
+    required_permissions = ("memory:create",)
     
     def validate_input(self, data: Dict[str, Any]) -> bool:
         """Validate create memory input."""
@@ -75,27 +75,24 @@ class CreateMemoryCommand(Command):
                 "message": "Memory created successfully"
             }
             
-            logger.info(f"Memory created via command: {memory.id}")
-            return CommandResult(success=True, data=result_data)
+            logger.info("Memory created via command: %s", memory.id)
+            return CommandResult.ok(result_data)
             
         except ValidationError as e:
-            return CommandResult(success=False, data={}, error=str(e))
+            return CommandResult.fail(str(e))
         except Exception as e:
-            logger.error(f"Error in CreateMemoryCommand: {e}")
+            logger.error("Error in CreateMemoryCommand: %s", e)
             handle_errors(e, "Failed to create memory")
-            return CommandResult(success=False, data={}, error=str(e))
+            return CommandResult.fail(str(e))
 
 
 class GetMemoryCommand(Command):
     """Command to retrieve a memory by ID."""
     
-    @property
-    def command_name(self) -> str:
-        return "memory.get"
+    __slots__ = ()
     
-    @property
-    def required_permissions(self) -> List[str]:
-        return ["memory:read"]
+    command_name = "memory.get"
+    required_permissions = ("memory:read",)
     
     def validate_input(self, data: Dict[str, Any]) -> bool:
         """Validate get memory input."""
@@ -119,7 +116,7 @@ class GetMemoryCommand(Command):
             )
             
             if not memory:
-                return CommandResult(success=False, data={}, error="Memory not found")
+                return CommandResult.fail("Memory not found")
             
             result_data = {
                 "id": memory.id,
@@ -130,25 +127,22 @@ class GetMemoryCommand(Command):
                 "created_at": memory.created_at.isoformat() if memory.created_at else None
             }
             
-            return CommandResult(success=True, data=result_data)
+            return CommandResult.ok(result_data)
             
         except ValidationError as e:
-            return CommandResult(success=False, data={}, error=str(e))
+            return CommandResult.fail(str(e))
         except Exception as e:
-            logger.error(f"Error in GetMemoryCommand: {e}")
-            return CommandResult(success=False, data={}, error=str(e))
+            logger.error("Error in GetMemoryCommand: %s", e)
+            return CommandResult.fail(str(e))
 
 
 class UpdateMemoryCommand(Command):
     """Command to update a memory."""
     
-    @property
-    def command_name(self) -> str:
-        return "memory.update"
+    __slots__ = ()
     
-    @property
-    def required_permissions(self) -> List[str]:
-        return ["memory:update"]
+    command_name = "memory.update"
+    required_permissions = ("memory:update",)
     
     def validate_input(self, data: Dict[str, Any]) -> bool:
         """Validate update memory input."""
@@ -185,7 +179,7 @@ class UpdateMemoryCommand(Command):
             )
             
             if not memory:
-                return CommandResult(success=False, data={}, error="Memory not found")
+                return CommandResult.fail("Memory not found")
             
             result_data = {
                 "memory_id": memory.id,
@@ -193,25 +187,22 @@ class UpdateMemoryCommand(Command):
                 "message": "Memory updated successfully"
             }
             
-            return CommandResult(success=True, data=result_data)
+            return CommandResult.ok(result_data)
             
         except ValidationError as e:
-            return CommandResult(success=False, data={}, error=str(e))
+            return CommandResult.fail(str(e))
         except Exception as e:
-            logger.error(f"Error in UpdateMemoryCommand: {e}")
-            return CommandResult(success=False, data={}, error=str(e))
+            logger.error("Error in UpdateMemoryCommand: %s", e)
+            return CommandResult.fail(str(e))
 
 
 class DeleteMemoryCommand(Command):
     """Command to delete a memory."""
     
-    @property
-    def command_name(self) -> str:
-        return "memory.delete"
+    __slots__ = ()
     
-    @property
-    def required_permissions(self) -> List[str]:
-        return ["memory:delete"]
+    command_name = "memory.delete"
+    required_permissions = ("memory:delete",)
     
     def validate_input(self, data: Dict[str, Any]) -> bool:
         """Validate delete memory input."""
@@ -231,34 +222,32 @@ class DeleteMemoryCommand(Command):
             success = await context.db.delete_memory(data["memory_id"])
             
             if not success:
-                return CommandResult(success=False, data={}, error="Memory not found or deletion failed")
+                return CommandResult.fail("Memory not found or deletion failed")
             
             result_data = {"message": "Memory deleted successfully"}
-            return CommandResult(success=True, data=result_data)
+            return CommandResult.ok(result_data)
             
         except ValidationError as e:
-            return CommandResult(success=False, data={}, error=str(e))
+            return CommandResult.fail(str(e))
         except Exception as e:
-            logger.error(f"Error in DeleteMemoryCommand: {e}")
-            return CommandResult(success=False, data={}, error=str(e))
+            logger.error("Error in DeleteMemoryCommand: %s", e)
+            return CommandResult.fail(str(e))
 
 
 class SearchMemoriesCommand(Command):
     """Command to search memories."""
     
-    @property
-    def command_name(self) -> str:
-        return "memory.search"
+    __slots__ = ()
     
-    @property
-    def required_permissions(self) -> List[str]:
-        return ["memory:read"]
+    command_name = "memory.search"
+    required_permissions = ("memory:read",)
     
     def validate_input(self, data: Dict[str, Any]) -> bool:
         """Validate search memories input."""
         validate_field_type(data, "query", str)
         validate_field_type(data, "limit", int)
         validate_field_type(data, "filters", dict)
+        validate_field_type(data, "include_content", bool)
         
         query = data.get("query", "")
         if len(query) > 1000:
@@ -278,13 +267,16 @@ class SearchMemoriesCommand(Command):
             query = data.get("query", "")
             filters = data.get("filters", {})
             limit = data.get("limit", 100)
+            # Content is the bulk of each row; callers can pass False to skip loading it
+            include_content = data.get("include_content", True)
             
             memories = await context.db.search_memories(
                 query=query,
                 owner_id=filters.get("owner_id"),
                 context_id=filters.get("context_id"),
                 access_level=filters.get("access_level"),
-                limit=limit
+                limit=limit,
+                include_content=include_content
             )
             
             result_data = {
@@ -292,7 +284,7 @@ class SearchMemoriesCommand(Command):
                     {
                         "id": m.id,
                         "title": m.title,
-                        "content": m.content,
+                        "content": m.content if include_content else None,
                         "context_id": m.context_id,
                         "access_level": m.access_level,
                         "created_at": m.created_at.isoformat() if m.created_at else None
@@ -302,32 +294,33 @@ class SearchMemoriesCommand(Command):
                 "total_found": len(memories)
             }
             
-            return CommandResult(success=True, data=result_data)
+            return CommandResult.ok(result_data)
             
         except ValidationError as e:
-            return CommandResult(success=False, data={}, error=str(e))
+            return CommandResult.fail(str(e))
         except Exception as e:
-            logger.error(f"Error in SearchMemoriesCommand: {e}")
-            return CommandResult(success=False, data={}, error=str(e))
+            logger.error("Error in SearchMemoriesCommand: %s", e)
+            return CommandResult.fail(str(e))
 
 
-class GetMemoryStatisticsCommand(Command):
+class GetMemoryStatisticsCommand(CacheableCommand):
     """Command to get memory statistics."""
     
-    @property
-    def command_name(self) -> str:
-        return "memory.statistics"
+    __slots__ = ()
+    
+    command_name = "memory.statistics"
+    required_permissions = ("memory:read", "system:stats")
     
-    @property
-    def required_permissions(self) -> List[str]:
-        return ["memory:read", "system:stats"]
+    def __init__(self, cache_ttl_seconds: int = 30):
+        # Statistics are polled often and change slowly; serve repeats from cache
+        super().__init__(cache_ttl_seconds=cache_ttl_seconds)
     
     def validate_input(self, data: Dict[str, Any]) -> bool:
         """Validate statistics input."""
         validate_field_type(data, "include_content_analysis", bool)
         return True
     
-    async def execute(self, context: CommandContext, data: Dict[str, Any]) -> CommandResult:
+    async def execute_uncached(self, context: CommandContext, data: Dict[str, Any]) -> CommandResult:
         """Execute get statistics command."""
         try:
             self.validate_input(data)
@@ -335,25 +328,22 @@ class GetMemoryStatisticsCommand(Command):
             include_analysis = data.get("include_content_analysis", True)
             stats = await context.db.get_statistics()
             
-            return CommandResult(success=True, data=stats)
+            return CommandResult.ok(stats)
             
         except ValidationError as e:
-            return CommandResult(success=False, data={}, error=str(e))
+            return CommandResult.fail(str(e))
         except Exception as e:
-            logger.error(f"Error in GetMemoryStatisticsCommand: {e}")
-            return CommandResult(success=False, data={}, error=str(e))
+            logger.error("Error in GetMemoryStatisticsCommand: %s", e)
+            return CommandResult.fail(str(e))
 
 
 class CreateLargeMemoryCommand(Command):
     """Command to create large memory without chunking."""
     
-    @property
-    def command_name(self) -> str:
-        return "memory.create_large"
+    __slots__ = ()
     
-    @property
-    def required_permissions(self) -> List[str]:
-        return ["memory:create", "memory:large_content"]
+    command_name = "memory.create_large"
+    required_permissions = ("memory:create", "memory:large_content")
     
     def validate_input(self, data: Dict[str, Any]) -> bool:
         """Validate large memory input."""
@@ -396,25 +386,22 @@ class CreateLargeMemoryCommand(Command):
                 "message": "Large memory created successfully without chunking"
             }
             
-            return CommandResult(success=True, data=result_data)
+            return CommandResult.ok(result_data)
             
         except ValidationError as e:
-            return CommandResult(success=False, data={}, error=str(e))
+            return CommandResult.fail(str(e))
         except Exception as e:
-            logger.error(f"Error in CreateLargeMemoryCommand: {e}")
-            return CommandResult(success=False, data={}, error=str(e))
+            logger.error("Error in CreateLargeMemoryCommand: %s", e)
+            return CommandResult.fail(str(e))
 
 
 class BulkCreateMemoriesCommand(Command):
     """Command to create multiple memories in batch."""
     
-    @property
-    def command_name(self) -> str:
-        return "memory.bulk_create"
+    __slots__ = ()
     
-    @property
-    def required_permissions(self) -> List[str]:
-        return ["memory:create", "memory:bulk"]
+    command_name = "memory.bulk_create"
+    required_permissions = ("memory:create", "memory:bulk")
     
     def validate_input(self, data: Dict[str, Any]) -> bool:
         """Validate bulk create input."""
@@ -428,13 +415,16 @@ class BulkCreateMemoriesCommand(Command):
         if len(memories) > 100:
             raise ValidationError("Too many memories (max 100 per batch)", "memories")
         
-        # Validate each memory
-        for i, memory_data in enumerate(memories):
-            if not isinstance(memory_data, dict):
-                raise ValidationError(f"Memory {i} must be an object", f"memories[{i}]")
-            
-            if "title" not in memory_data or "content" not in memory_data:
-                raise ValidationError(f"Memory {i} missing required fields", f"memories[{i}]")
+        # Validate each memory; only the first bad item is reported
+        bad = next(
+            (i for i, memory_data in enumerate(memories)
+             if not isinstance(memory_data, dict) or not _BULK_REQUIRED_FIELDS <= memory_data.keys()),
+            -1
+        )
+        if bad != -1:
+            if not isinstance(memories[bad], dict):
+                raise ValidationError(f"Memory {bad} must be an object", f"memories[{bad}]")
+            raise ValidationError(f"Memory {bad} missing required fields", f"memories[{bad}]")
         
         return True
     
@@ -443,34 +433,50 @@ class BulkCreateMemoriesCommand(Command):
         try:
             self.validate_input(data)
             
-            memories_data = data["memories"]
+            owner_id = context.user_id or "system"
+            rows = [
+                {
+                    "title": memory_data["title"],
+                    "content": memory_data["content"],
+                    "owner_id": owner_id,
+                    "context_id": memory_data.get("context_id"),
+                    "access_level": memory_data.get("access_level", "public"),
+                    "memory_metadata": memory_data.get("metadata", {}),
+                    "compress_content": True,
+                    "use_chunked_storage": False
+                }
+                for memory_data in data["memories"]
+            ]
+            
+            # One transaction for the whole batch; if it is rejected nothing is
+            # kept, so retry per memory to report which ones fail
+            try:
+                outcomes = await context.db.bulk_create_memories(rows, atomic=True)
+            except Exception as e:
+                logger.warning("Bulk insert failed, creating memories individually: %s", e)
+                # One at a time: the creates share the database session
+                outcomes = []
+                for row in rows:
+                    try:
+                        outcomes.append(await context.db.create_memory(**row))
+                    except Exception as create_error:
+                        outcomes.append(create_error)
+            
             created_memories = []
             failed_memories = []
             
-            for i, memory_data in enumerate(memories_data):
-                try:
-                    memory = await context.db.create_memory(
-                        title=memory_data["title"],
-                        content=memory_data["content"],
-                        owner_id=context.user_id or "system",
-                        context_id=memory_data.get("context_id"),
-                        access_level=memory_data.get("access_level", "public"),
-                        memory_metadata=memory_data.get("metadata", {}),
-                        compress_content=True,
-                        use_chunked_storage=False
-                    )
-                    
-                    created_memories.append({
-                        "id": memory.id,
-                        "title": memory.title,
-                        "index": i
-                    })
-                    
-                except Exception as e:
-                    logger.error(f"Failed to create memory {i}: {e}")
+            for i, outcome in enumerate(outcomes):
+                if isinstance(outcome, Exception):
+                    logger.error("Failed to create memory %d: %s", i, outcome)
                     failed_memories.append({
                         "index": i,
-                        "error": str(e)
+                        "error": str(outcome)
+                    })
+                else:
+                    created_memories.append({
+                        "id": outcome.id,
+                        "title": outcome.title,
+                        "index": i
                     })
             
             result_data = {
@@ -480,10 +486,10 @@ class BulkCreateMemoriesCommand(Command):
                 "failed_memories": failed_memories
             }
             
-            return CommandResult(success=True, data=result_data)
+            return CommandResult.ok(result_data)
             
         except ValidationError as e:
-            return CommandResult(success=False, data={}, error=str(e))
+            return CommandResult.fail(str(e))
         except Exception as e:
-            logger.error(f"Error in BulkCreateMemoriesCommand: {e}")
-            return CommandResult(success=False, data={}, error=str(e))
\ No newline at end of file
+            logger.error("Error in BulkCreateMemoriesCommand: %s", e)
+            return CommandResult.fail(str(e))
\ No newline at end of file
@@ -15,7 +15,8 @@ Advanced Handler implementing Chain of Responsibility pattern.
 Handles advanced MCP tool operations like semantic search and knowledge graph analysis.
 Enhanced with vector search and caching for 10-100x performance improvement.
 """
-from typing import Dict, Any, List
+import asyncio
+from typing import Dict, Any, List, Tuple
 from .base_handler import BaseToolHandler, ToolRequest, ToolResponse, DatabaseMixin, ValidationMixin
 from ...services import get_knowledge_retrieval_service
 import logging
@@ -29,15 +30,20 @@ class AdvancedHandler(BaseToolHandler, DatabaseMixin, ValidationMixin):
     Implements Chain of Responsibility pattern for advanced operations.
     """
     
+    # Ingested sections are indexed in chunks of this many items
+    INDEX_CHUNK_SIZE = 128
+    
     def __init__(self):
         super().__init__()
-        self.supported_tools = [
-            "search_semantic",
-            "analyze_knowledge_graph",
-            "ingest_knowledge",
-            "index_knowledge_batch",
-            "find_similar_knowledge"
-        ]
+        # Tool name -> bound handler; supported_tools is derived so they cannot drift
+        self._dispatch = {
+            "search_semantic": self._handle_search_semantic,
+            "analyze_knowledge_graph": self._handle_analyze_knowledge_graph,
+            "ingest_knowledge": self._handle_ingest_knowledge,
+            "index_knowledge_batch": self._handle_index_knowledge_batch,
+            "find_similar_knowledge": self._handle_find_similar_knowledge
+        }
+        self.supported_tools = list(self._dispatch)
         self.knowledge_service = None
     
     async def process_request(self, request: ToolRequest) -> ToolResponse:
@@ -55,18 +61,10 @@ class AdvancedHandler(BaseToolHandler, DatabaseMixin, ValidationMixin):
         args = request.arguments
 
         try:
-            if tool_name == "search_semantic":
-                return await self._handle_search_semantic(args)
-            elif tool_name == "analyze_knowledge_graph":
-                return await self._handle_analyze_knowledge_graph(args)
-            elif tool_name == "ingest_knowledge":
-                return await self._handle_ingest_knowledge(args)
-            elif tool_name == "index_knowledge_batch":
-                return await self._handle_index_knowledge_batch(args)
-            elif tool_name == "find_similar_knowledge":
-                return await self._handle_find_similar_knowledge(args)
-            else:
+            handler = self._dispatch.get(tool_name)
+            if handler is None:
                 return ToolResponse.error_response(f"Unsupported advanced tool: {tool_name}")
+            return await handler(args)
 
         except Exception as e:
             return ToolResponse.error_response(
@@ -144,7 +142,7 @@ class AdvancedHandler(BaseToolHandler, DatabaseMixin, ValidationMixin):
                 "context_id": m.context_id,
                 "access_level": m.access_level,
                 "created_at": m.created_at.isoformat(),
-                "similarity_score": getattr(m, 'score', 0.0)
+                "similarity_score": m.score
             } for m in results],
             "total_found": len(results),
             "using_vector_search": False
@@ -212,6 +210,7 @@ class AdvancedHandler(BaseToolHandler, DatabaseMixin, ValidationMixin):
 
         # Index to vector store for high-performance retrieval
         indexed_count = 0
+        index_errors: List[str] = []
         if index_to_vector_store and self.knowledge_service:
             try:
                 # Get the created memories and index them
@@ -241,25 +240,49 @@ class AdvancedHandler(BaseToolHandler, DatabaseMixin, ValidationMixin):
 
                     # Batch index to vector store
                     if items_to_index:
-                        indexed_ids = self.knowledge_service.index_knowledge_batch(items_to_index)
-                        indexed_count = len(indexed_ids)
+                        indexed_count, index_errors = await self._index_items_in_chunks(items_to_index)
 
                 logger.info(f"Indexed {indexed_count} items to vector store")
 
             except Exception as e:
                 logger.warning(f"Failed to index to vector store: {e}")
+                index_errors.append(f"Vector store indexing failed: {e}")
 
         return ToolResponse.success_response({
             "file_path": ingestion_result.get("book_path"),
             "total_sections": ingestion_result.get("total_chapters", 0),
             "created_memories": ingestion_result.get("created_memories", 0),
             "indexed_to_vector_store": indexed_count,
+            "index_errors": index_errors,
             "errors": ingestion_result.get("errors", []),
             "ingestion_complete": ingestion_result.get("ingestion_complete", False),
             "ingested_at": ingestion_result.get("ingested_at"),
             "message": "Knowledge ingested successfully and indexed for fast retrieval"
         })
 
+    async def _index_items_in_chunks(self, items: List[Dict[str, Any]]) -> Tuple[int, List[str]]:
+        """
+        Index items to the vector store off the event loop.
+        Each chunk runs in a worker thread, one chunk at a time: the vector
+        store client and embedding service are not thread-safe.
+        Returns the number of indexed items and one error per failed chunk.
+        """
+        indexed_count = 0
+        errors: List[str] = []
+        size = self.INDEX_CHUNK_SIZE
+        for start in range(0, len(items), size):
+            chunk = items[start:start + size]
+            try:
+                indexed_ids = await asyncio.to_thread(
+                    self.knowledge_service.index_knowledge_batch, chunk
+                )
+            except Exception as e:
+                logger.warning(f"Failed to index chunk to vector store: {e}")
+                errors.append(f"Items {start + 1}-{start + len(chunk)}: {e}")
+            else:
+                indexed_count += len(indexed_ids)
+        return indexed_count, errors
+
     async def _handle_index_knowledge_batch(self, args: Dict[str, Any]) -> ToolResponse:
         """
         Handle batch indexing of knowledge items to vector store.
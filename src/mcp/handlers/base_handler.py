@@ -139,12 +139,12 @@ class BaseToolHandler(ABC):
         """
         try:
             if self.can_handle(request):
-                logger.info(f"Handler {self.__class__.__name__} processing tool: {request.name}")
+                logger.debug("Handler %s processing tool: %s", type(self).__name__, request.name)
                 response = await self.process_request(request)
-                logger.info(f"Handler {self.__class__.__name__} completed tool: {request.name}")
+                logger.debug("Handler %s completed tool: %s", type(self).__name__, request.name)
                 return response
             elif self._next_handler:
-                logger.debug(f"Handler {self.__class__.__name__} passing to next handler")
+                logger.debug("Handler %s passing to next handler", type(self).__name__)
                 return await self._next_handler.handle(request)
             else:
                 logger.warning(f"No handler found for tool: {request.name}")
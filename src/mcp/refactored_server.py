@@ -17,6 +17,7 @@ Replaces the monolithic 1,050-line server.py with clean architecture.
 import asyncio
 import json
 import logging
+from contextlib import suppress
 from typing import Dict, Any, List, Optional
 from fastapi import WebSocket, WebSocketDisconnect
 from pydantic import BaseModel
@@ -25,6 +26,7 @@ from .command_factory import CommandFactory, CommandInvoker, CommandPipeline
 from .commands.base_command import CommandContext, CommandResult
 from src.database.refactored_memory_db import RefactoredMemoryDB
 from src.utils.error_handling import handle_errors
+from src.utils import json_codec
 
 logger = logging.getLogger(__name__)
 
@@ -51,12 +53,23 @@ class ConnectionManager:
     """
     WebSocket connection manager with improved error handling.
     Implements Observer pattern for connection lifecycle.
+    
+    Outbound messages go through a bounded per-connection queue drained by a
+    single writer task, so callers never wait on a slow socket. When a client
+    falls too far behind, its oldest queued messages are shed.
     """
     
-    def __init__(self):
+    # Maximum messages a writer sends per wakeup
+    WRITER_BATCH_SIZE = 64
+    
+    def __init__(self, max_queued_messages: int = 1024):
         self.active_connections: Dict[str, WebSocket] = {}
         self.connection_metadata: Dict[str, Dict[str, Any]] = {}
         self.message_stats: Dict[str, int] = {}
+        self.dropped_stats: Dict[str, int] = {}
+        self.send_queues: Dict[str, asyncio.Queue] = {}
+        self.writer_tasks: Dict[str, asyncio.Task] = {}
+        self.max_queued_messages = max_queued_messages
     
     async def connect(self, websocket: WebSocket, connection_id: str, metadata: Optional[Dict] = None):
         """Connect a new WebSocket with metadata tracking."""
@@ -65,6 +78,13 @@ class ConnectionManager:
             self.active_connections[connection_id] = websocket
             self.connection_metadata[connection_id] = metadata or {}
             self.message_stats[connection_id] = 0
+            self.dropped_stats[connection_id] = 0
+            
+            queue = asyncio.Queue(maxsize=self.max_queued_messages)
+            self.send_queues[connection_id] = queue
+            self.writer_tasks[connection_id] = asyncio.create_task(
+                self._write_loop(connection_id, websocket, queue)
+            )
             
             logger.info(f"WebSocket connected: {connection_id}. Total: {len(self.active_connections)}")
             
@@ -79,6 +99,12 @@ class ConnectionManager:
                 del self.active_connections[connection_id]
                 del self.connection_metadata[connection_id]
                 del self.message_stats[connection_id]
+                del self.dropped_stats[connection_id]
+                del self.send_queues[connection_id]
+                
+                writer = self.writer_tasks.pop(connection_id, None)
+                if writer:
+                    writer.cancel()
                 
                 logger.info(f"WebSocket disconnected: {connection_id}. Total: {len(self.active_connections)}")
                 return True
@@ -88,47 +114,86 @@ class ConnectionManager:
             logger.error(f"Error disconnecting WebSocket {connection_id}: {e}")
             return False
     
-    async def send_message(self, connection_id: str, message: str) -> bool:
-        """Send message to specific connection with error handling."""
+    async def _write_loop(self, connection_id: str, websocket: WebSocket, queue: asyncio.Queue):
+        """Drain a connection's outbound queue; the only task that sends on the socket."""
         try:
-            websocket = self.active_connections.get(connection_id)
-            if not websocket:
-                logger.warning(f"Connection not found: {connection_id}")
-                return False
-            
-            await websocket.send_text(message)
-            self.message_stats[connection_id] += 1
-            return True
-            
+            while True:
+                batch = [await queue.get()]
+                
+                # Pick up everything queued meanwhile without another scheduler round-trip
+                while len(batch) < self.WRITER_BATCH_SIZE and not queue.empty():
+                    batch.append(queue.get_nowait())
+                
+                for message in batch:
+                    await websocket.send_text(message)
+                self.message_stats[connection_id] += len(batch)
+                
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.error(f"Failed to send message to {connection_id}: {e}")
             self.disconnect(connection_id)
+    
+    def _enqueue(self, connection_id: str, queue: asyncio.Queue, message: str):
+        """Queue a message, shedding the oldest one if the client is too far behind."""
+        if queue.full():
+            queue.get_nowait()
+            self.dropped_stats[connection_id] += 1
+            if self.dropped_stats[connection_id] == 1:
+                logger.warning(f"Send queue full for {connection_id}; shedding oldest messages")
+        queue.put_nowait(message)
+    
+    async def send_message(self, connection_id: str, message: str) -> bool:
+        """Queue message for a specific connection."""
+        queue = self.send_queues.get(connection_id)
+        if queue is None:
+            logger.warning(f"Connection not found: {connection_id}")
             return False
+        
+        self._enqueue(connection_id, queue, message)
+        return True
     
-    async def broadcast_message(self, message: str, exclude: Optional[List[str]] = None) -> int:
-        """Broadcast message to all connections with exclusion support."""
-        exclude = exclude or []
+    async def broadcast_message(self, message: Any, exclude: Optional[List[str]] = None) -> int:
+        """
+        Queue message for all connections with exclusion support.
+        Non-string payloads are serialized once and the same frame is shared by every queue.
+        """
+        if not isinstance(message, str):
+            message = json_codec.dumps(message)
+        
+        exclude = set(exclude or ())
         sent_count = 0
-        failed_connections = []
         
-        for connection_id, websocket in self.active_connections.items():
+        for connection_id, queue in self.send_queues.items():
             if connection_id in exclude:
                 continue
             
-            try:
-                await websocket.send_text(message)
-                self.message_stats[connection_id] += 1
-                sent_count += 1
-                
-            except Exception as e:
-                logger.error(f"Failed to broadcast to {connection_id}: {e}")
-                failed_connections.append(connection_id)
+            self._enqueue(connection_id, queue, message)
+            sent_count += 1
+        
+        return sent_count
+    
+    async def close_all(self, code: int = 1001):
+        """Stop every writer task and close every socket (1001: going away)."""
+        connections = list(self.active_connections.items())
+        writers = list(self.writer_tasks.values())
         
-        # Cleanup failed connections
-        for connection_id in failed_connections:
+        for connection_id, _ in connections:
             self.disconnect(connection_id)
         
-        return sent_count
+        # Let cancelled writers unwind before their sockets are closed
+        for writer in writers:
+            with suppress(asyncio.CancelledError):
+                await writer
+        
+        for connection_id, websocket in connections:
+            try:
+                await websocket.close(code=code)
+            except Exception as e:
+                logger.debug("Error closing WebSocket %s: %s", connection_id, e)
+        
+        # Give the transports a loop iteration to release their sockets
+        await asyncio.sleep(0)
     
     def get_connection_info(self) -> Dict[str, Any]:
         """Get comprehensive connection information."""
@@ -137,7 +202,8 @@ class ConnectionManager:
             "connections": {
                 conn_id: {
                     "metadata": self.connection_metadata.get(conn_id, {}),
-                    "messages_sent": self.message_stats.get(conn_id, 0)
+                    "messages_sent": self.message_stats.get(conn_id, 0),
+                    "messages_dropped": self.dropped_stats.get(conn_id, 0)
                 }
                 for conn_id in self.active_connections.keys()
             }
@@ -254,31 +320,31 @@ class RefactoredMCPServer:
         """
         await self.connection_manager.connect(websocket, connection_id)
         
+        # Resolve everything that is fixed for the connection once, outside the receive loop
+        receive = websocket.receive_text
+        parse = self._parse_message
+        process = self.message_processor.process_message
+        send = self.connection_manager.send_message
+        strategy = "batch" if self.config["batch_processing"] else "immediate"
+        
         try:
             while True:
                 # Receive and validate message
-                raw_data = await websocket.receive_text()
-                message = self._parse_message(raw_data)
+                message = parse(await receive())
                 
                 # Create command context
                 context = CommandContext(
+                    db=self.db,
                     user_id=connection_id,  # In real app, extract from auth
-                    session_id=connection_id,
+                    request_id=message.id,
                     metadata={"connection_id": connection_id}
                 )
                 
                 # Process message using strategy pattern
-                response = await self.message_processor.process_message(
-                    message=message,
-                    context=context,
-                    strategy="batch" if self.config["batch_processing"] else "immediate"
-                )
+                response = await process(message=message, context=context, strategy=strategy)
                 
                 # Send response
-                await self.connection_manager.send_message(
-                    connection_id=connection_id,
-                    message=json.dumps(response.dict())
-                )
+                await send(connection_id=connection_id, message=json_codec.dumps(response.dict()))
                 
         except WebSocketDisconnect:
             logger.info(f"WebSocket {connection_id} disconnected")
@@ -292,7 +358,7 @@ class RefactoredMCPServer:
     def _parse_message(self, raw_data: str) -> MCPMessage:
         """Parse and validate incoming message."""
         try:
-            data = json.loads(raw_data)
+            data = json_codec.loads(raw_data)
             return MCPMessage(**data)
         except (json.JSONDecodeError, ValueError) as e:
             raise ValueError(f"Invalid message format: {e}")
@@ -357,8 +423,7 @@ class RefactoredMCPServer:
             await self.process_batch_commands()
             
             # Close all connections
-            for connection_id in list(self.connection_manager.active_connections.keys()):
-                self.connection_manager.disconnect(connection_id)
+            await self.connection_manager.close_all()
             
             # Clear command caches
             self.command_factory.clear_cache()
@@ -353,7 +353,7 @@ class RefactoredMCPStdioServer:
                 try:
                     # Parse JSON request
                     request = json.loads(line)
-                    logger.info(f"Received request: {request.get('method')}")
+                    logger.debug("Received request: %s", request.get("method"))
 
                     # Process request through the system
                     response = await self.request_processor.process_request(request)
@@ -442,6 +442,17 @@ def create_stdio_server() -> RefactoredMCPStdioServer:
     return RefactoredMCPStdioServer()
 
 
+def install_event_loop_policy():
+    """Use uvloop's event loop when installed, unless MCP_NO_UVLOOP is set."""
+    if os.environ.get("MCP_NO_UVLOOP") or sys.platform == "win32":
+        return
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
 async def main():
     """Main entry point."""
     try:
@@ -453,4 +464,5 @@ async def main():
 
 
 if __name__ == "__main__":
+    install_event_loop_policy()
     asyncio.run(main())
\ No newline at end of file
@@ -23,8 +23,9 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 # Import the refactored stdio server
-from src.mcp.refactored_stdio_server import main
+from src.mcp.refactored_stdio_server import main, install_event_loop_policy
 
 if __name__ == "__main__":
     import asyncio
+    install_event_loop_policy()
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""
+MCP Multi-Context Memory System
+Copyright (c) 2024 VoiceLessQ
+https://github.com/VoiceLessQ/multi-context-memory
+
+This file is part of the MCP Multi-Context Memory System.
+Licensed under the MIT License. See LICENSE file in the project root.
+
+Project Fingerprint: 7a8f9b3c-mcpmem-voicelessq-2024
+Original Author: VoiceLessQ
+"""
+
+"""
+JSON encoding for WebSocket frames, shared by the API app and the MCP server.
+Uses orjson when it is installed and falls back to the standard json module.
+"""
+import json
+from datetime import date
+from typing import Any
+
+# Optional fast JSON codec for the WebSocket hot path
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_default(value: Any) -> Any:
+    """Encode values the stdlib encoder lacks; orjson handles these natively."""
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> str:
+    """
+    Serialize a payload to a JSON string.
+    Dates are encoded as ISO 8601 strings and non-string dict keys are allowed.
+    """
+    if orjson:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(payload, default=_json_default)
+
+
+def loads(raw_data: str) -> Any:
+    """Parse a JSON string."""
+    return orjson.loads(raw_data) if orjson else json.loads(raw_data)
@@ -0,0 +1,85 @@
+"""
+Tests for the advanced MCP tool handler.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("chromadb")
+pytest.importorskip("redis")
+
+from src.mcp.handlers.advanced_handler import AdvancedHandler  # noqa: E402
+
+
+def test_changes_to_tool_definitions_do_not_leak_into_later_calls():
+    handler = AdvancedHandler()
+    expected = handler.get_tool_definitions()
+
+    definitions = handler.get_tool_definitions()
+    definitions[0]["name"] = "renamed"
+    definitions[0]["inputSchema"]["properties"].clear()
+    definitions[0]["inputSchema"]["required"].append("extra")
+    definitions.pop()
+
+    assert handler.get_tool_definitions() == expected
+    assert AdvancedHandler().get_tool_definitions() == expected
+
+
+def test_every_supported_tool_has_a_definition():
+    handler = AdvancedHandler()
+
+    assert {tool["name"] for tool in handler.get_tool_definitions()} == set(handler.supported_tools)
+
+
+class FakeKnowledgeService:
+    """Synchronous stand-in for the knowledge service that detects overlapping calls."""
+
+    def __init__(self, fail_on_call=None):
+        self.fail_on_call = fail_on_call
+        self.chunk_sizes = []
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def index_knowledge_batch(self, items):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(0.01)
+            self.chunk_sizes.append(len(items))
+            if len(self.chunk_sizes) == self.fail_on_call:
+                raise RuntimeError("embedding failed")
+            return [item["id"] for item in items]
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+def make_items(count):
+    return [{"content": f"item {n}", "metadata": {}, "id": f"memory_{n}"} for n in range(count)]
+
+
+def test_chunks_are_indexed_one_at_a_time():
+    handler = AdvancedHandler()
+    handler.knowledge_service = FakeKnowledgeService()
+
+    indexed_count, errors = asyncio.run(handler._index_items_in_chunks(make_items(300)))
+
+    assert indexed_count == 300
+    assert errors == []
+    assert handler.knowledge_service.chunk_sizes == [128, 128, 44]
+    assert handler.knowledge_service.peak == 1
+
+
+def test_failed_chunk_is_reported_and_the_rest_are_indexed():
+    handler = AdvancedHandler()
+    handler.knowledge_service = FakeKnowledgeService(fail_on_call=2)
+
+    indexed_count, errors = asyncio.run(handler._index_items_in_chunks(make_items(300)))
+
+    assert indexed_count == 172
+    assert errors == ["Items 129-256: embedding failed"]
+    assert handler.knowledge_service.chunk_sizes == [128, 128, 44]
@@ -0,0 +1,322 @@
+"""
+Tests for chunked storage backed by the SQLAlchemy chunk repository.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database.models import Base, ChunkBlob, Memory, MemoryChunk
+from src.database.repositories.chunk_repository import SQLAlchemyChunkRepository
+from src.database.strategies.chunked_storage_strategy import SQLAlchemyChunkedStorageStrategy
+from src.database.strategies.compression_strategy import AdaptiveCompressionStrategy
+
+CONTENT = "".join(f"Paragraph {i}: the archive keeps every note it is given. " for i in range(400))
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def repository(session):
+    return SQLAlchemyChunkRepository(session)
+
+
+@pytest.fixture
+def storage(repository, session):
+    return SQLAlchemyChunkedStorageStrategy(repository, session, chunk_size=1000)
+
+
+def add_memory(session, title="memory"):
+    memory = Memory(title=title, content="", owner_id=1)
+    session.add(memory)
+    session.commit()
+    return memory
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_store_and_retrieve_round_trip(session, storage):
+    memory = add_memory(session)
+
+    assert run(storage.store(memory, CONTENT))
+    assert session.query(MemoryChunk).filter_by(memory_id=memory.id).count() > 1
+
+    storage.invalidate(memory.id)
+    assert run(storage.retrieve(memory.id)) == CONTENT
+
+
+def test_identical_chunks_share_blobs(session, storage):
+    first = add_memory(session, "first")
+    second = add_memory(session, "second")
+
+    run(storage.store(first, CONTENT))
+    blob_count = session.query(ChunkBlob).count()
+    run(storage.store(second, CONTENT))
+
+    assert session.query(ChunkBlob).count() == blob_count
+    assert session.query(MemoryChunk).count() == 2 * blob_count
+    assert run(storage.retrieve(second.id)) == CONTENT
+
+
+def test_blobs_are_released_with_their_last_chunk(session, storage):
+    first = add_memory(session, "first")
+    second = add_memory(session, "second")
+    run(storage.store(first, CONTENT))
+    run(storage.store(second, CONTENT))
+
+    run(storage.delete(first.id))
+    assert session.query(ChunkBlob).count() > 0
+    assert run(storage.retrieve(second.id)) == CONTENT
+
+    run(storage.delete(second.id))
+    assert session.query(ChunkBlob).count() == 0
+    assert session.query(MemoryChunk).count() == 0
+
+
+def test_create_blob_returns_existing_row_for_taken_hash(session, repository):
+    first = run(repository.create_blob(ChunkBlob(hash="abc", data="one", compression_type="none")))
+    second = run(repository.create_blob(ChunkBlob(hash="abc", data="two", compression_type="none")))
+
+    assert first.data == second.data == "one"
+    assert session.query(ChunkBlob).count() == 1
+    assert run(repository.find_blob_by_hash("abc")).data == "one"
+    assert run(repository.find_blob_by_hash("missing")) is None
+
+
+def test_legacy_inline_chunks_are_still_readable(session, storage):
+    memory = add_memory(session)
+    session.add(MemoryChunk(memory_id=memory.id, chunk_index=1, chunk_data="world", compression_type="none"))
+    session.add(MemoryChunk(memory_id=memory.id, chunk_index=0, chunk_data="hello ", compression_type="none"))
+    session.commit()
+
+    assert run(storage.retrieve(memory.id)) == "hello world"
+
+
+class GatedChunkRepository(SQLAlchemyChunkRepository):
+    """Chunk repository whose reads wait until the test releases them."""
+
+    def __init__(self, session):
+        super().__init__(session)
+        self.gate = None
+
+    async def find_by_memory(self, memory_id):
+        chunks = await super().find_by_memory(memory_id)
+        if self.gate is not None:
+            await self.gate.wait()
+        return chunks
+
+
+def test_update_then_read_ignores_load_started_before_update(session):
+    repository = GatedChunkRepository(session)
+    storage = SQLAlchemyChunkedStorageStrategy(repository, session, chunk_size=1000)
+    memory = add_memory(session)
+    updated = CONTENT.replace("archive", "library")
+
+    async def scenario():
+        await storage.store(memory, CONTENT)
+
+        # A prefetch reads the old chunks, then stalls before caching them
+        repository.gate = asyncio.Event()
+        (prefetch,) = storage.prefetch([memory.id])
+        await asyncio.sleep(0)
+
+        assert await storage.update(memory.id, updated)
+        repository.gate.set()
+        assert await prefetch == CONTENT
+
+        return await storage.retrieve(memory.id)
+
+    assert run(scenario()) == updated
+
+
+def test_cache_serves_repeat_reads_until_invalidated(session, storage):
+    memory = add_memory(session)
+    run(storage.store(memory, CONTENT))
+
+    assert run(storage.retrieve(memory.id)) == CONTENT
+    assert memory.id in storage._content_cache
+
+    run(storage.update(memory.id, CONTENT + " appendix"))
+    assert memory.id not in storage._content_cache
+    assert run(storage.retrieve(memory.id)) == CONTENT + " appendix"
+
+
+def test_chunk_info_is_aggregated_by_the_database(session, repository, storage):
+    memory = add_memory(session)
+    run(storage.store(memory, CONTENT))
+    chunks = session.query(MemoryChunk).filter_by(memory_id=memory.id).all()
+
+    stats = run(repository.aggregate_by_memory(memory.id))
+    assert stats["chunk_count"] == len(chunks)
+    assert stats["total_original_size"] == len(CONTENT.encode("utf-8"))
+    assert stats["total_compressed_size"] == sum(chunk.compressed_size for chunk in chunks)
+    assert stats["compression_types"] == ["zstd"]
+
+    info = run(storage.get_chunk_info(memory.id))
+    assert info["chunk_count"] == len(chunks)
+    assert info["total_original_size"] == len(CONTENT.encode("utf-8"))
+    assert 0 < info["compression_ratio"] < 1
+    assert info["compression_types"] == ["zstd"]
+
+
+def test_chunk_info_for_memory_without_chunks(repository, storage):
+    assert run(repository.aggregate_by_memory(999)) == {
+        "chunk_count": 0,
+        "total_original_size": 0,
+        "total_compressed_size": 0,
+        "compression_types": []
+    }
+    assert run(storage.get_chunk_info(999))["chunk_count"] == 0
+
+
+def chunk_rows(session, memory_id):
+    return (
+        session.query(MemoryChunk)
+        .filter_by(memory_id=memory_id)
+        .order_by(MemoryChunk.chunk_index)
+        .all()
+    )
+
+
+def referenced_blobs(session):
+    return {hash_ for (hash_,) in session.query(MemoryChunk.blob_hash).distinct()}
+
+
+@pytest.mark.parametrize("new_chunk_size", [333, 1500, 4000])
+def test_optimize_reslices_into_one_consistent_set(session, storage, new_chunk_size):
+    memory = add_memory(session)
+    run(storage.store(memory, CONTENT))
+
+    storage.configure_chunk_size(new_chunk_size)
+    result = run(storage.optimize_chunks(memory.id))
+
+    assert result["optimization_result"] == "success"
+    rows = chunk_rows(session, memory.id)
+    assert [row.chunk_index for row in rows] == list(range(len(rows)))
+    assert len(rows) == -(-len(CONTENT) // new_chunk_size)
+    assert {blob.hash for blob in session.query(ChunkBlob)} == referenced_blobs(session)
+    assert run(storage.retrieve(memory.id)) == CONTENT
+
+
+def test_optimize_leaves_current_layout_unchanged(session, storage):
+    memory = add_memory(session)
+    run(storage.store(memory, CONTENT))
+    before = [row.id for row in chunk_rows(session, memory.id)]
+
+    assert run(storage.optimize_chunks(memory.id))["optimization_result"] == "unchanged"
+    assert [row.id for row in chunk_rows(session, memory.id)] == before
+
+
+class FailingCompression:
+    """Compression strategy wrapper that fails after a number of compress calls."""
+
+    def __init__(self, inner, fail_after):
+        self.inner = inner
+        self.calls = 0
+        self.fail_after = fail_after
+
+    def compress(self, content):
+        self.calls += 1
+        if self.calls > self.fail_after:
+            raise RuntimeError("compression failed")
+        return self.inner.compress(content)
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+
+def test_failed_optimize_rolls_back_rows_and_blobs(session, storage):
+    memory = add_memory(session)
+    run(storage.store(memory, CONTENT))
+    rows_before = [(row.id, row.chunk_index, row.blob_hash) for row in chunk_rows(session, memory.id)]
+    blobs_before = {blob.hash for blob in session.query(ChunkBlob)}
+
+    storage.configure_chunk_size(700)
+    storage.compression_strategy = FailingCompression(storage.compression_strategy, fail_after=3)
+    result = run(storage.optimize_chunks(memory.id))
+
+    assert "error" in result
+    session.expire_all()
+    assert [(row.id, row.chunk_index, row.blob_hash) for row in chunk_rows(session, memory.id)] == rows_before
+    assert {blob.hash for blob in session.query(ChunkBlob)} == blobs_before
+    assert run(storage.retrieve(memory.id)) == CONTENT
+
+
+class CountingCompression:
+    """Compression strategy wrapper that counts compress and decompress calls."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.compress_calls = 0
+        self.decompress_algorithms = []
+
+    def compress(self, content):
+        self.compress_calls += 1
+        return self.inner.compress(content)
+
+    def decompress(self, content, algorithm=None):
+        self.decompress_algorithms.append(algorithm)
+        return self.inner.decompress(content, algorithm)
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+
+def test_identical_single_chunk_memories_share_one_blob_row(session, storage):
+    storage.compression_strategy = CountingCompression(storage.compression_strategy)
+    content = CONTENT[:600]
+    first = add_memory(session, "first")
+    second = add_memory(session, "second")
+
+    run(storage.store(first, content))
+    run(storage.store(second, content))
+
+    rows = session.query(MemoryChunk).order_by(MemoryChunk.memory_id).all()
+    assert [row.memory_id for row in rows] == [first.id, second.id]
+    assert rows[0].blob_hash == rows[1].blob_hash
+    assert session.query(ChunkBlob).count() == 1
+    # The second store found the blob and skipped compression
+    assert storage.compression_strategy.compress_calls == 1
+    assert run(storage.retrieve(second.id)) == content
+
+
+def test_chunk_size_grows_to_stay_within_max_chunks(session, repository):
+    storage = SQLAlchemyChunkedStorageStrategy(repository, session, chunk_size=1000, max_chunks=5)
+    memory = add_memory(session)
+
+    assert storage._effective_chunk_size(4000, 1000) == 1000
+    assert storage._effective_chunk_size(len(CONTENT), 1000) == -(-len(CONTENT) // 5)
+
+    run(storage.store(memory, CONTENT))
+
+    rows = chunk_rows(session, memory.id)
+    assert len(rows) == 5
+    assert rows[0].original_size == -(-len(CONTENT) // 5)
+    storage.invalidate(memory.id)
+    assert run(storage.retrieve(memory.id)) == CONTENT
+
+
+def test_retrieve_decompresses_with_the_stored_algorithm(session, repository):
+    compression = CountingCompression(AdaptiveCompressionStrategy())
+    storage = SQLAlchemyChunkedStorageStrategy(
+        repository, session, chunk_size=1000, compression_strategy=compression
+    )
+    memory = add_memory(session)
+    run(storage.store(memory, CONTENT))
+    storage.invalidate(memory.id)
+
+    assert run(storage.retrieve(memory.id)) == CONTENT
+    stored_types = [row.compression_type for row in chunk_rows(session, memory.id)]
+    assert compression.decompress_algorithms == stored_types
+    assert None not in compression.decompress_algorithms
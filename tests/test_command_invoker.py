@@ -0,0 +1,101 @@
+"""
+Tests for queued command execution in CommandInvoker.
+"""
+import asyncio
+
+from src.mcp.command_factory import CommandFactory, CommandInvoker, CommandRegistry
+from src.mcp.commands.base_command import Command, CommandContext, CommandResult
+
+
+class Recorder:
+    """Shared log of command start/finish events and overlap."""
+
+    def __init__(self):
+        self.events = []
+        self.running = 0
+        self.peak = 0
+
+
+class RecordingCommand(Command):
+    recorder: Recorder = None
+
+    command_name = "test.record"
+
+    async def execute(self, context, data):
+        n = data["n"]
+        recorder = self.recorder
+        recorder.running += 1
+        recorder.peak = max(recorder.peak, recorder.running)
+        recorder.events.append(("start", n))
+        await asyncio.sleep(0.001)
+        recorder.events.append(("end", n))
+        recorder.running -= 1
+        return CommandResult.ok({"n": n})
+
+    def validate_input(self, data):
+        return True
+
+
+def make_invoker(**kwargs):
+    recorder = Recorder()
+    RecordingCommand.recorder = recorder
+    registry = CommandRegistry()
+    registry.register_command(RecordingCommand)
+    return CommandInvoker(CommandFactory(registry), target_latency_seconds=None, **kwargs), recorder
+
+
+def queue(invoker, commands):
+    context = CommandContext(db=None, user_id="tester")
+
+    async def enqueue():
+        for n, command_name in enumerate(commands):
+            await invoker.invoke_command(command_name, context, {"n": n}, immediate=False)
+
+    asyncio.run(enqueue())
+
+
+def test_batch_runs_in_fifo_order():
+    invoker, recorder = make_invoker()
+    invoker.set_batch_size(6)
+    queue(invoker, ["test.record"] * 6)
+
+    results = asyncio.run(invoker.process_batch())
+
+    assert [result.data["n"] for result in results] == list(range(6))
+    assert recorder.peak == 1
+    assert recorder.events == [(kind, n) for n in range(6) for kind in ("start", "end")]
+
+
+def test_failing_command_does_not_stop_the_batch():
+    invoker, recorder = make_invoker()
+    context = CommandContext(db=None, user_id="tester")
+
+    async def scenario():
+        await invoker.invoke_command("test.record", context, {"n": 0}, immediate=False)
+        await invoker.invoke_command("test.record", context, {}, immediate=False)
+        await invoker.invoke_command("test.record", context, {"n": 2}, immediate=False)
+        return await invoker.process_batch()
+
+    results = asyncio.run(scenario())
+
+    assert [result.success for result in results] == [True, False, True]
+    assert results[2].data == {"n": 2}
+    assert recorder.peak == 1
+
+
+def test_batch_growth_keeps_commands_sequential():
+    recorder = Recorder()
+    RecordingCommand.recorder = recorder
+    registry = CommandRegistry()
+    registry.register_command(RecordingCommand)
+    # A generous latency target, so every batch counts as fast and the batch size grows
+    invoker = CommandInvoker(CommandFactory(registry), target_latency_seconds=10.0)
+    queue(invoker, ["test.record"] * 200)
+
+    sizes = []
+    while invoker.get_queue_status()["queue_length"]:
+        sizes.append(invoker.get_queue_status()["batch_size"])
+        asyncio.run(invoker.process_batch())
+
+    assert max(sizes) > 3 * sizes[0]
+    assert recorder.peak == 1
@@ -0,0 +1,184 @@
+"""
+Tests for the Command base classes and the command registry.
+"""
+import asyncio
+
+import pytest
+
+from src.mcp.command_factory import CommandFactory, CommandRegistry
+from src.mcp.commands.base_command import AsyncCommand, CacheableCommand, Command, CommandContext, CommandResult
+
+
+def test_property_command_name_is_rejected():
+    with pytest.raises(TypeError, match="command_name must be a class attribute"):
+        class PropertyNameCommand(Command):
+            @property
+            def command_name(self):
+                return "test.property"
+
+            async def execute(self, context, data):
+                return CommandResult.ok({})
+
+            def validate_input(self, data):
+                return True
+
+
+def test_property_required_permissions_is_rejected():
+    with pytest.raises(TypeError, match="required_permissions must be a class attribute"):
+        class PropertyPermissionsCommand(Command):
+            command_name = "test.permissions"
+
+            @property
+            def required_permissions(self):
+                return ["memory:read"]
+
+            async def execute(self, context, data):
+                return CommandResult.ok({})
+
+            def validate_input(self, data):
+                return True
+
+
+def test_missing_command_name_is_rejected():
+    with pytest.raises(TypeError, match="must define command_name"):
+        class NamelessCommand(Command):
+            async def execute(self, context, data):
+                return CommandResult.ok({})
+
+            def validate_input(self, data):
+                return True
+
+
+def test_class_attributes_are_read_without_instantiating():
+    class ReadCommand(Command):
+        command_name = "test.read"
+        required_permissions = ("memory:read",)
+
+        async def execute(self, context, data):
+            return CommandResult.ok({})
+
+        def validate_input(self, data):
+            return True
+
+    info = ReadCommand.get_command_info()
+    assert info["name"] == "test.read"
+    assert info["required_permissions"] == ["memory:read"]
+
+
+def test_registry_command_info_returns_copies():
+    registry = CommandRegistry()
+
+    info = registry.get_command_info()
+    info["memory.create"]["name"] = "changed"
+    info["memory.create"]["required_permissions"].append("admin")
+    del info["memory.get"]
+
+    fresh = registry.get_command_info()
+    assert fresh["memory.create"]["name"] == "memory.create"
+    assert fresh["memory.create"]["required_permissions"] == ["memory:create"]
+    assert "memory.get" in fresh
+
+
+def test_command_help_returns_copies():
+    factory = CommandFactory()
+
+    factory.get_command_help("memory.get")["description"] = "changed"
+
+    assert factory.get_command_help("memory.get")["description"] != "changed"
+
+
+def test_context_and_result_are_slotted():
+    context = CommandContext(db=None, user_id="tester")
+    result = CommandResult.ok({"id": 1})
+
+    assert not hasattr(context, "__dict__")
+    assert not hasattr(result, "__dict__")
+    assert context.metadata == {} and context.timestamp is not None
+    assert result.to_dict() == {"success": True, "data": {"id": 1}}
+
+
+class SleepCommand(AsyncCommand):
+    command_name = "test.sleep"
+
+    async def execute(self, context, data):
+        await asyncio.sleep(data["seconds"])
+        return CommandResult.ok({"slept": data["seconds"]})
+
+    def validate_input(self, data):
+        return True
+
+
+def test_execute_with_timeout_returns_result_in_time():
+    result = asyncio.run(SleepCommand().execute_with_timeout(CommandContext(db=None), {"seconds": 0}, 1))
+
+    assert result.success and result.data == {"slept": 0}
+
+
+def test_execute_with_timeout_reports_timeout():
+    result = asyncio.run(SleepCommand().execute_with_timeout(CommandContext(db=None), {"seconds": 1}, 0.01))
+
+    assert not result.success
+    assert result.error == "Command test.sleep timed out after 0.01 seconds"
+
+
+class CountingStatsCommand(CacheableCommand):
+    command_name = "test.stats"
+
+    def __init__(self, fail_first=False):
+        super().__init__(cache_ttl_seconds=60)
+        self.calls = 0
+        self.fail_first = fail_first
+
+    async def execute_uncached(self, context, data):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail_first and self.calls == 1:
+            return CommandResult.fail("busy")
+        return CommandResult.ok({"totals": {"memories": 3}, "tags": ["a"]})
+
+    def validate_input(self, data):
+        return True
+
+
+def test_concurrent_misses_compute_once():
+    command = CountingStatsCommand()
+    context = CommandContext(db=None, user_id="tester")
+
+    async def scenario():
+        return await asyncio.gather(*(command.execute(context, {"q": 1}) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+
+    assert command.calls == 1
+    assert all(result.data == {"totals": {"memories": 3}, "tags": ["a"]} for result in results)
+    assert [bool(result.metadata and result.metadata.get("cached")) for result in results].count(False) == 1
+    assert command._key_locks == {}
+
+
+def test_failed_result_is_not_shared_with_waiters():
+    command = CountingStatsCommand(fail_first=True)
+    context = CommandContext(db=None, user_id="tester")
+
+    async def scenario():
+        return await asyncio.gather(command.execute(context, {}), command.execute(context, {}))
+
+    first, second = asyncio.run(scenario())
+
+    assert not first.success and second.success
+    assert command.calls == 2
+
+
+def test_cached_results_are_copies():
+    command = CountingStatsCommand()
+    context = CommandContext(db=None, user_id="tester")
+
+    first = asyncio.run(command.execute(context, {}))
+    first.data["totals"]["memories"] = 99
+    second = asyncio.run(command.execute(context, {}))
+    second.data["tags"].append("b")
+    second.metadata["cached"] = "tampered"
+    third = asyncio.run(command.execute(context, {}))
+
+    assert command.calls == 1
+    assert third.data == {"totals": {"memories": 3}, "tags": ["a"]}
+    assert third.metadata["cached"] is True
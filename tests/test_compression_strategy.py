@@ -0,0 +1,124 @@
+"""
+Tests for the compression strategies used by chunked storage.
+"""
+import base64
+import random
+import zlib
+
+import pytest
+
+from src.database.strategies.compression_strategy import (
+    AdaptiveCompressionStrategy,
+    GzipCompressionStrategy,
+    ZlibCompressionStrategy,
+    ZstdCompressionStrategy,
+    payload_ratio,
+)
+
+TEXT = "The quick brown fox jumps over the lazy dog. " * 200
+
+
+class FixedRandom:
+    """Stand-in RNG that always returns the same draw."""
+
+    def __init__(self, value: float):
+        self.value = value
+
+    def random(self) -> float:
+        return self.value
+
+
+@pytest.mark.parametrize("strategy", [
+    ZstdCompressionStrategy(),
+    GzipCompressionStrategy(),
+    ZlibCompressionStrategy(),
+    AdaptiveCompressionStrategy(rng=random.Random(0)),
+])
+def test_round_trip(strategy):
+    compressed, was_compressed, algorithm = strategy.compress(TEXT)
+    assert was_compressed
+    assert algorithm != "none"
+    assert strategy.decompress(compressed, algorithm) == TEXT
+
+
+def test_zstd_reads_legacy_zlib_payloads():
+    legacy = base64.b64encode(zlib.compress(TEXT.encode("utf-8"))).decode("utf-8")
+    assert ZstdCompressionStrategy().decompress(legacy) == TEXT
+
+
+@pytest.mark.parametrize("strategy, expected", [
+    (ZstdCompressionStrategy(), "zstd"),
+    (GzipCompressionStrategy(), "gzip"),
+    (ZlibCompressionStrategy(), "zlib"),
+])
+def test_adaptive_detects_algorithm_without_label(strategy, expected):
+    compressed, _, algorithm = strategy.compress(TEXT)
+    assert algorithm == expected
+
+    adaptive = AdaptiveCompressionStrategy()
+    assert adaptive._detect(compressed) == expected
+    assert adaptive.decompress(compressed) == TEXT
+
+
+def test_compress_chunks_matches_whole_content():
+    strategy = ZstdCompressionStrategy()
+    parts = list(strategy.compress_chunks(TEXT, 1000))
+
+    assert "".join(chunk for chunk, _, _, _ in parts) == TEXT
+    for chunk, compressed, was_compressed, algorithm in parts:
+        assert was_compressed and algorithm == "zstd"
+        assert strategy.decompress(compressed, algorithm) == chunk
+
+
+def test_ratios_share_one_size_basis():
+    for strategy in (ZstdCompressionStrategy(), GzipCompressionStrategy(), ZlibCompressionStrategy()):
+        compressed, _, _ = strategy.compress(TEXT)
+        payload = base64.b64decode(compressed)
+        expected = 1.0 - len(payload) / len(TEXT.encode("utf-8"))
+        assert strategy.get_compression_ratio(TEXT, compressed) == pytest.approx(expected)
+
+
+def test_uncompressed_content_has_zero_ratio():
+    assert payload_ratio("abcd", "abcd") == 0.0
+    assert payload_ratio("", "") == 0.0
+
+
+def test_probe_stops_at_first_good_enough_result():
+    strategy = AdaptiveCompressionStrategy(good_enough_ratio=0.5)
+    _, was_compressed, algorithm = strategy.compress(TEXT[:5000])
+
+    assert was_compressed
+    assert algorithm == AdaptiveCompressionStrategy.PROBE_ORDER[0]
+    bucket = len(TEXT[:5000]).bit_length()
+    assert list(strategy._bucket_ratios[bucket]) == [algorithm]
+
+
+def test_exploration_is_driven_by_injected_rng():
+    content = TEXT[:5000]
+    bucket = len(content).bit_length()
+
+    # Draws above explore_rate exploit the recorded best algorithm without probing
+    exploit = AdaptiveCompressionStrategy(warmup_samples=1, rng=FixedRandom(0.99))
+    exploit._bucket_ratios[bucket] = {"zstd": 0.1, "gzip": 0.2}
+    exploit._bucket_samples[bucket] = 1
+    _, _, algorithm = exploit.compress(content)
+    assert algorithm == "gzip"
+    assert exploit._bucket_samples[bucket] == 1
+
+    # Draws below explore_rate re-probe from the start of PROBE_ORDER
+    explore = AdaptiveCompressionStrategy(warmup_samples=1, rng=FixedRandom(0.0))
+    explore._bucket_ratios[bucket] = {"zstd": 0.1, "gzip": 0.2}
+    explore._bucket_samples[bucket] = 1
+    _, _, algorithm = explore.compress(content)
+    assert algorithm == "zstd"
+    assert explore._bucket_samples[bucket] == 2
+
+
+def test_seeded_rng_gives_reproducible_choices():
+    contents = [TEXT[:n] for n in range(200, 6000, 150)]
+
+    def choices(seed):
+        strategy = AdaptiveCompressionStrategy(warmup_samples=2, rng=random.Random(seed))
+        return [strategy.compress(content)[2] for content in contents]
+
+    assert choices(42) == choices(42)
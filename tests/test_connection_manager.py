@@ -0,0 +1,130 @@
+"""
+Tests for the per-connection send queues in ConnectionManager.
+"""
+import asyncio
+
+from src.mcp.refactored_server import ConnectionManager
+
+
+class FakeWebSocket:
+    """WebSocket stand-in; sends block while `gate` is set and not yet released."""
+
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.sent = []
+        self.accepted = False
+        self.closed_code = None
+
+    async def accept(self):
+        self.accepted = True
+
+    async def send_text(self, message):
+        if self.gate is not None:
+            await self.gate.wait()
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        self.closed_code = code
+
+
+async def settle():
+    """Give writer tasks a few loop iterations to drain their queues."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_slow_client_does_not_block_broadcast_to_others():
+    async def scenario():
+        manager = ConnectionManager()
+        slow = FakeWebSocket(gate=asyncio.Event())
+        fast = FakeWebSocket()
+        await manager.connect(slow, "slow")
+        await manager.connect(fast, "fast")
+
+        for n in range(3):
+            assert await asyncio.wait_for(manager.broadcast_message(f"m{n}"), timeout=1) == 2
+        await settle()
+
+        assert fast.sent == ["m0", "m1", "m2"]
+        assert slow.sent == []
+
+        slow.gate.set()
+        await settle()
+        assert slow.sent == fast.sent
+        await manager.close_all()
+
+    asyncio.run(scenario())
+
+
+def test_disconnect_cancels_the_writer_task():
+    async def scenario():
+        manager = ConnectionManager()
+        websocket = FakeWebSocket(gate=asyncio.Event())
+        await manager.connect(websocket, "client")
+        await manager.send_message("client", "stuck")
+        await settle()
+        writer = manager.writer_tasks["client"]
+
+        assert manager.disconnect("client")
+        await asyncio.gather(writer, return_exceptions=True)
+
+        assert writer.cancelled()
+        assert "client" not in manager.writer_tasks
+        assert "client" not in manager.send_queues
+        assert not await manager.send_message("client", "late")
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_sheds_oldest_message():
+    async def scenario():
+        manager = ConnectionManager(max_queued_messages=3)
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "client")
+
+        # No await yields here, so the writer has not started draining yet
+        for n in range(5):
+            await manager.send_message("client", f"m{n}")
+
+        queue = manager.send_queues["client"]
+        assert queue.qsize() == 3
+        assert manager.dropped_stats["client"] == 2
+        assert manager.get_connection_info()["connections"]["client"]["messages_dropped"] == 2
+
+        await manager.broadcast_message("m5")
+        assert queue.qsize() == 3
+        assert manager.dropped_stats["client"] == 3
+
+        # m0, m1 and then m2 were shed, oldest first
+        await settle()
+        assert websocket.sent == ["m3", "m4", "m5"]
+        assert manager.get_connection_info()["connections"]["client"]["messages_sent"] == 3
+        await manager.close_all()
+
+    asyncio.run(scenario())
+
+
+def test_close_all_cancels_writers_and_closes_sockets():
+    async def scenario():
+        manager = ConnectionManager()
+        stuck = FakeWebSocket(gate=asyncio.Event())
+        idle = FakeWebSocket()
+        await manager.connect(stuck, "stuck")
+        await manager.connect(idle, "idle")
+        for n in range(3):
+            await manager.send_message("stuck", f"m{n}")
+        await settle()
+        writers = list(manager.writer_tasks.values())
+
+        await manager.close_all()
+
+        assert all(writer.done() for writer in writers)
+        assert all(writer.cancelled() for writer in writers)
+        assert manager.send_queues == {}
+        assert manager.writer_tasks == {}
+        assert manager.active_connections == {}
+        assert stuck.closed_code == idle.closed_code == 1001
+        # Frames still queued behind the stuck send were discarded, not sent
+        assert stuck.sent == []
+
+    asyncio.run(scenario())
@@ -0,0 +1,63 @@
+"""
+Tests for the default implementations on DatabaseInterface.
+"""
+from src.database.db_interface import DatabaseInterface
+from src.database.models import Memory
+
+
+class ListDatabase(DatabaseInterface):
+    """In-memory DatabaseInterface that records each get_all_memories page."""
+
+    def __init__(self, count, honour_offset=True):
+        self.memories = [Memory(id=i + 1, title=f"m{i + 1}", content="x") for i in range(count)]
+        self.honour_offset = honour_offset
+        self.calls = []
+
+    def get_memory(self, memory_id, **kwargs):
+        return next((memory for memory in self.memories if memory.id == memory_id), None)
+
+    def get_all_memories(self, limit=None, offset=0, **kwargs):
+        self.calls.append((limit, offset, kwargs))
+        start = offset if self.honour_offset else 0
+        end = None if limit is None else start + limit
+        return self.memories[start:end]
+
+    def update_memory(self, memory_id, updates, **kwargs):
+        return None
+
+    def update_relations(self, old_memory_id, new_memory_id):
+        return True
+
+    def delete_memory(self, memory_id, **kwargs):
+        return True
+
+
+def test_iter_memories_pages_with_limit_and_offset():
+    db = ListDatabase(25)
+
+    ids = [memory.id for memory in db.iter_memories(batch_size=10, owner_id=1)]
+
+    assert ids == list(range(1, 26))
+    assert db.calls == [(10, 0, {"owner_id": 1}), (10, 10, {"owner_id": 1}), (10, 20, {"owner_id": 1})]
+
+
+def test_iter_memories_stops_on_empty_page_after_exact_multiple():
+    db = ListDatabase(20)
+
+    assert len(list(db.iter_memories(batch_size=10))) == 20
+    assert [offset for _, offset, _ in db.calls] == [0, 10, 20]
+
+
+def test_iter_memories_stops_when_backend_ignores_offset():
+    db = ListDatabase(25, honour_offset=False)
+
+    ids = [memory.id for memory in db.iter_memories(batch_size=10)]
+
+    assert ids == list(range(1, 11))
+    assert len(db.calls) == 2
+
+
+def test_get_memories_by_ids_skips_missing():
+    db = ListDatabase(3)
+
+    assert [memory.id for memory in db.get_memories_by_ids([3, 9, 1])] == [3, 1]
@@ -0,0 +1,275 @@
+"""
+Tests for the deduplication strategies in DeduplicationManager.
+"""
+from contextlib import contextmanager
+
+import numpy as np
+import pytest
+import xxhash
+
+from src.database.models import Memory
+from src.deduplication import deduplication_manager
+from src.deduplication.deduplication_manager import DeduplicationManager
+
+
+class FakeDoc:
+    def __init__(self, vector):
+        self.vector = vector
+
+
+class FakeNLP:
+    """Minimal spaCy stand-in that maps each text to a fixed vector."""
+
+    pipe_names = []
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.pipe_calls = []
+
+    @contextmanager
+    def select_pipes(self, enable):
+        yield
+
+    def pipe(self, texts, n_process=1, batch_size=1000):
+        texts = list(texts)
+        self.pipe_calls.append((len(texts), n_process))
+        return (FakeDoc(self.vectors[text]) for text in texts)
+
+
+def make_manager(**config):
+    manager = DeduplicationManager(db=None, config=config)
+    return manager
+
+
+def memories_from(contents):
+    return [Memory(id=i + 1, title=f"m{i + 1}", content=content) for i, content in enumerate(contents)]
+
+
+def test_xxhash_content_hash_is_normalized_xxh3():
+    manager = make_manager()
+    expected = f"{xxhash.xxh3_64_intdigest('hello world'.encode('utf-8')):016x}"
+
+    assert manager.calculate_content_hash("  Hello World ") == expected
+    assert manager.calculate_content_hash("hello world", normalized=True) == expected
+    assert manager.calculate_content_hash("") == ""
+
+
+def test_exact_duplicates_match_between_list_and_stream():
+    manager = make_manager()
+    memories = memories_from(["Same note", "same note ", "other note", "", "SAME NOTE"])
+    expected_hash = manager.calculate_content_hash("same note")
+
+    assert manager.find_exact_duplicates(memories) == {expected_hash: [1, 2, 5]}
+    assert manager.find_exact_duplicates(iter(memories)) == {expected_hash: [1, 2, 5]}
+
+
+def test_prefilter_drops_memories_with_unique_length_head_or_tail():
+    manager = make_manager()
+    edge = "e" * deduplication_manager.EXACT_PREFIX_CHARS
+    memories = memories_from([
+        "Same note",
+        "same note",
+        "a longer note",
+        edge + "middle one" + edge,
+        edge + "middle two" + edge,
+        edge + "middle one" + edge + "!",
+    ])
+
+    candidates, normalized = manager._exact_duplicate_candidates(memories)
+
+    # Same length, head and tail survive even when the middle differs
+    assert sorted(memory.id for memory in candidates) == [1, 2, 4, 5]
+    assert normalized[[memory.id for memory in candidates].index(1)] == "same note"
+
+
+@pytest.mark.parametrize("hash_method", ["xxhash", "sha256"])
+def test_exact_duplicates_hash_prefilter_survivors_in_full(hash_method):
+    manager = make_manager(hash_method=hash_method)
+    edge = "e" * deduplication_manager.EXACT_PREFIX_CHARS
+    memories = memories_from([
+        edge + "middle one" + edge,
+        edge + "middle two" + edge,
+        edge + "middle one" + edge,
+    ])
+
+    duplicates = manager.find_exact_duplicates(memories)
+
+    assert list(duplicates.values()) == [[1, 3]]
+
+
+@pytest.mark.skipif(not deduplication_manager.SKLEARN_AVAILABLE, reason="scikit-learn not installed")
+def test_cosine_uses_term_frequencies_before_idf_is_fitted():
+    manager = make_manager()
+    first, second = "alpha alpha alpha beta", "alpha beta gamma"
+
+    cosine = manager.calculate_similarity(first, second)
+
+    # Unigram and bigram counts: (3, 1, 2, 1) . (1, 1, 1, 1, 1) over shared terms
+    assert cosine == pytest.approx(5 / 75 ** 0.5)
+    assert manager.calculate_similarity(first, second, method="jaccard") == pytest.approx(2 / 3)
+
+
+@pytest.mark.skipif(not deduplication_manager.SKLEARN_AVAILABLE, reason="scikit-learn not installed")
+def test_cosine_after_minhash_fuzzy_pass_is_not_jaccard():
+    manager = make_manager(fuzzy_method="minhash")
+    manager.find_fuzzy_duplicates(memories_from(["alpha beta", "gamma delta"]))
+    first, second = "alpha alpha alpha beta", "alpha beta gamma"
+
+    assert manager.calculate_similarity(first, second) != pytest.approx(
+        manager.calculate_similarity(first, second, method="jaccard")
+    )
+
+
+@pytest.mark.skipif(not deduplication_manager.SKLEARN_AVAILABLE, reason="scikit-learn not installed")
+def test_cosine_uses_idf_weights_once_fitted():
+    manager = make_manager(fuzzy_method="tfidf")
+    manager.find_fuzzy_duplicates(memories_from(["alpha beta", "alpha gamma", "alpha delta"]))
+    first, second = "alpha alpha alpha beta", "alpha beta gamma"
+
+    assert manager._vectorizer_fitted
+    assert manager.calculate_similarity(first, second) != pytest.approx(5 / 75 ** 0.5)
+
+
+def test_clear_cache_resets_feature_memo():
+    manager = make_manager()
+    manager.extract_features("a short note")
+    assert manager._feature_cache
+
+    manager.clear_cache()
+    assert not manager._feature_cache
+
+
+@pytest.mark.skipif(not deduplication_manager.DATASKETCH_AVAILABLE, reason="datasketch not installed")
+def test_minhash_finds_near_duplicates_verified_by_jaccard():
+    manager = make_manager(fuzzy_method="minhash", deduplication_threshold=0.8)
+    words = " ".join(f"word{i}" for i in range(40))
+    memories = memories_from([
+        words,
+        words + " extra",
+        " ".join(f"other{i}" for i in range(40)),
+        "",
+    ])
+
+    duplicates = manager.find_fuzzy_duplicates(memories)
+
+    assert dict(duplicates) == {1: [2], 2: [1]}
+
+
+@pytest.mark.skipif(not deduplication_manager.DATASKETCH_AVAILABLE, reason="datasketch not installed")
+def test_minhash_rejects_pairs_below_threshold():
+    manager = make_manager(fuzzy_method="minhash", deduplication_threshold=0.9)
+    # Jaccard similarity 10 / 14, well under the threshold
+    memories = memories_from([
+        " ".join(f"w{i}" for i in range(12)),
+        " ".join(f"w{i}" for i in range(2, 14)),
+    ])
+
+    assert dict(manager.find_fuzzy_duplicates(memories)) == {}
+
+
+def semantic_corpus(n, rng):
+    """n distinct texts with random vectors, plus a near copy of text 0 at the end."""
+    vectors = {f"text {i}": rng.standard_normal(32).astype(np.float32) for i in range(n)}
+    vectors["text 0 again"] = vectors["text 0"] + np.float32(0.01)
+    return vectors
+
+
+def test_semantic_pipes_corpus_once_in_process():
+    rng = np.random.default_rng(0)
+    vectors = semantic_corpus(24, rng)
+    manager = make_manager(deduplication_batch_size=10, deduplication_threshold=0.99)
+    manager.nlp = FakeNLP(vectors)
+
+    memories = memories_from(list(vectors))
+    duplicates = manager.find_semantic_duplicates(memories)
+
+    assert manager.nlp.pipe_calls == [(len(memories), 1)]
+    # The near copy sits in the last batch with text 20-23, not with text 0
+    assert duplicates == {}
+
+
+def test_semantic_finds_pairs_within_a_batch():
+    rng = np.random.default_rng(1)
+    vectors = semantic_corpus(5, rng)
+    manager = make_manager(deduplication_batch_size=100, deduplication_threshold=0.99)
+    manager.nlp = FakeNLP(vectors)
+
+    memories = memories_from(list(vectors) + [""])
+    duplicates = manager.find_semantic_duplicates(memories)
+
+    assert dict(duplicates) == {1: [6], 6: [1]}
+
+
+def test_semantic_n_process_is_configurable():
+    vectors = {"a": np.ones(4, dtype=np.float32), "b": np.ones(4, dtype=np.float32)}
+    manager = make_manager(semantic_n_process=4)
+    manager.nlp = FakeNLP(vectors)
+
+    manager.find_semantic_duplicates(memories_from(["a", "b"]))
+
+    assert manager.nlp.pipe_calls == [(2, 4)]
+
+
+def normalized_embeddings(rng, n=40, dim=16):
+    """Random unit rows with a few near copies so some pairs clear the threshold."""
+    embeddings = rng.standard_normal((n, dim)).astype(np.float32)
+    embeddings[n // 2:n // 2 + 5] = embeddings[:5] + np.float32(0.05) * rng.standard_normal((5, dim)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings
+
+
+def brute_force_pairs(embeddings, threshold):
+    similarity = embeddings @ embeddings.T
+    return {(i, j) for i, j in zip(*np.nonzero(similarity >= threshold)) if i < j}
+
+
+def test_int8_pairs_match_float_pairs_across_tiles(monkeypatch):
+    rng = np.random.default_rng(2)
+    embeddings = normalized_embeddings(rng)
+    manager = make_manager(semantic_quantize=True, deduplication_threshold=0.9)
+    monkeypatch.setattr(manager, "SIMILARITY_TILE", 7)
+
+    pairs = {(int(i), int(j)) for i, j in manager._similar_pairs(embeddings)}
+
+    expected = brute_force_pairs(embeddings, 0.9)
+    assert len(expected) >= 5
+    # int8 rounding can only move pairs sitting right at the threshold
+    similarity = embeddings @ embeddings.T
+    assert all(abs(similarity[i, j] - 0.9) < 0.02 for i, j in pairs ^ expected)
+
+
+@pytest.mark.skipif(not deduplication_manager.NUMBA_AVAILABLE, reason="numba not installed")
+def test_numba_cosine_pairs_match_brute_force():
+    rng = np.random.default_rng(3)
+    embeddings = normalized_embeddings(rng)
+
+    rows, cols = deduplication_manager._cosine_pairs(embeddings, np.float32(0.9))
+
+    assert set(zip(rows.tolist(), cols.tolist())) == brute_force_pairs(embeddings, 0.9)
+    assert len(rows) == len(set(zip(rows.tolist(), cols.tolist())))
+
+
+@pytest.mark.skipif(not deduplication_manager.NUMBA_AVAILABLE, reason="numba not installed")
+def test_similar_pairs_uses_numba_without_faiss(monkeypatch):
+    monkeypatch.setattr(deduplication_manager, "FAISS_AVAILABLE", False)
+    rng = np.random.default_rng(4)
+    embeddings = normalized_embeddings(rng)
+    manager = make_manager(deduplication_threshold=0.9)
+
+    pairs = {(int(i), int(j)) for i, j in manager._similar_pairs(embeddings)}
+
+    assert pairs == brute_force_pairs(embeddings, 0.9)
+
+
+@pytest.mark.skipif(not deduplication_manager.FAISS_AVAILABLE, reason="faiss not installed")
+def test_faiss_range_search_pairs_match_brute_force():
+    rng = np.random.default_rng(5)
+    embeddings = normalized_embeddings(rng)
+    manager = make_manager(deduplication_threshold=0.9)
+
+    pairs = [(int(i), int(j)) for i, j in manager._similar_pairs(embeddings)]
+
+    assert all(i < j for i, j in pairs)
+    assert len(pairs) == len(set(pairs))
+    assert set(pairs) == brute_force_pairs(embeddings, 0.9)
+
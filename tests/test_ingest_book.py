@@ -0,0 +1,64 @@
+"""
+Tests for RefactoredMemoryDB.ingest_book.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database.models import Base, Memory
+from src.database.refactored_memory_db import RefactoredMemoryDB
+
+BOOK = "Preface\n\nChapter 1\nalpha text\n\nChapter 2\n" + "beta text " * 8
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield RefactoredMemoryDB("sqlite:///:memory:", session=session)
+    session.close()
+    engine.dispose()
+
+
+def test_chapters_are_created_one_at_a_time_in_order(db, tmp_path, monkeypatch):
+    book_path = tmp_path / "book.txt"
+    book_path.write_text(BOOK, encoding="utf-8")
+
+    create_memory = db.create_memory
+    titles = []
+    in_flight = 0
+    overlapped = False
+
+    async def tracking_create_memory(**kwargs):
+        nonlocal in_flight, overlapped
+        in_flight += 1
+        overlapped |= in_flight > 1
+        try:
+            await asyncio.sleep(0)
+            titles.append(kwargs["title"])
+            if kwargs["title"] == "Chapter 3, Part 2":
+                raise RuntimeError("disk full")
+            return await create_memory(**kwargs)
+        finally:
+            in_flight -= 1
+
+    monkeypatch.setattr(db, "create_memory", tracking_create_memory)
+    result = asyncio.run(db.ingest_book(str(book_path), owner_id="1", chunk_size=30))
+
+    assert not overlapped
+    assert titles[:5] == ["Chapter 1", "Chapter 2", "Chapter 3, Part 1", "Chapter 3, Part 2", "Chapter 3, Part 3"]
+    assert titles[5].startswith("Summary: ")
+    assert result["errors"] == ["Chapter 3: disk full"]
+    # Four chapter memories plus the summary
+    assert result["created_memories"] == 5
+    stored = [memory.title for memory in db.session.query(Memory).order_by(Memory.id)]
+    assert stored[:4] == ["Chapter 1", "Chapter 2", "Chapter 3, Part 1", "Chapter 3, Part 3"]
+
+
+def test_ingest_rejects_missing_file(db, tmp_path):
+    result = asyncio.run(db.ingest_book(str(tmp_path / "missing.txt")))
+
+    assert result["error"].startswith("File not found")
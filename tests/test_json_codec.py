@@ -0,0 +1,45 @@
+"""
+Tests for the shared WebSocket JSON codec.
+"""
+import json
+from datetime import date, datetime
+
+import pytest
+
+from src.utils import json_codec
+
+
+@pytest.fixture(params=["orjson", "json"])
+def codec(request, monkeypatch):
+    if request.param == "orjson":
+        if json_codec.orjson is None:
+            pytest.skip("orjson not installed")
+    else:
+        monkeypatch.setattr(json_codec, "orjson", None)
+    return json_codec
+
+
+def test_round_trip(codec):
+    payload = {"id": "1", "data": {"items": [1, 2.5, None, True], "text": "héllo"}}
+
+    assert codec.loads(codec.dumps(payload)) == payload
+
+
+def test_dates_encode_as_iso_strings(codec):
+    payload = {"created_at": datetime(2024, 1, 2, 3, 4, 5), "day": date(2024, 1, 2)}
+
+    assert json.loads(codec.dumps(payload)) == {"created_at": "2024-01-02T03:04:05", "day": "2024-01-02"}
+
+
+def test_integer_keys_are_allowed(codec):
+    assert json.loads(codec.dumps({1: [2]})) == {"1": [2]}
+
+
+def test_unsupported_values_raise(codec):
+    with pytest.raises(TypeError):
+        codec.dumps({"value": object()})
+
+
+def test_invalid_frames_raise_value_error(codec):
+    with pytest.raises(ValueError):
+        codec.loads("{not json")
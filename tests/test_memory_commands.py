@@ -0,0 +1,105 @@
+"""
+Tests for the memory commands, run against an in-process fake database.
+"""
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+from src.mcp.commands.base_command import CommandContext
+from src.mcp.commands.memory_commands import BulkCreateMemoriesCommand, GetMemoryCommand, SearchMemoriesCommand
+
+
+class FakeDB:
+    """Records calls and flags any overlap between create_memory calls."""
+
+    def __init__(self, fail_titles=(), bulk_error=None):
+        self.fail_titles = set(fail_titles)
+        self.bulk_error = bulk_error
+        self.created = []
+        self.in_flight = 0
+        self.overlapped = False
+        self.search_calls = []
+
+    async def bulk_create_memories(self, rows, atomic=True):
+        if self.bulk_error:
+            raise self.bulk_error
+        return [await self.create_memory(**row) for row in rows]
+
+    async def get_memory(self, memory_id, **kwargs):
+        return next((memory for memory in self.created if memory.id == memory_id), None)
+
+    async def search_memories(self, **kwargs):
+        self.search_calls.append(kwargs)
+        return list(self.created)
+
+    async def create_memory(self, **row):
+        self.in_flight += 1
+        self.overlapped |= self.in_flight > 1
+        try:
+            await asyncio.sleep(0)
+            if row["title"] in self.fail_titles:
+                raise ValueError(f"cannot create {row['title']}")
+            memory = SimpleNamespace(id=len(self.created) + 1, created_at=datetime(2024, 1, 2, 3, 4, 5), **row)
+            self.created.append(memory)
+            return memory
+        finally:
+            self.in_flight -= 1
+
+
+def run_command(command, db, data, user_id="tester"):
+    return asyncio.run(command.execute(CommandContext(db=db, user_id=user_id), data))
+
+
+def test_bulk_create_falls_back_to_sequential_creates():
+    db = FakeDB(fail_titles={"b"}, bulk_error=RuntimeError("constraint failed"))
+    memories = [{"title": title, "content": f"{title} body"} for title in "abcd"]
+
+    result = run_command(BulkCreateMemoriesCommand(), db, {"memories": memories})
+
+    assert result.success
+    assert not db.overlapped
+    assert [memory.title for memory in db.created] == ["a", "c", "d"]
+    assert result.data["created_count"] == 3
+    assert [entry["index"] for entry in result.data["created_memories"]] == [0, 2, 3]
+    assert result.data["failed_memories"] == [{"index": 1, "error": "cannot create b"}]
+
+
+def seeded_db():
+    db = FakeDB()
+    asyncio.run(db.create_memory(title="note", content="body", context_id=None, access_level="public"))
+    return db
+
+
+def test_search_includes_content_by_default():
+    db = seeded_db()
+
+    result = run_command(SearchMemoriesCommand(), db, {"query": "note"})
+
+    assert db.search_calls[0]["include_content"] is True
+    assert result.data["memories"][0]["content"] == "body"
+
+
+def test_search_can_skip_content():
+    db = seeded_db()
+
+    result = run_command(SearchMemoriesCommand(), db, {"query": "note", "include_content": False})
+
+    assert db.search_calls[0]["include_content"] is False
+    assert result.data["memories"][0]["content"] is None
+
+
+def test_results_carry_created_at_as_iso_strings():
+    db = seeded_db()
+
+    found = run_command(GetMemoryCommand(), db, {"memory_id": 1})
+    searched = run_command(SearchMemoriesCommand(), db, {"query": "note"})
+
+    assert found.data["created_at"] == "2024-01-02T03:04:05"
+    assert searched.data["memories"][0]["created_at"] == "2024-01-02T03:04:05"
+
+
+def test_missing_created_at_is_none():
+    db = seeded_db()
+    db.created[0].created_at = None
+
+    assert run_command(GetMemoryCommand(), db, {"memory_id": 1}).data["created_at"] is None
@@ -0,0 +1,73 @@
+"""
+Tests for RefactoredMemoryDB content compression and its worker-thread offload.
+"""
+import asyncio
+import random
+import string
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database import refactored_memory_db
+from src.database.models import Base
+from src.database.refactored_memory_db import OFFLOAD_COMPRESSION_CHARS, RefactoredMemoryDB
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield RefactoredMemoryDB("sqlite:///:memory:", session=session)
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def offloaded(monkeypatch):
+    """Record the functions handed to asyncio.to_thread."""
+    calls = []
+    to_thread = asyncio.to_thread
+
+    async def recording_to_thread(func, *args, **kwargs):
+        calls.append(func.__name__)
+        return await to_thread(func, *args, **kwargs)
+
+    monkeypatch.setattr(refactored_memory_db.asyncio, "to_thread", recording_to_thread)
+    return calls
+
+
+def incompressible_text(length):
+    rng = random.Random(42)
+    return "".join(rng.choices(string.ascii_letters + string.digits + string.punctuation, k=length))
+
+
+def round_trip(db, content):
+    async def scenario():
+        compressed, was_compressed, _ = await db._compress(content)
+        return compressed, was_compressed, await db._decompress(compressed)
+
+    return asyncio.run(scenario())
+
+
+def test_small_content_round_trips_on_the_event_loop(db, offloaded):
+    content = "small memory content " * 100
+    assert len(content) < OFFLOAD_COMPRESSION_CHARS
+
+    compressed, was_compressed, restored = round_trip(db, content)
+
+    assert was_compressed
+    assert compressed != content
+    assert restored == content
+    assert offloaded == []
+
+
+def test_large_content_round_trips_in_a_worker_thread(db, offloaded):
+    content = incompressible_text(OFFLOAD_COMPRESSION_CHARS + 4096)
+
+    compressed, _, restored = round_trip(db, content)
+
+    assert restored == content
+    assert len(compressed) >= OFFLOAD_COMPRESSION_CHARS
+    assert offloaded == ["compress", "decompress"]
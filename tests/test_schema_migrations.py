@@ -0,0 +1,112 @@
+"""
+Tests for the SQLite schema migration scripts.
+"""
+import json
+import sqlite3
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database.migration_add_chunk_blobs import run_migration as migrate_chunk_blobs
+from src.database.migration_add_inline_content import run_migration as migrate_inline_content
+from src.database.models import Memory
+
+LEGACY_MEMORY_CHUNKS = """
+CREATE TABLE memory_chunks (
+    id INTEGER NOT NULL PRIMARY KEY,
+    memory_id INTEGER NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    chunk_data TEXT NOT NULL,
+    chunk_metadata JSON,
+    compression_type VARCHAR(20),
+    created_at DATETIME,
+    updated_at DATETIME,
+    is_active BOOLEAN
+)
+"""
+
+
+def columns(db_path, table):
+    with sqlite3.connect(db_path) as conn:
+        return {row[1]: row for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def test_chunk_blob_migration_rebuilds_legacy_chunks(tmp_path):
+    db_path = str(tmp_path / "memory.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(LEGACY_MEMORY_CHUNKS)
+        conn.execute(
+            "INSERT INTO memory_chunks (id, memory_id, chunk_index, chunk_data, chunk_metadata, compression_type) "
+            "VALUES (1, 7, 0, 'payload', ?, 'zstd')",
+            (json.dumps({"original_size": 120, "compressed_size": 40}),)
+        )
+        conn.execute(
+            "INSERT INTO memory_chunks (id, memory_id, chunk_index, chunk_data, compression_type) "
+            "VALUES (2, 7, 1, 'tail', 'none')"
+        )
+
+    migrate_chunk_blobs(db_path)
+
+    chunk_columns = columns(db_path, "memory_chunks")
+    assert {"blob_hash", "original_size", "compressed_size"} <= set(chunk_columns)
+    assert chunk_columns["chunk_data"][3] == 0  # nullable
+    assert "hash" in columns(db_path, "chunk_blobs")
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT id, chunk_data, original_size, compressed_size FROM memory_chunks ORDER BY id"
+        ).fetchall()
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(memory_chunks)")}
+    assert rows == [(1, "payload", 120, 40), (2, "tail", 4, 4)]
+    assert {"ix_memory_chunks_memory_id", "ix_memory_chunks_blob_hash"} <= indexes
+
+
+def test_chunk_blob_migration_is_idempotent(tmp_path):
+    db_path = str(tmp_path / "memory.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(LEGACY_MEMORY_CHUNKS)
+        conn.execute(
+            "INSERT INTO memory_chunks (id, memory_id, chunk_index, chunk_data) VALUES (1, 1, 0, 'x')"
+        )
+
+    migrate_chunk_blobs(db_path)
+    migrate_chunk_blobs(db_path)
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM memory_chunks").fetchone() == (1,)
+
+
+def test_inline_content_migration_makes_memory_queries_work(tmp_path):
+    db_path = str(tmp_path / "memory.db")
+    with sqlite3.connect(db_path) as conn:
+        # The memories table as created before inline_content existed
+        conn.execute(
+            "CREATE TABLE memories (id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, "
+            "content TEXT NOT NULL, access_level VARCHAR(20), owner_id INTEGER NOT NULL, "
+            "context_id INTEGER, created_at DATETIME, updated_at DATETIME, version INTEGER, "
+            "is_active BOOLEAN, memory_metadata JSON, embedding_vector BLOB, "
+            "content_compressed BOOLEAN, content_size INTEGER, access_count INTEGER, "
+            "last_accessed DATETIME)"
+        )
+        conn.execute("INSERT INTO memories (id, title, content, owner_id) VALUES (1, 'note', 'body', 1)")
+
+    migrate_inline_content(db_path)
+    migrate_inline_content(db_path)
+
+    assert "inline_content" in columns(db_path, "memories")
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    session = sessionmaker(bind=engine)()
+    try:
+        memory = session.get(Memory, 1)
+        assert memory.content == "body"
+        assert memory.inline_content is None
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def test_inline_content_migration_skips_missing_table(tmp_path):
+    db_path = str(tmp_path / "empty.db")
+    migrate_inline_content(db_path)
+    assert columns(db_path, "memories") == {}